@@ -0,0 +1,71 @@
+# -*- encoding: utf-8 -*-
+"""Content-addressed file store.
+
+Files are named after the SHA-256 of their content and spread over two
+levels of subdirectories (``fotos/ab/cd/abcd….jpg``), so identical
+uploads share one file and no directory grows past a few hundred
+entries.
+"""
+import hashlib
+import os
+import os.path as op
+import re
+import shutil
+import threading
+
+PREFIJO = 'fotos'
+
+BLOQUE = 1 << 20
+
+_DIRECCIONADA = re.compile(r'^%s/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$' % PREFIJO)
+
+# An original or any file derived from it, named after its hash
+_DERIVADA = re.compile(r'^%s/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})[\w.]*$' % PREFIJO)
+
+
+def huella(archivo):
+    """SHA-256 of a binary file object, read from its current position,
+    which is restored afterwards."""
+    inicio = archivo.tell()
+    resumen = hashlib.sha256()
+    for bloque in iter(lambda: archivo.read(BLOQUE), b''):
+        resumen.update(bloque)
+    archivo.seek(inicio)
+    return resumen.hexdigest()
+
+
+def ruta(digesto, nombre_original):
+    """Relative path of a file with the given hash, keeping the extension
+    of `nombre_original`."""
+    extension = op.splitext(nombre_original)[1].lower() or '.bin'
+    return '/'.join((PREFIJO, digesto[:2], digesto[2:4], digesto + extension))
+
+
+def es_direccionada(path):
+    return bool(path and _DIRECCIONADA.match(path))
+
+
+def digesto(path):
+    """Hash in the name of a stored file or of one derived from it, or
+    None for a file outside the store."""
+    coincidencia = _DERIVADA.match(path or '')
+    return coincidencia and coincidencia.group(1)
+
+
+def guardar(directorio, archivo, nombre_original):
+    """Store a binary file object under `directorio`.
+
+    Returns the relative path and whether the content was new; a file
+    already in the store is not written again.
+    """
+    path = ruta(huella(archivo), nombre_original)
+    destino = op.join(directorio, *path.split('/'))
+    if op.exists(destino):
+        return path, False
+
+    os.makedirs(op.dirname(destino), exist_ok=True)
+    temporal = '%s.%d.tmp' % (destino, threading.get_ident())
+    with open(temporal, 'wb') as salida:
+        shutil.copyfileobj(archivo, salida, BLOQUE)
+    os.replace(temporal, destino)
+    return path, True
@@ -0,0 +1,161 @@
+# -*- encoding: utf-8 -*-
+"""Read-only JSON API over the models.
+
+A Recurso publishes the columns of a model and the collections of
+children that can be embedded in its rows. Rows are read as column
+tuples, never as ORM objects: a page takes one query for its rows and
+one per embedded collection (``WHERE padre IN (...)``), whatever its
+size. Pages follow the id, so a deep page costs the same as the first,
+and NDJSON responses stream every row in batches of the same kind.
+"""
+import datetime
+import enum
+import json
+import zlib
+
+from sqlalchemy import inspect
+
+# Rows per page by default and at most, and per batch of a stream; also
+# bounds the parameters of the IN of the embedded collections
+LIMITE = 100
+MAXIMO = 500
+
+NDJSON = 'application/x-ndjson'
+
+
+class ErrorAPI(ValueError):
+    """Invalid request parameter, reported to the client with status 400."""
+
+
+def _valor(valor):
+    if isinstance(valor, enum.Enum):
+        return valor.name
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    raise TypeError(repr(valor))
+
+
+def volcar(objeto):
+    """JSON text of `objeto`; vocabulary values become their names."""
+    return json.dumps(objeto, default=_valor, ensure_ascii=False, separators=(',', ':'))
+
+
+def enteros(texto, nombre):
+    """Integers of the comma separated `texto`."""
+    try:
+        return [int(parte) for parte in texto.split(',') if parte.strip()]
+    except ValueError:
+        raise ErrorAPI('%s: se esperaban números separados por comas' % nombre)
+
+
+class Recurso(object):
+    """The columns of `modelo` and the `hijos`, name of a one-to-many
+    relationship of the model -> Recurso of its target, that a row can
+    embed."""
+
+    def __init__(self, modelo, hijos=None):
+        self.modelo = modelo
+        mapper = inspect(modelo)
+        claves = [mapper.get_property_by_column(columna).key
+                  for columna in mapper.local_table.columns]
+        self.columnas = dict((clave, getattr(modelo, clave)) for clave in claves)
+        self.hijos = {}
+        for nombre, recurso in (hijos or {}).items():
+            relacion = mapper.relationships[nombre]
+            (_, remota), = relacion.local_remote_pairs
+            self.hijos[nombre] = (recurso, getattr(recurso.modelo, remota.key))
+
+    def campos(self, texto):
+        """Columns named in the comma separated `texto`, always with the
+        id; every column when `texto` is empty."""
+        if not texto:
+            return list(self.columnas)
+        campos = ['id']
+        for nombre in texto.split(','):
+            nombre = nombre.strip()
+            if nombre not in self.columnas:
+                raise ErrorAPI('%s no tiene el campo %r; tiene %s' % (
+                    self.modelo.__name__, nombre, ', '.join(self.columnas)))
+            if nombre not in campos:
+                campos.append(nombre)
+        return campos
+
+    def filtro(self, nombre, texto):
+        """Equality condition of column `nombre` with the text `texto`."""
+        columna = self.columnas[nombre]
+        try:
+            tipo = columna.type.python_type
+        except NotImplementedError:
+            tipo = None
+        try:
+            if texto == '':
+                return columna.is_(None)
+            if tipo in (int, float):
+                return columna == tipo(texto)
+            if isinstance(tipo, type) and issubclass(tipo, enum.Enum):
+                return columna == tipo[texto]
+        except (ValueError, KeyError):
+            raise ErrorAPI('%s: valor inválido %r' % (nombre, texto))
+        return columna == texto
+
+    def filas(self, sesion, campos, condiciones=(), tras=None, limite=LIMITE,
+              incluir=None):
+        """Up to `limite` rows after id `tras`, as dicts of `campos`, each
+        with the collections of `incluir` (name -> fields) embedded."""
+        consulta = sesion.query(*[self.columnas[c] for c in campos]) \
+            .filter(*condiciones).order_by(self.columnas['id'])
+        if tras is not None:
+            consulta = consulta.filter(self.columnas['id'] > tras)
+        filas = [dict(zip(campos, fila)) for fila in consulta.limit(limite)]
+        for nombre, campos_hijo in (incluir or {}).items():
+            self.incluir(sesion, filas, nombre, campos_hijo)
+        return filas
+
+    def incluir(self, sesion, filas, nombre, campos):
+        """Add to each of `filas` the list of its `nombre` children."""
+        recurso, padre = self.hijos[nombre]
+        por_padre = dict((fila['id'], []) for fila in filas)
+        for fila in filas:
+            fila[nombre] = por_padre[fila['id']]
+        if not por_padre:
+            return
+        consulta = sesion.query(padre, *[recurso.columnas[c] for c in campos]) \
+            .filter(padre.in_(list(por_padre))).order_by(padre, recurso.columnas['id'])
+        for fila in consulta:
+            por_padre[fila[0]].append(dict(zip(campos, fila[1:])))
+
+    def todas(self, sesion, campos, condiciones=(), tras=None, limite=None,
+              incluir=None, lote=MAXIMO):
+        """Every row after `tras`, or the first `limite`, read in batches."""
+        while limite is None or limite > 0:
+            filas = self.filas(sesion, campos, condiciones, tras,
+                               lote if limite is None else min(lote, limite), incluir)
+            for fila in filas:
+                yield fila
+            if len(filas) < lote:
+                return
+            tras = filas[-1]['id']
+            if limite is not None:
+                limite -= len(filas)
+
+
+def ndjson(filas):
+    """One line of JSON per row, in chunks of about a batch."""
+    partes = []
+    for fila in filas:
+        partes.append(volcar(fila))
+        if len(partes) == MAXIMO:
+            yield ('\n'.join(partes) + '\n').encode('utf-8')
+            partes = []
+    if partes:
+        yield ('\n'.join(partes) + '\n').encode('utf-8')
+
+
+def gzip(partes, nivel=6):
+    """Compress a stream of bytes into a gzip stream, chunk by chunk."""
+    compresor = zlib.compressobj(nivel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for parte in partes:
+        comprimida = compresor.compress(parte)
+        if comprimida:
+            yield comprimida
+    yield compresor.flush()
@@ -1,16 +1,27 @@
 # -*- encoding: utf-8 -*-
+import collections
+import contextlib
 import os
 import os.path as op
+import sqlite3
+import threading
+import time
+import datetime
 
-from flask import Flask, url_for, redirect, render_template, request
+from flask import Flask, current_app, g, url_for, redirect, render_template, request, jsonify, abort, \
+    flash, get_flashed_messages, make_response, session, Response, stream_with_context, \
+    send_from_directory
+from flask.cli import AppGroup
 
-from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import Column, Integer, Unicode, ForeignKey
 from sqlalchemy.ext.associationproxy import association_proxy
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy.orm import relationship, backref, aliased, joinedload, selectinload, \
+    object_session
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.engine import Engine
 from sqlalchemy.sql.expression import func
-from sqlalchemy import cast, Float
+from sqlalchemy import cast, case, and_, or_, type_coerce, inspect, literal, literal_column, \
+    select, table, column, Float, String
 
 from wtforms import form, fields, validators, widgets, SelectMultipleField
 
@@ -18,57 +29,73 @@ import flask_admin as admin
 from flask_admin import form as formadmin
 
 from flask_admin import helpers, expose
+from flask_admin.actions import action
 from flask_admin.contrib import sqla
 from flask_admin.contrib.sqla import filters
+from flask_admin.contrib.sqla.form import AdminModelConverter
+from flask_admin.form.widgets import Select2Widget
+from flask_admin.model.filters import convert
+from flask_admin.model.form import converts
 
 import flask_login as login
 from flask_login import login_required
 
+from werkzeug.datastructures import CombinedMultiDict
+from werkzeug.utils import secure_filename
+from wtforms.widgets import html_params
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from jinja2 import Markup
 
+import click
 import numpy as np
 import enum
-
-# Create Flask application
-app = Flask(__name__)
-
-# Create dummy secrey key so we can use sessions
-app.config['SECRET_KEY'] = '123456790'
-
-# Create in-memory database
-app.config['DATABASE_FILE'] = 'sample_db.sqlite'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + app.config['DATABASE_FILE']
-app.config['SQLALCHEMY_ECHO'] = True
-db = SQLAlchemy(app)
-
-# Create directory for file fields to use
-file_path = op.join(op.dirname(__file__), 'static')
-try:
-    os.mkdir(file_path)
-except OSError:
-    pass
+import bisect
+import itertools
+
+import almacen
+import api
+import basedatos
+import busqueda
+import cache
+import codigos
+import configuracion
+import derivados
+import espacial
+import estadistica
+import exportacion
+import importacion
+import instrumentacion
+import masivo
+import paginacion
+import sinteticos
+import vocabularios
+from vocabularios import (
+    Subgrupos, Roca, Estado, Tipo, Eje, Clase_Art, Cant_Filos, Cant_Puntas,
+    Clasificacion_Forma_Base, Cant_Cicatrices, Origen_extraccion, Alteraciones,
+    Estado_Talon, Superficie_Talon, Clase_tecnica, Reduc_uni_sbordes,
+    Las_inv_lim, Forma_geo, Estado_bisel, Mantenimiento, Parte_pasiva,
+    Forma_lascados, Sustancia)
+
+# Bound to an application by create_app
+db = basedatos.BaseDatos()
+
+def carpeta_fotos():
+    """Directory of the uploaded photos of the current application."""
+    return current_app.config['FOTOS_DIR']
 
 # Initialize flask-login
-def init_login():
-    login_manager = login.LoginManager()
-    login_manager.init_app(app)
+login_manager = login.LoginManager()
 
-    # Create user loader function
-    @login_manager.user_loader
-    def load_user(user_id):
-        return db.session.query(User).get(user_id)
+# Create user loader function
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.query(User).get(user_id)
 
 # Flask views
-@app.route('/')
 def index():
     return render_template('index.html')
 
-
-# Initialize flask-login
-init_login()
-
 # Create user model.
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -131,32 +158,40 @@ class RegistrationForm(form.Form):
             raise validators.ValidationError('Duplicate username')
 
 # Create useful functions
-def clasificacion_tamano(dato):
-    tamanos = [0, 20, 40, 60, 80, 120, 160]
-    clasificacion = ['Tamano 1: Muy pequeno', 'Tamano 1: Pequeno', 'Tamano 2: Mediano pequeno', 'Tamano 2: Mediano grande', 'Tamano 3: Grande', 'Tamano 3: Muy grande', 'Tamano 4: Grandísimo']
-    tamanos.reverse()
-    clasificacion.reverse()
+TAMANOS = [(0, 'Tamano 1: Muy pequeno'),
+           (20, 'Tamano 1: Pequeno'),
+           (40, 'Tamano 2: Mediano pequeno'),
+           (60, 'Tamano 2: Mediano grande'),
+           (80, 'Tamano 3: Grande'),
+           (120, 'Tamano 3: Muy grande'),
+           (160, 'Tamano 4: Grandísimo')]
+
+MODULOS_LARGO_ANCHO = [(0, 'H: Cortísimo o corto anchísimo'),
+                       (1/2, 'G: Lasca muy ancha o corto ancho'),
+                       (3/4, 'F: Lasca ancha o corto ancho'),
+                       (1, 'E: Lasca o laminar normal o mediana normal'),
+                       (3/2, 'D: Lasca o laminar mediano alargada'),
+                       (2, 'C: Lámina o laminar normal'),
+                       (3, 'B: Lámina o laminar angosto'),
+                       (6, 'A: Lámina o laminar muy angosto')]
+
+MODULOS_ANCHO_ESPESOR = ['Muy grueso / muy espeso', 'Grueso / espeso', 'Otro']
+
+OPCIONES_TAMANO = [(codigo, j) for codigo, (i, j) in enumerate(TAMANOS)]
+
+# Bin edges for bisect and np.searchsorted
+BORDES_TAMANO = np.array([i for i, j in TAMANOS], dtype=float)
+BORDES_LARGO_ANCHO = np.array([i for i, j in MODULOS_LARGO_ANCHO], dtype=float)
+
+DATOS_FALTANTES = 'Datos faltantes'
 
-    tamano_clasificacion = [(i, j) for i, j in zip(tamanos, clasificacion)]
-    for i, j in tamano_clasificacion:
+def clasificacion_tamano(dato):
+    for i, j in reversed(TAMANOS):
         if dato >= i:
             return j
 
 def modulo_largo_ancho(pendiente):
-    modulos = [0, 1/2, 3/4, 1, 3/2, 2, 3, 6]
-    clasificacion = ['H: Cortísimo o corto anchísimo',
-                     'G: Lasca muy ancha o corto ancho',
-                     'F: Lasca ancha o corto ancho',
-                     'E: Lasca o laminar normal o mediana normal',
-                     'D: Lasca o laminar mediano alargada',
-                     'C: Lámina o laminar normal',
-                     'B: Lámina o laminar angosto',
-                     'A: Lámina o laminar muy angosto']
-    modulos.reverse()
-    clasificacion.reverse()
-
-    modulo_clasificacion = [(i, j) for i, j in zip(modulos, clasificacion)]
-    for i, j in modulo_clasificacion:
+    for i, j in reversed(MODULOS_LARGO_ANCHO):
         if pendiente >= i:
             return j
 
@@ -166,387 +201,112 @@ def modulo_ancho_espesor(a_e):
     elif a_e <= 3:
         return 'Grueso / espeso'
     else:
-        return 'Otro (' + str(a_e) + ')'
-
-# Create useful data structures
-
-Subgrupos = enum.Enum("Grupos y subgrupos", [
-("Tajadores (Chopper) con filo de sección asimétrica: Cóncavo (Lateral, frontal)","Tajadores_Chopper_con_filo_de_sección_asimétrica_Cóncavo_Lateral_frontal"),
-("Tajadores (Chopper) con filo de sección asimétrica: Convexo (Lateral, frontal)","Tajadores_Chopper_con_filo_de_sección_asimétrica_Convexo_Lateral_frontal"),
-("Tajadores (Chopper) con filo de sección asimétrica: Fragmentos no diferenciados","Tajadores_Chopper_con_filo_de_sección_asimétrica_Fragmentos_no_diferenciados"),
-("Unifaces: con arista sinuosa irregular","Unifaces_con_arista_sinuosa_irregular"),
-("Unifaces: con arista sinuosa regularizada","Unifaces_con_arista_sinuosa_regularizada"),
-("Unifaces: fragmentos no diferenciados","Unifaces_fragmentos_no_diferenciados"),
-("Bifaces:  con arista sinuosa irregular","Bifaces_con_arista_sinuosa_irregular"),
-("Bifaces:  con arista sinuosa regularizada","Bifaces_con_arista_sinuosa_regularizada"),
-("Bifaces:  fragmentos no diferenciados","Bifaces_fragmentos_no_diferenciados"),
-("Piezas foliaceas: con arista sinuosa irregular","Piezas_foliaceas_con_arista_sinuosa_irregular"),
-("Piezas foliaceas: con arista sinuosa regularizada","Piezas_foliaceas_con_arista_sinuosa_regularizada"),
-("Piezas foliaceas: fragmentos no diferenciados","Piezas_foliaceas_fragmentos_no_diferenciados"),
-("Filos largos de arista sinuosa, bisel simétrico o asimétrico bifacial: Recto (Lateral, frontal)","Filos_largos_de_arista_sinuosa_bisel_simétrico_o_asimétrico_bifacial_Recto_Lateral_frontal"),
-("Filos largos de arista sinuosa, bisel simétrico o asimétrico bifacial: Cóncavo (Lateral, frontal)","Filos_largos_de_arista_sinuosa_bisel_simétrico_o_asimétrico_bifacial_Cóncavo_Lateral_frontal"),
-("Filos largos de arista sinuosa, bisel simétrico o asimétrico bifacial: Convexo (Lateral, frontal)","Filos_largos_de_arista_sinuosa_bisel_simétrico_o_asimétrico_bifacial_Convexo_Lateral_frontal"),
-("Filos largos de arista sinuosa, bisel simétrico o asimétrico bifacial: Fragmento no diferenciado","Filos_largos_de_arista_sinuosa_bisel_simétrico_o_asimétrico_bifacial_Fragmento_no_diferenciado"),
-("Picos, artefactos de retalla extendida, bifacial o unifacial, de tamano muy grande o grandísimo, con extremo distal en punta de sección triédrica o romboidal muy gruesa: con arista sinuosa irregular","Picos_artefactos_de_retalla_extendida_bifacial_o_unifacial_de_tamano_muy_grande_o_grandísimo_con_extremo_distal_en_punta_de_sección_triédrica_o_romboidal_muy_gruesa_con_arista_sinuosa_irregular"),
-("Picos, artefactos de retalla extendida, bifacial o unifacial, de tamano muy grande o grandísimo, con extremo distal en punta de sección triédrica o romboidal muy gruesa: con arista sinuosa regularizada","Picos_artefactos_de_retalla_extendida_bifacial_o_unifacial_de_tamano_muy_grande_o_grandísimo_con_extremo_distal_en_punta_de_sección_triédrica_o_romboidal_muy_gruesa_con_arista_sinuosa_regularizada"),
-("Picos, artefactos de retalla extendida, bifacial o unifacial, de tamano muy grande o grandísimo, con extremo distal en punta de sección triédrica o romboidal muy gruesa: fragmentos no diferenciados","Picos_artefactos_de_retalla_extendida_bifacial_o_unifacial_de_tamano_muy_grande_o_grandísimo_con_extremo_distal_en_punta_de_sección_triédrica_o_romboidal_muy_gruesa_fragmentos_no_diferenciados"),
-("Palas: lajas o lascas muy grandes o grandísimas, con filo transversal de retalla y/o retoque marginal o periférico;sector de prehensión o enmangue esbozado, destacado o diferenciado","Palas_lajas_o_lascas_muy_grandes_o_grandísimas_con_filo_transversal_de_retalla_y/o_retoque_marginal_o_periférico;sector_de_prehensión_o_enmangue_esbozado_destacado_o_diferenciado"),
-("Cepillos (Rabot): Filo largo convexo (Lateral, frontal)","Cepillos_Rabot_Filo_largo_convexo_Lateral_frontal"),
-("Cepillos (Rabot): Filo largo recto (lateral, frontal)","Cepillos_Rabot_Filo_largo_recto_lateral_frontal"),
-("Cepillos (Rabot): Filo corto convexo (Lateral, frontal)","Cepillos_Rabot_Filo_corto_convexo_Lateral_frontal"),
-("Cepillos (Rabot): Filo corto recto (idem.)","Cepillos_Rabot_Filo_corto_recto_idem."),
-("Cepillos (Rabot): Filo restringido convexo (Lateral, frontal)","Cepillos_Rabot_Filo_restringido_convexo_Lateral_frontal"),
-("Cepillos (Rabot): Filo restringido  recto (Lateral, frontal)","Cepillos_Rabot_Filo_restringido_recto_Lateral_frontal"),
-("Cepillos (Rabot): Fragmentos no diferenciados","Cepillos_Rabot_Fragmentos_no_diferenciados"),
-("Raspadores: de filo corto (Lateral, frontal)","Raspadores_de_filo_corto_Lateral_frontal"),
-("Raspadores: de filo restringido (Lateral, frontal, angular)","Raspadores_de_filo_restringido_Lateral_frontal_angular"),
-("Raspadores: de filo largo (Lateral, frontal)","Raspadores_de_filo_largo_Lateral_frontal"),
-("Raspadores: de filo extendido (Fronto-lateral, fronto-bilateral)","Raspadores_de_filo_extendido_Fronto-lateral_fronto-bilateral"),
-("Raspadores: de filo perimetral","Raspadores_de_filo_perimetral"),
-("Raspadores: fragmentos no diferenciados","Raspadores_fragmentos_no_diferenciados"),
-("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  de filo corto (Lateral, frontal)","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._de_filo_corto_Lateral_frontal"),
-("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  de filo restringido (Lateral, frontal, angular)","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._de_filo_restringido_Lateral_frontal_angular"),
-("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  de filo largo (Lateral, frontal)","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._de_filo_largo_Lateral_frontal"),
-("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  de filo extendido (Fronto-lateral, fronto-bilateral)","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._de_filo_extendido_Fronto-lateral_fronto-bilateral"),
-("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  fragmentos no diferenciados","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._fragmentos_no_diferenciados"),
-("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filo convexo(Lateral, frontal)","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filo_convexo(Lateral_frontal"),
-("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filo recto (Lateral, frontal)","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filo_recto_Lateral_frontal"),
-("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filo concavo (Lateral, frontal)","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filo_concavo_Lateral_frontal"),
-("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filos convergentes en apice romo","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filos_convergentes_en_apice_romo"),
-("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filos convergentes en punta","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filos_convergentes_en_punta"),
-("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: Fragmentos no diferenciado","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_Fragmentos_no_diferenciado"),
-("Laminas retocadas: de filo convexo","Laminas_retocadas_de_filo_convexo"),
-("Laminas retocadas: de filo recto","Laminas_retocadas_de_filo_recto"),
-("Laminas retocadas: de filo concavo","Laminas_retocadas_de_filo_concavo"),
-("Laminas retocadas: de filos convergentes en apice romo","Laminas_retocadas_de_filos_convergentes_en_apice_romo"),
-("Laminas retocadas: de filos convergentes en punta","Laminas_retocadas_de_filos_convergentes_en_punta"),
-("Laminas retocadas: de filos recto/concavos con escotaduras contrapuestas [Láminas estranguladas]","Laminas_retocadas_de_filos_recto/concavos_con_escotaduras_contrapuestas_Láminas_estranguladas"),
-("Laminas retocadas: fragmentos no diferenciados","Laminas_retocadas_fragmentos_no_diferenciados"),
-("Raederas-raspadores (Limaces) .Artefactos con filo perimetral en bisel obicuo o abrupto, sección asimétrica y módulo laminar","Raederas-raspadores_Limaces_.Artefactos_con_filo_perimetral_en_bisel_obicuo_o_abrupto_sección_asimétrica_y_módulo_laminar"),
-("Cuchillos de filo formatizado: de filo convexo(Lateral, frontal)","Cuchillos_de_filo_formatizado_de_filo_convexo(Lateral_frontal"),
-("Cuchillos de filo formatizado: de filo recto (Lateral, frontal)","Cuchillos_de_filo_formatizado_de_filo_recto_Lateral_frontal"),
-("Cuchillos de filo formatizado: de filo concavo (Lateral, frontal)","Cuchillos_de_filo_formatizado_de_filo_concavo_Lateral_frontal"),
-("Cuchillos de filo formatizado: de filos convergentes en apice romo","Cuchillos_de_filo_formatizado_de_filos_convergentes_en_apice_romo"),
-("Cuchillos de filo formatizado: de filos convergentes en punta","Cuchillos_de_filo_formatizado_de_filos_convergentes_en_punta"),
-("Cuchillos de filo formatizado: fragmentos no diferenciados","Cuchillos_de_filo_formatizado_fragmentos_no_diferenciados"),
-("Cuchillos de filo natural con dorso formatizado: de filo convexo(Lateral, frontal)","Cuchillos_de_filo_natural_con_dorso_formatizado_de_filo_convexo(Lateral_frontal"),
-("Cuchillos de filo natural con dorso formatizado: de filo recto (Lateral, frontal)","Cuchillos_de_filo_natural_con_dorso_formatizado_de_filo_recto_Lateral_frontal"),
-("Cuchillos de filo natural con dorso formatizado: de filo concavo (Lateral, frontal)","Cuchillos_de_filo_natural_con_dorso_formatizado_de_filo_concavo_Lateral_frontal"),
-("Cuchillos de filo natural con dorso formatizado: fragmentos no diferenciados","Cuchillos_de_filo_natural_con_dorso_formatizado_fragmentos_no_diferenciados"),
-("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: de filo convexo (Lateral, frontal o angular)","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_de_filo_convexo_Lateral_frontal_o_angular"),
-("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: de filo recto (Lateral, frontal o angular)","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_de_filo_recto_Lateral_frontal_o_angular"),
-("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: de filos convergentes en apice romo","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_de_filos_convergentes_en_apice_romo"),
-("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: de filos convergentes en punta","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_de_filos_convergentes_en_punta"),
-("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: fragmentos no diferenciados","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_fragmentos_no_diferenciados"),
-("Grupo de las cunas, gubias y escoplos 	sección simétrica o asimétrica: Cuna (filo corto de bisel simetrico, convexo o recto)","Grupo_de_las_cunas_gubias_y_escoplos_	sección_simétrica_o_asimétrica_Cuna_filo_corto_de_bisel_simetrico_convexo_o_recto"),
-("Grupo de las cunas, gubias y escoplos 	sección simétrica o asimétrica: Gubia (arista cóncavilínea en norma sagital o lateral,simet.ó asim., recta o cóncava)","Grupo_de_las_cunas_gubias_y_escoplos_	sección_simétrica_o_asimétrica_Gubia_arista_cóncavilínea_en_norma_sagital_o_lateral,simet.ó_asim._recta_o_cóncava"),
-("Grupo de las cunas, gubias y escoplos 	sección simétrica o asimétrica: Escoplo (filos rectos, bisel asimétrico)","Grupo_de_las_cunas_gubias_y_escoplos_	sección_simétrica_o_asimétrica_Escoplo_filos_rectos_bisel_asimétrico"),
-("Grupo de las cunas, gubias y escoplos 	sección simétrica o asimétrica: fragmentos no diferenciados","Grupo_de_las_cunas_gubias_y_escoplos_	sección_simétrica_o_asimétrica_fragmentos_no_diferenciados"),
-("Muescas: retocada o microrretocada","Muescas_retocada_o_microrretocada"),
-("Muescas: de lascado simple","Muescas_de_lascado_simple"),
-("Raspadores-denticulados: de filo corto (Lateral, frontal)","Raspadores-denticulados_de_filo_corto_Lateral_frontal"),
-("Raspadores-denticulados: de filo restringido (Lateral, frontal, angular)","Raspadores-denticulados_de_filo_restringido_Lateral_frontal_angular"),
-("Raspadores-denticulados: de filo largo (Lateral, frontal)","Raspadores-denticulados_de_filo_largo_Lateral_frontal"),
-("Raspadores-denticulados: de filo extendido (Fronto-lateral, fronto-bilateral)","Raspadores-denticulados_de_filo_extendido_Fronto-lateral_fronto-bilateral"),
-("Raspadores-denticulados: de filo perimetral","Raspadores-denticulados_de_filo_perimetral"),
-("Raspadores-denticulados: fragmentos no diferenciados","Raspadores-denticulados_fragmentos_no_diferenciados"),
-("Cuchillos-denticulados: de filo convexo (Lateral, frontal o angular)","Cuchillos-denticulados_de_filo_convexo_Lateral_frontal_o_angular"),
-("Cuchillos-denticulados: de filo recto (Lateral, frontal o angular)","Cuchillos-denticulados_de_filo_recto_Lateral_frontal_o_angular"),
-("Cuchillos-denticulados: de filos convergentes en apice romo","Cuchillos-denticulados_de_filos_convergentes_en_apice_romo"),
-("Cuchillos-denticulados: de filos convergentes en punta","Cuchillos-denticulados_de_filos_convergentes_en_punta"),
-("Cuchillos-denticulados: fragmentos no diferenciados","Cuchillos-denticulados_fragmentos_no_diferenciados"),
-("Cortantes-denticulados: de filo restringido (Lateral, frontal, angular)","Cortantes-denticulados_de_filo_restringido_Lateral_frontal_angular"),
-("Cortantes-denticulados: de filo corto menor a 2 cm ","Cortantes-denticulados_de_filo_corto_menor_a_2_cm_"),
-("Cortantes-denticulados: de filo largo de 3cm o menor (Lateral, frontal)","Cortantes-denticulados_de_filo_largo_de_3cm_o_menor_Lateral_frontal"),
-("Cortantes-denticulados: de filo extendido en piezas menores a 3cm. (Fronto-lateral, fronto-bilateral)","Cortantes-denticulados_de_filo_extendido_en_piezas_menores_a_3cm._Fronto-lateral_fronto-bilateral"),
-("Cortantes-denticulados: de filo perrimetral, en piezas menores a 3cm de long.o ancho máximo.","Cortantes-denticulados_de_filo_perrimetral_en_piezas_menores_a_3cm_de_long.o_ancho_máximo."),
-("Cepillos-denticulados: de filo corto (Lateral, frontal)","Cepillos-denticulados_de_filo_corto_Lateral_frontal"),
-("Cepillos-denticulados: de filo restringido (Lateral, frontal, angular)","Cepillos-denticulados_de_filo_restringido_Lateral_frontal_angular"),
-("Cepillos-denticulados: de filo largo (Lateral, frontal)","Cepillos-denticulados_de_filo_largo_Lateral_frontal"),
-("Cepillos-denticulados: de filo extendido (Fronto-lateral, fronto-bilateral)","Cepillos-denticulados_de_filo_extendido_Fronto-lateral_fronto-bilateral"),
-("Cepillos-denticulados: de filo perimetral","Cepillos-denticulados_de_filo_perimetral"),
-("Cepillos-denticulados: fragmentos no diferenciados","Cepillos-denticulados_fragmentos_no_diferenciados"),
-("Puntas entre muescas:  Grupo de los artefactos burilantes","Puntas_entre_muescas_Grupo_de_los_artefactos_burilantes"),
-("Puntas entre muescas: Punta burilante simple","Puntas_entre_muescas_Punta_burilante_simple"),
-("Puntas entre muescas: Punta burilante de arista oblicua","Puntas_entre_muescas_Punta_burilante_de_arista_oblicua"),
-("Puntas entre muescas: Muesca burilante","Puntas_entre_muescas_Muesca_burilante"),
-("Puntas entre muescas: Buril","Puntas_entre_muescas_Buril"),
-("Perforadores: Punta de sección asimetrica (axial,angular), base de prehensión o enmangue format.","Perforadores_Punta_de_sección_asimetrica_axial,angular_base_de_prehensión_o_enmangue_format."),
-("Perforadores: Punta de sección asimétrica (axial,angular), base de prehensión o enmangue no formatizado.","Perforadores_Punta_de_sección_asimétrica_axial,angular_base_de_prehensión_o_enmangue_no_formatizado."),
-("Perforadores: Punta de sección simétrica (axial,angular), base de prehensión o enmangue formatizado","Perforadores_Punta_de_sección_simétrica_axial,angular_base_de_prehensión_o_enmangue_formatizado"),
-("Perforadores: Punta de sección simétrica (axial,angular), base de prehensión o enmangue no formatizado","Perforadores_Punta_de_sección_simétrica_axial,angular_base_de_prehensión_o_enmangue_no_formatizado"),
-("Perforadores: Fragmentos no diferenciados","Perforadores_Fragmentos_no_diferenciados"),
-("Puntas de proyectil (cabezales líticos): Apedunculada (forma geométrica del limbo) con aletas","Puntas_de_proyectil_cabezales_líticos_Apedunculada_forma_geométrica_del_limbo_con_aletas"),
-("Puntas de proyectil (cabezales líticos): Apedunculada (forma geom.del limbo) sin aletas","Puntas_de_proyectil_cabezales_líticos_Apedunculada_forma_geom.del_limbo_sin_aletas"),
-("Puntas de proyectil (cabezales líticos): Preforma de punta apedunculada","Puntas_de_proyectil_cabezales_líticos_Preforma_de_punta_apedunculada"),
-("Puntas de proyectil (cabezales líticos): Fragmento proximal de punta apedunculada","Puntas_de_proyectil_cabezales_líticos_Fragmento_proximal_de_punta_apedunculada"),
-("Puntas de proyectil (cabezales líticos): Pedúnculo esbozado, limbo (forma geom.) con hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_esbozado_limbo_forma_geom._con_hombros_y/o_aletas"),
-("Puntas de proyectil (cabezales líticos): Pedúnculo esbozado, limbo (forma geom.) sin hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_esbozado_limbo_forma_geom._sin_hombros_y/o_aletas"),
-("Puntas de proyectil (cabezales líticos): Pedúnculo destacado, limbo (forma geom.) con hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_destacado_limbo_forma_geom._con_hombros_y/o_aletas"),
-("Puntas de proyectil (cabezales líticos): Pedúnculo destacado, limbo (forma geom.) sin hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_destacado_limbo_forma_geom._sin_hombros_y/o_aletas"),
-("Puntas de proyectil (cabezales líticos): Pedúnculo diferenciado,  limbo (forma geom.) con hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_diferenciado_limbo_forma_geom._con_hombros_y/o_aletas"),
-("Perforadores: Apedunculada (forma geométrica del limbo) con aletas","Perforadores_Apedunculada_forma_geométrica_del_limbo_con_aletas"),
-("Perforadores: Apedunculada (forma geom.del limbo) sin aletas","Perforadores_Apedunculada_forma_geom.del_limbo_sin_aletas"),
-("Perforadores: Preforma de punta apedunculada","Perforadores_Preforma_de_punta_apedunculada"),
-("Perforadores: Fragmento proximal de punta apedunculada","Perforadores_Fragmento_proximal_de_punta_apedunculada"),
-("Perforadores: Pedúnculo esbozado, limbo (forma geom.) con hombros y/o aletas","Perforadores_Pedúnculo_esbozado_limbo_forma_geom._con_hombros_y/o_aletas"),
-("Perforadores: Pedúnculo esbozado, limbo (forma geom.) sin hombros y/o aletas","Perforadores_Pedúnculo_esbozado_limbo_forma_geom._sin_hombros_y/o_aletas"),
-("Perforadores: Pedúnculo destacado, limbo (forma geom.) con hombros y/o aletas","Perforadores_Pedúnculo_destacado_limbo_forma_geom._con_hombros_y/o_aletas"),
-("Perforadores: Pedúnculo destacado, limbo (forma geom.) sin hombros y/o aletas","Perforadores_Pedúnculo_destacado_limbo_forma_geom._sin_hombros_y/o_aletas"),
-("Perforadores: Pedúnculo diferenciado,  limbo (forma geom.) con hombros y/o aletas","Perforadores_Pedúnculo_diferenciado_limbo_forma_geom._con_hombros_y/o_aletas"),
-("Perforadores: Pedúnculo diferenciado,  limbo (forma geom.) sin hombros y/o aletas","Perforadores_Pedúnculo_diferenciado_limbo_forma_geom._sin_hombros_y/o_aletas"),
-("Perforadores: Preforma de punta pedunculada","Perforadores_Preforma_de_punta_pedunculada"),
-("Perforadores: Fragmento proximal de pedunculo","Perforadores_Fragmento_proximal_de_pedunculo"),
-("Perforadores: Fragmento de pedúnculo","Perforadores_Fragmento_de_pedúnculo"),
-("Perforadores: Fragmento distal y/o ápice de limbo","Perforadores_Fragmento_distal_y/o_ápice_de_limbo"),
-("Perforadores: Fragmento mesial de limbo","Perforadores_Fragmento_mesial_de_limbo"),
-("Artefactos apedunculados o pedunculados de limbo embotado","Artefactos_apedunculados_o_pedunculados_de_limbo_embotado"),
-("Artefactos o fragmentos  de artefactos con formatización sumaria","Artefactos_o_fragmentos_de_artefactos_con_formatización_sumaria"),
-("Fragmentos no diferenciados de piezas formatizadas","Fragmentos_no_diferenciados_de_piezas_formatizadas"),
-("Fragmentos no diferenciados de filos o puntas formatizadas","Fragmentos_no_diferenciados_de_filos_o_puntas_formatizadas"),
-("Filos naturales de lascas u hojas con rastros complementarios","Filos_naturales_de_lascas_u_hojas_con_rastros_complementarios"),
-("Puntas naturales de lascas u hojas con rastros complementarios ","Puntas_naturales_de_lascas_u_hojas_con_rastros_complementarios_"),
-("Percutores de arista formatizada","Percutores_de_arista_formatizada"),
-("Percutores s/nódulos no formatizados,con rastros complementarios","Percutores_s/nódulos_no_formatizados,con_rastros_complementarios"),
-("Yunques: Nódulos con marcas de percusión concentradas en porción central de superficie natural.","Yunques_Nódulos_con_marcas_de_percusión_concentradas_en_porción_central_de_superficie_natural."),
-("Litos rayados ","Litos_rayados_"),
-("Rocas abrasivas con rastros complementarios (Abradidores)","Rocas_abrasivas_con_rastros_complementarios_Abradidores"),
-("Núcleos de lascas: Poliédrico","Núcleos_de_lascas_Poliédrico"),
-("Núcleos de lascas: Discoidal","Núcleos_de_lascas_Discoidal"),
-("Núcleos de lascas: Bifacial","Núcleos_de_lascas_Bifacial"),
-("Núcleos de lascas: Prismático atípico de lascas","Núcleos_de_lascas_Prismático_atípico_de_lascas"),
-("Núcleos de lascas: Otros no diferenciados de lascas","Núcleos_de_lascas_Otros_no_diferenciados_de_lascas"),
-("Núcleos de hojas: Prismático de hojas de extarcciones unidirecionales","Núcleos_de_hojas_Prismático_de_hojas_de_extarcciones_unidirecionales"),
-("Núcleos de hojas: Prismático de hojas a extraccione bidireccionales","Núcleos_de_hojas_Prismático_de_hojas_a_extraccione_bidireccionales"),
-("Núcleos de hojas: Piramidal","Núcleos_de_hojas_Piramidal"),
-("Núcleos de hojas: Otros de hojas no diferenciados","Núcleos_de_hojas_Otros_de_hojas_no_diferenciados"),
-("Núcleos a extracciones combinadas","Núcleos_a_extracciones_combinadas"),
-("Nucleiformes","Nucleiformes"),
-("Núcleos agotados","Núcleos_agotados"),
-("Fragmentos no diferenciados de Núcleos","Fragmentos_no_diferenciados_de_Núcleos"),
-("Desechos de talla enteros","Desechos_de_talla_enteros"),
-("Desechos de talla fragmentados con talón","Desechos_de_talla_fragmentados_con_talón"),
-("Desechos de talla fragmentados sin talón","Desechos_de_talla_fragmentados_sin_talón"),
-("Desechos de talla no diferenciados: lascas adventicias,  fragmentos poliédricos o chunks u otros.","Desechos_de_talla_no_diferenciados_lascas_adventicias_fragmentos_poliédricos_o_chunks_u_otros.")
-])
-
-Roca = enum.Enum("Roca", [
-    ('Roca no identificada', 'roca_no_identificada'),
-    ("Arenisca", "arenisca"),
-    ("Caliza silicificada", "caliza_silicificada"),
-    ("Cuarcita de grano medio o grueso", "cuarcita_grano_medio_grueso"),
-    ("Cuarzo cristalino", "cuarzo_cristalino"),
-    ("Cuarzo lácteo", "cuarzo_lacteo"),
-    ("Granito", "granito"),
-    ("Ignimbrita", "ignimbrita"),
-    ("Metacuarcita(grano fino)", "metacuarcita"),
-    ("Metamórfica no identificada", "metaforica_no_id "),
-    ("Obsidiana gris/negra, homogénea,manchada o bandeada", "obsidiana"),
-    ("Sílices diversos(jaspes, calcedonias coloreadas)", "silices_diversos"),
-    ("Vulcanitas ácidas, claras o coloreadas(riolitas, dacitas u otras) de grano fino", "vulcanitas_ac_claras"),
-    ("Vulcanitas básicas grises o negras de grano fino", "vulcanitas_basicas"),
-    ("Vulcanitas grano mediano a grueso", "vulcanitas_grano_mediano"),
-    ("Xilópalos (vetas visibles)", "xilopalos"),
-    ("Otros vidrios volcánicos claros o coloreados (no grises o negros)", "otros_vidrios")
-    ])
-
-Estado = enum.Enum("Estado", [
-    ("Entera o completa", "entera"),
-    ("Fracturada", "fracturada")
-])
-
-Tipo = enum.Enum("Tipo", [
-    ("Simple", "simple"),
-    ("Compuesta", "compuesta")
-])
-
-Eje = enum.Enum("Eje", [
-    ("Eje técnico o de lascado", "eje_tecnico"),
-    ("Eje morfológico", "eje_morfologico")
-])
-
-Clase_Art = enum.Enum("Clase Artefactual", [
-    ("Artefactos con filos, puntas o superficies con rastros complementarios", "art_rastros"),
-    ("Artefactos con filos, puntas y/o superficies formatizados", "art_sup"),
-    ("Desechos de talla", "Desechos"),
-    ("Nódulos con rastros complementarios", "nodulos_rastros"),
-    ("Nódulos transportados sin rastros complementarios (rocas aloctonas)", "nodulos"),
-    ("Núcleos", "nucleos")
-])
-
-Cant_Filos = enum.Enum("Cantidad de filos", [
-    "0","1","2","3","4","5","6","7","8","9","20"
-])
-
-Cant_Puntas = enum.Enum("Cantidad de puntas formatizadas", [
-    "0","1","2","3","4","5","6","7","8","9","20"
-])
-
-Clasificacion_Forma_Base = enum.Enum("Clasificación de forma base", [
-    ("Forma Base no diferenciada (0Z)", "0z"),
-    ("Hoja de aristas dobles o múltiples (3B)", "3b"),
-    ("Hoja no diferenciada (3Z)", "3z"),
-    ("Hoja reciclada (4C)", "4c"),
-    ("Laja o nódulo tabular no rodado (1G)", "1g"),
-    ("Lasca angular (2D)", "2d"),
-    ("Lasca con dorso natural (2C)", "2c"),
-    ("Lasca de arista simple o doble (2E)", "2e"),
-    ("Lasca de flanco de nucleo (2H)", "2h"),
-    ("Lasca de tableta de núcleo (2I)", "2i"),
-    ("Lasca en cresta (2G)", "2g"),
-    ("Lasca no diferenciada (2Z)", "2z"),
-    ("Lasca plana (2F)", "2f"),
-    ("Lasca primaria (2A)", "2a"),
-    ("Lasca reciclada (4B)", "4b"),
-    ("Lasca secundaria (2B)", "2b"),
-    ("Lasca semi-tableta de núcleo (2J)", "2j"),
-    ("Módulo no diferenciado (1Z)", "1z"),
-    ("Nódulo o rodado a facetas naturales (1E)", "1e"),
-    ("Nódulo tabular (rodado) (1F)", "1f"),
-    ("Artefacto formatizado reciclado (4A)", "4a"),
-    ("Artefacto reciclado, no diferenciado (4Z)", "4z"),
-    ("Bloque no transportable, con/sin facetas (1H)", "1h"),
-    ("Clasto (frag.anguloso natural) (1I)", "1i"),
-    ("Concreción nodular(con restos de matriz) (1J)", "1j"),
-    ("Núcleo reciclado 4D", "4d")
-])
-
-Cant_Cicatrices = enum.Enum("Cantidad de cicatrices de lascado", [
-    "0","1","2","3","4","5","6","7","8","9","20"
-])
-
-Origen_extraccion = enum.Enum("Origen de la extracción", [
-    ("Origen no diferenciado (9)", "9"),
-    ("Adelgazamiento o reducción bifacial (2)", "2"),
-    ("Reactivación de núcleos (4)", "4"),
-    ("Reactivación de útiles o instrumento (3)", "3"),
-    ("Talla de extracción (1)", "1")
-])
-
-Alteraciones = enum.Enum("Alteraciones", [
-    ("Alteraciones no diferenciadas (Z0)", "az0"),
-    ("Alteraciones térmicas múltiples (E4)", "ae4"),
-    ("Alteraciones térmicas no diferenciadas (E0)", "ae0"),
-    ("Alteracion térmica del color (E3)", "ae3"),
-    ("Craqueleado (E2)", "ae2"),
-    ("Desprendimientos cupulares u 'hoyuelos' (E1)", "ae1"),
-    ("Lustre sin gradaciones diferenciadas (A0)", "aa0"),
-    ("Patina grisacea o blanquecina 'en costra' (B2)", "ab2"),
-    ("Patina rojiza o 'barniz del desierto' (B1)", "ab1"),
-    ("Patina sin gradaciones diferenciadas (B0)", "ab0"),
-    ("Rodamiento sin gradaciones (D0)", "ad0"),
-    ("Ventifaccion sin gradaciones (C0)", "ac0")
-])
-
-Estado_Talon = enum.Enum("Estado del talón", [
-    ("Entero", "entero"),
-    ("Fracturado", "fracturado"),
-    ("Rebajado", "rebajado"),
-    ("Eli", "eli")
-])
-
-Superficie_Talon = enum.Enum("Superficie talón o plataforma", [
-    ("Cortical (Ct)", "ct"),
-    ("Liso-Cortical  (LiC)", "lic"),
-    ("Liso (Li)", "li"),
-    ("Facetado (Fc)", "fc"),
-    ("Filiforme (Fi)", "fi"),
-    ("Puntiforme (Pt)", "pt")
-])
-
-Clase_tecnica = enum.Enum("Clase técnica", [
-    ("Artefacto con adelgazamiento bifacial", "acab"),
-    ("Con reducción bifacial", "crb"),
-    ("Bifacial marginales", "cm"),
-    ("Adelgazamiento unifacial", "au"),
-    ("Reducción unifacial", "ru"),
-    ("Unifacial marginales", "um"),
-    ("Talla de extracción sin formatización", "tesf"),
-    ("Lito transportado (alóctono) no tallado", "ltnt")
-])
-
-Reduc_uni_sbordes = enum.Enum("Reducción unifacial sin bordes", ["Si", "No"])
-
-Las_inv_lim = enum.Enum("Lascado inverso limitante", ["Si", "No"])
-
-Forma_geo = enum.Enum("Forma geométrica", [
-    #-----Filos-----
-    ("Filo - Convexo atenuado o muy atenuado (A1)", "FA1"),
-    ("Filo - Convexo medio (A2)", "FA2"),
-    ("Filo - Convexo semicircular (A3)", "FA3"),
-    ("Filo - Cóncavo atenuado o muy atenuado (B1)", "FB1"),
-    ("Filo - Cóncavo medio (B2)", "FB2"),
-    ("Filo - Cóncavo semicircular (B3)", "FB3"),
-    ("Filo - Recto (C)", "FC"),
-    ("Filo - Irregular - Combinados B/c ó A/C (D)", "FD"),
-    #-----Puntas manuales (sección)-----
-    ("Punta manual - Triédrica (E)", "PE"),
-    ("Punta manual - Cuadrangular o trapezoidal (F)", "PF"),
-    ("Punta manual - Plano-convexa (G)", "PG"),
-    ("Punta manual -  Biconvexa (H)", "PH"),
-    ("Punta manual - No diferenciada (Z)", "PZ"),
-    #-----Limbos-----
-    ("Limbo - Triangular corto convexilíneo (I)", "LI"),
-    ("Limbo - Triangular largo convexilíneo (J)", "LJ"),
-    ("Limbo - Triangular corto rectililneo (K)", "LK"),
-    ("Limbo - Traingular largo rectilíneo (L)", "LL"),
-    ("Limbo -Triangular corto concavilíneo (M)", "LM"),
-    ("Limbo - Triangular largo concavilíneo (N)", "LN"),
-    ("Limbo -Lanceolado (n)", "Ln"),
-    ("Limbo -Lanceolado con bordes medios paralelos (O)", "LO"),
-    ("Limbo - En mandorla (bipunta lanceolada) (P)", "LP"),
-    ("Limbo - Lanceolada asimétrica o almendrada. (Q)", "LQ"),
-    #-----Bordes de pedúnculos-----
-    ("Borde - Paralelos o subparalelos (R)", "BR"),
-    ("Borde - Divergentes hacia la base- (R)", "BD"),
-    ("Borde - Convergentes, idem.- (S)", "BC"),
-    ("Borde - Expandidos. (T)", "BT"),
-    #-----Contornos-----
-    ("Contorno - Oval (U)", "CU"),
-    ("Contorno - Elípticos (V)", "CV"),
-    ("Contorno - lanceolado (O)", "CO"),
-    ("Contorno - Almendrado (Q)", "CQ"),
-    ("Contorno - No diferenciada. (Z)", "CZ"),
-    #-----Delineación aristas de piezas bifaciales-----
-    ("Delineacion - Regular normal (X1)", "DX1"),
-    ("Delineacion - Sinuosa regula (X2)", "DX2"),
-    ("Delineacion - Sinuosa irregular (X3)", "DX3"),
-    ("Delineacion - No diferenciada (Z)", "DZ")
-])
-
-Estado_bisel = enum.Enum("Estado de bisel", [
-    ("No diferenciado (Z0)", "ezo"),
-    ("Activo no astillado (A1)", "ea1"),
-    ("Activo Astiladol (A2)", "ea2"),
-    ("Embotado(+80°) (B1)", "eb1"),
-    ("Embotado astillado (B2)", "eb2"),
-    ("Con astillad.escalonadas (B3)", "eb3"),
-    ("Recto (C)", "ec")
-])
-
-Mantenimiento = enum.Enum("Mantenimiento", ["Si", "No"])
-
-Parte_pasiva = enum.Enum("Parte pasiva", [
-    ("No diferenciado", "ppnd"),
-    ("Dorso formatizado", "ppdf"),
-    ("Dorso abatido (por lascado único)", "ppda"),
-    ("Formatización sumaria de acomodación", "ppfsa"),
-    ("Corteza reservada", "ppcr"),
-    ("Plano de fractura utilizado", "ppcf"),
-    ("Filo en ficha", "ppff"),
-])
-
-Forma_lascados = enum.Enum("Forma de lascados", [
-    ("No diferenciado", "flnd"),
-    ("Lasca simple", "flls"),
-    ('Simple laminar "en golpe de buril"', "flgb"),
-    ("Paralelo corto", "flpc"),
-    ("Paralelo laminar", "flpl"),
-    ("Escamoso", "fle"),
-    ("Escamoso escalonado", "flee")
-])
-
-Sustancia = enum.Enum("Sustancia adherida", ["Si", "No"])
+        return 'Otro (' + str(round(a_e, 2)) + ')'
+
+def codigo_tamano(largo, ancho):
+    """Position in TAMANOS of the larger of `largo` and `ancho`, the
+    stored form of clasificacion_tamano. None when data is missing."""
+    if largo is None or ancho is None:
+        return None
+    codigo = bisect.bisect_right(BORDES_TAMANO, max(largo, ancho)) - 1
+    return codigo if codigo >= 0 else None
+
+def cociente(dividendo, divisor):
+    if dividendo is None or not divisor:
+        return None
+    return dividendo / divisor
+
+# Bulk classification over whole columns of measurements
+SIN_CODIGO = -1
+
+def _columna(valores):
+    return np.asarray(valores, dtype=float)
+
+def _cociente_columnas(dividendo, divisor):
+    validos = ~np.isnan(dividendo) & ~np.isnan(divisor) & (divisor != 0)
+    return np.divide(dividendo, divisor, out=np.full(dividendo.shape, np.nan),
+                     where=validos)
+
+def _codigos(valores, bordes):
+    codigos = np.searchsorted(bordes, valores, side='right') - 1
+    codigos[np.isnan(valores)] = SIN_CODIGO
+    return codigos
+
+def _metricas_columnas(largos, anchos, espesores):
+    largos, anchos, espesores = (_columna(largos), _columna(anchos),
+                                 _columna(espesores))
+    tamano = _codigos(np.fmax(largos, anchos), BORDES_TAMANO)
+    tamano[np.isnan(largos) | np.isnan(anchos)] = SIN_CODIGO
+    return (tamano, _cociente_columnas(largos, anchos),
+            _cociente_columnas(anchos, espesores))
+
+def clasificar_piezas(largos, anchos, espesores):
+    """Classify many pieces at once.
+
+    Takes sequences of long_pieza, ancho_pieza and espesor_pieza (None
+    for missing values) and returns integer arrays with the position of
+    each piece in TAMANOS, MODULOS_LARGO_ANCHO and MODULOS_ANCHO_ESPESOR.
+    Pieces with missing data or negative sizes get SIN_CODIGO.
+    """
+    tamano, l_a, a_e = _metricas_columnas(largos, anchos, espesores)
+
+    largo_ancho = _codigos(l_a, BORDES_LARGO_ANCHO)
+
+    with np.errstate(invalid='ignore'):
+        ancho_espesor = (a_e >= 1.5).astype(int) + (a_e > 3)
+    ancho_espesor[np.isnan(a_e)] = SIN_CODIGO
+
+    return dict(tamano=tamano,
+                modulo_largo_ancho=largo_ancho,
+                modulo_ancho_espesor=ancho_espesor)
+
+def metricas_piezas(largos, anchos, espesores):
+    """Stored metrics of many pieces at once, as lists of Python values
+    with None where data is missing (see actualizar_metricas)."""
+    tamano, l_a, a_e = _metricas_columnas(largos, anchos, espesores)
+    return dict(
+        clase_tamano=[None if c == SIN_CODIGO else c for c in tamano.tolist()],
+        razon_largo_ancho=[None if r != r else r for r in l_a.tolist()],
+        razon_ancho_espesor=[None if r != r else r for r in a_e.tolist()])
+
+def etiquetas(codigos, clasificacion):
+    """Map codes returned by clasificar_piezas to their labels, using
+    'Datos faltantes' for SIN_CODIGO."""
+    nombres = [j if isinstance(j, str) else j[1] for j in clasificacion]
+    return np.array(nombres + [DATOS_FALTANTES], dtype=object)[codigos]
+
+# SQL counterparts of the functions above, used by the hybrid properties
+# and to backfill the stored metrics
+def _sql_umbrales(dato, umbrales):
+    return case([(dato >= i, j) for i, j in reversed(umbrales)])
+
+def sql_mayor(a, b):
+    return case([(a >= b, a), (b > a, b)])
+
+def sql_cociente(dividendo, divisor):
+    return cast(dividendo, Float) / func.nullif(divisor, 0)
+
+def sql_codigo_tamano(largo, ancho):
+    mayor = sql_mayor(largo, ancho)
+    return case([(mayor >= i, codigo) for codigo, (i, j)
+                 in reversed(list(enumerate(TAMANOS)))])
+
+def sql_clasificacion_tamano(dato):
+    return _sql_umbrales(dato, TAMANOS)
+
+def sql_modulo_largo_ancho(pendiente):
+    return _sql_umbrales(pendiente, MODULOS_LARGO_ANCHO)
+
+def sql_modulo_ancho_espesor(a_e):
+    return case([(a_e < 1.5, 'Muy grueso / muy espeso'),
+                 (a_e <= 3, 'Grueso / espeso')],
+                else_='Otro (' + cast(func.round(a_e, 2), String) + ')')
+
+def sql_o_faltantes(expresion, *faltantes):
+    """Return `expresion`, or 'Datos faltantes' when any of the
+    `faltantes` conditions holds."""
+    return type_coerce(case([(or_(*faltantes), DATOS_FALTANTES)],
+                            else_=expresion), String)
 
 # Create db models and views
 
@@ -562,13 +322,13 @@ class Observacion(db.Model):
     coleccion = db.Column('Colección o ano', db.String(64))
     operador = db.Column('Operador', db.String(64))
 
-    user_id = db.Column(db.Integer(), db.ForeignKey(User.id))
+    user_id = db.Column(db.Integer(), db.ForeignKey(User.id), index=True)
     user = db.relationship(User, backref='observaciones')
 
     fecha = db.Column('Fecha', db.DateTime)
     hoja = db.Column('Hoja N°', db.Integer)
 
-
+    __table_args__ = (db.Index('ix_observacion_sitio_capa', sitio, capa),)
 
     def __str__(self):
         return self.nombre
@@ -580,75 +340,94 @@ class Artefacto(db.Model):
                         nullable=False)
     numero = db.Column('Número o sigla de la pieza', db.Integer)
     cuadro = db.Column('Cuadro o microsector', db.String(64))
-    roca = db.Column('Roca o materia prima', db.Enum(Roca))
-    estado = db.Column(db.Enum(Estado))
-    tipo = db.Column(db.Enum(Tipo))
-    eje = db.Column(db.Enum(Eje))
-    clase_art = db.Column(db.Enum(Clase_Art))
-    cant_filos = db.Column(db.Enum(Cant_Filos))
-    cant_puntas = db.Column(db.Enum(Cant_Puntas))
-    clasificacion_Forma_Base = db.Column(db.Enum(Clasificacion_Forma_Base))
-    cant_Cicatrices = db.Column(db.Enum(Cant_Cicatrices))
-    origen = db.Column(db.Enum(Origen_extraccion))
-    alteraciones = db.Column(db.Enum(Alteraciones))
-    estado_talon = db.Column(db.Enum(Estado_Talon))
-    sup_talon = db.Column(db.Enum(Superficie_Talon))
+    roca = db.Column('Roca o materia prima', db.EnumEntero(Roca))
+    estado = db.Column(db.EnumEntero(Estado))
+    tipo = db.Column(db.EnumEntero(Tipo))
+    eje = db.Column(db.EnumEntero(Eje))
+    clase_art = db.Column(db.EnumEntero(Clase_Art), index=True)
+    cant_filos = db.Column(db.EnumEntero(Cant_Filos))
+    cant_puntas = db.Column(db.EnumEntero(Cant_Puntas))
+    clasificacion_Forma_Base = db.Column(db.EnumEntero(Clasificacion_Forma_Base), index=True)
+    cant_Cicatrices = db.Column(db.EnumEntero(Cant_Cicatrices))
+    origen = db.Column(db.EnumEntero(Origen_extraccion))
+    alteraciones = db.Column(db.EnumEntero(Alteraciones))
+    estado_talon = db.Column(db.EnumEntero(Estado_Talon))
+    sup_talon = db.Column(db.EnumEntero(Superficie_Talon))
     ancho_talon = db.Column(db.Integer)
     ancho_pieza = db.Column(db.Integer, nullable=False)
     long_pieza = db.Column(db.Integer, nullable=False)
     espesor_pieza = db.Column(db.Integer, nullable=False)
     peso_pieza = db.Column(db.Integer)
-    clase_tecnica = db.Column(db.Enum(Clase_tecnica))
-    reduc_uni_sbordes = db.Column(db.Enum(Reduc_uni_sbordes))
-    las_inv_lim = db.Column(db.Enum(Las_inv_lim))
+    clase_tecnica = db.Column(db.EnumEntero(Clase_tecnica), index=True)
+    reduc_uni_sbordes = db.Column(db.EnumEntero(Reduc_uni_sbordes))
+    las_inv_lim = db.Column(db.EnumEntero(Las_inv_lim))
 
     procedimientos = db.relationship('Procedimiento', backref='artefacto')
 
-    forma_geo = db.Column(db.Enum(Forma_geo))
+    forma_geo = db.Column(db.EnumEntero(Forma_geo), index=True)
     angulo_bisel = db.Column(db.Integer)
-    estado_bisel = db.Column(db.Enum(Estado_bisel))
-    mantenimiento = db.Column(db.Enum(Mantenimiento))
+    estado_bisel = db.Column(db.EnumEntero(Estado_bisel))
+    mantenimiento = db.Column(db.EnumEntero(Mantenimiento))
 
     #detalles = db.relationship('Detalle', backref='artefacto')
 
-    parte_pasiva =  db.Column(db.Enum(Parte_pasiva))
-    forma_lascados = db.Column(db.Enum(Forma_lascados))
-    sustancia = db.Column(db.Enum(Sustancia))
+    parte_pasiva =  db.Column(db.EnumEntero(Parte_pasiva))
+    forma_lascados = db.Column(db.EnumEntero(Forma_lascados))
+    sustancia = db.Column(db.EnumEntero(Sustancia))
     ubicacion_sustancia = db.Column('Ubicacion de la sustancia', db.String(64))
     obs = db.Column('Observaciones', db.String(200))
 
     observacion_id = db.Column(db.Integer(), db.ForeignKey(Observacion.id))
     observacion = db.relationship(Observacion, backref='artefactos')
 
+    # Stored metrics, kept up to date by actualizar_metricas
+    clase_tamano = db.Column(db.SmallInteger, index=True)
+    razon_largo_ancho = db.Column(db.Float, index=True)
+    razon_ancho_espesor = db.Column(db.Float, index=True)
+
+    __table_args__ = (
+        db.Index('ix_artefacto_roca', roca),
+        # Drill-down observación > cuadro, also serves the foreign key
+        db.Index('ix_artefacto_observacion_cuadro', observacion_id, cuadro),
+    )
+
     @hybrid_property
     def tamano(self):
-        try:
-            mayor = db.session.query(
-                db.func.max(self.long_pieza, self.ancho_pieza)
-            ).first()[0]
-            return clasificacion_tamano(mayor)
-        except:
-            return 'Datos faltantes'
+        if self.long_pieza is None or self.ancho_pieza is None:
+            return DATOS_FALTANTES
+        return clasificacion_tamano(max(self.long_pieza, self.ancho_pieza))
+
+    @tamano.expression
+    def tamano(cls):
+        return sql_o_faltantes(
+            sql_clasificacion_tamano(sql_mayor(cls.long_pieza, cls.ancho_pieza)),
+            cls.long_pieza.is_(None), cls.ancho_pieza.is_(None))
 
     @hybrid_property
     def mod_ancho_largo_pieza(self):
-        try:
-            pendiente = db.session.query(
-                cast(self.long_pieza / self.ancho_pieza, Float)
-            ).scalar()
-            return modulo_largo_ancho(pendiente)
-        except:
-            return 'Datos faltantes'
+        if self.long_pieza is None or not self.ancho_pieza:
+            return DATOS_FALTANTES
+        return modulo_largo_ancho(self.long_pieza / self.ancho_pieza)
+
+    @mod_ancho_largo_pieza.expression
+    def mod_ancho_largo_pieza(cls):
+        return sql_o_faltantes(
+            sql_modulo_largo_ancho(sql_cociente(cls.long_pieza, cls.ancho_pieza)),
+            cls.long_pieza.is_(None), cls.ancho_pieza.is_(None),
+            cls.ancho_pieza == 0)
 
     @hybrid_property
     def mod_ancho_espesor_pieza(self):
-        try:
-            a_e = db.session.query(
-                cast(self.ancho_pieza / self.espesor_pieza, Float)
-            ).scalar()
-            return modulo_ancho_espesor(a_e)
-        except:
-            return 'Datos faltantes'
+        if self.ancho_pieza is None or not self.espesor_pieza:
+            return DATOS_FALTANTES
+        return modulo_ancho_espesor(self.ancho_pieza / self.espesor_pieza)
+
+    @mod_ancho_espesor_pieza.expression
+    def mod_ancho_espesor_pieza(cls):
+        return sql_o_faltantes(
+            sql_modulo_ancho_espesor(sql_cociente(cls.ancho_pieza, cls.espesor_pieza)),
+            cls.ancho_pieza.is_(None), cls.espesor_pieza.is_(None),
+            cls.espesor_pieza == 0)
 
     def __str__(self):
         return self.nombre
@@ -656,7 +435,7 @@ class Artefacto(db.Model):
 class Procedimiento(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(50))
-    artefacto_id = db.Column(db.Integer, db.ForeignKey('artefacto.id'))
+    artefacto_id = db.Column(db.Integer, db.ForeignKey('artefacto.id'), index=True)
 
     def __str__(self):
         return self.nombre
@@ -665,7 +444,9 @@ class FotosArtefactos(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.Unicode(64))
     path = db.Column(db.Unicode(128))
-    artefacto_id = db.Column(db.Integer(), db.ForeignKey(Artefacto.id))
+    # None for photos thumbnailed on upload, else the queue state
+    estado_derivados = db.Column(db.String(16))
+    artefacto_id = db.Column(db.Integer(), db.ForeignKey(Artefacto.id), index=True)
     artefacto = db.relationship(Artefacto, backref='fotos')
 
     def __unicode__(self):
@@ -680,33 +461,41 @@ class Detalle(db.Model):
     ancho_pieza = db.Column(db.Integer, nullable=False)
     long_pieza = db.Column(db.Integer)
     espesor_pieza = db.Column(db.Integer, nullable=False)
-    clase_tecnica = db.Column(db.Enum(Clase_tecnica))
-    reduc_uni_sbordes = db.Column(db.Enum(Reduc_uni_sbordes))
-    las_inv_lim = db.Column(db.Enum(Las_inv_lim))
+    clase_tecnica = db.Column(db.EnumEntero(Clase_tecnica), index=True)
+    reduc_uni_sbordes = db.Column(db.EnumEntero(Reduc_uni_sbordes))
+    las_inv_lim = db.Column(db.EnumEntero(Las_inv_lim))
 
     procedimientos = db.relationship('Procedimiento2', backref='detalle')
 
-    forma_geo = db.Column(db.Enum(Forma_geo))
+    forma_geo = db.Column(db.EnumEntero(Forma_geo), index=True)
     angulo_bisel = db.Column(db.Integer)
-    estado_bisel = db.Column(db.Enum(Estado_bisel))
-    mantenimiento = db.Column(db.Enum(Mantenimiento))
-    subgrupos = db.Column(db.Enum(Subgrupos))
-    parte_pasiva =  db.Column(db.Enum(Parte_pasiva))
+    estado_bisel = db.Column(db.EnumEntero(Estado_bisel))
+    mantenimiento = db.Column(db.EnumEntero(Mantenimiento))
+    subgrupos = db.Column(db.EnumEntero(Subgrupos), index=True)
+    parte_pasiva =  db.Column(db.EnumEntero(Parte_pasiva))
     ubicacion_pasiva = db.Column('Ubicacion parte pasiva', db.String(64))
 
-    artefacto_id = db.Column(db.Integer(), db.ForeignKey(Artefacto.id))
+    artefacto_id = db.Column(db.Integer(), db.ForeignKey(Artefacto.id), index=True)
     artefacto = db.relationship(Artefacto, backref='detalles')
 
+    # Stored metrics, kept up to date by actualizar_metricas
+    clase_tamano = db.Column(db.SmallInteger, index=True)
+    razon_largo_ancho = db.Column(db.Float, index=True)
+    razon_ancho_espesor = db.Column(db.Float, index=True)
+
 
     @hybrid_property
     def mod_ancho_espesor_pieza(self):
-        try:
-            a_e = db.session.query(
-                cast(self.ancho_pieza / self.espesor_pieza, Float)
-            ).scalar()
-            return modulo_ancho_espesor(a_e)
-        except:
-            return 'Datos faltantes'
+        if self.ancho_pieza is None or not self.espesor_pieza:
+            return DATOS_FALTANTES
+        return modulo_ancho_espesor(self.ancho_pieza / self.espesor_pieza)
+
+    @mod_ancho_espesor_pieza.expression
+    def mod_ancho_espesor_pieza(cls):
+        return sql_o_faltantes(
+            sql_modulo_ancho_espesor(sql_cociente(cls.ancho_pieza, cls.espesor_pieza)),
+            cls.ancho_pieza.is_(None), cls.espesor_pieza.is_(None),
+            cls.espesor_pieza == 0)
 
     def __str__(self):
         return self.nombre
@@ -714,7 +503,7 @@ class Detalle(db.Model):
 class Procedimiento2(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     nombre = db.Column(db.String(50))
-    detalle_id = db.Column(db.Integer, db.ForeignKey('Detalle.id'))
+    detalle_id = db.Column(db.Integer, db.ForeignKey('Detalle.id'), index=True)
 
     def __str__(self):
         return self.nombre
@@ -729,20 +518,31 @@ class Desecho(db.Model):
     cuadro = db.Column('Cuadro o microsector', db.String(64))
     coleccion = db.Column('Colección o ano', db.String(64))
     nro_sintalon = db.Column('Piezas fracturadas sin talon',
-                            db.Enum(Cant_Filos))
+                            db.EnumEntero(Cant_Filos))
     nro_contalon = db.Column('Piezas fracturadas con talon',
-                            db.Enum(Cant_Filos))
+                            db.EnumEntero(Cant_Filos))
     lote = db.Column('Lote', db.Integer)
-    estado = db.Column(db.Enum(Estado))
+    estado = db.Column(db.EnumEntero(Estado), index=True)
     ancho_talon = db.Column(db.Integer)
     ancho_pieza = db.Column(db.Integer)
     long_pieza = db.Column(db.Integer)
     espesor_pieza = db.Column(db.Integer)
-    sup_talon = db.Column(db.Enum(Superficie_Talon))
+    sup_talon = db.Column(db.EnumEntero(Superficie_Talon))
 
     observacion_id = db.Column(db.Integer(), db.ForeignKey(Observacion.id))
     observacion = db.relationship(Observacion, backref='desechos')
 
+    # Stored metrics, kept up to date by actualizar_metricas
+    clase_tamano = db.Column(db.SmallInteger, index=True)
+    razon_largo_ancho = db.Column(db.Float, index=True)
+    razon_ancho_espesor = db.Column(db.Float, index=True)
+
+    __table_args__ = (
+        db.Index('ix_desecho_observacion_capa_cuadro',
+                 observacion_id, capa, cuadro),
+        db.Index('ix_desecho_sitio_capa_cuadro', sitio, capa, cuadro),
+    )
+
     def __str__(self):
         return self.nombre
 
@@ -750,14 +550,1152 @@ class FotosDesechos(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.Unicode(64))
     path = db.Column(db.Unicode(128))
+    # None for photos thumbnailed on upload, else the queue state
+    estado_derivados = db.Column(db.String(16))
 
-    desecho_id = db.Column(db.Integer(), db.ForeignKey(Desecho.id))
+    desecho_id = db.Column(db.Integer(), db.ForeignKey(Desecho.id), index=True)
     desecho = db.relationship(Desecho, backref='fotos')
 
     def __unicode__(self):
         return self.name
 
-class ObservacionAdmin(sqla.ModelView):
+class TrabajoImagen(db.Model):
+    """Photo waiting for its derivatives, taken by the background workers."""
+    __tablename__ = 'trabajo_imagen'
+    id = db.Column(db.Integer, primary_key=True)
+    tipo = db.Column(db.String(16), nullable=False)
+    foto_id = db.Column(db.Integer, nullable=False)
+    path = db.Column(db.Unicode(128), nullable=False)
+    estado = db.Column(db.String(16), nullable=False, default='pendiente')
+    intentos = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Unicode(256))
+    creado = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    actualizado = db.Column(db.DateTime)
+
+    __table_args__ = (db.Index('ix_trabajo_imagen_estado', estado, id),)
+
+class Resumen(db.Model):
+    """Counts and measurement sums per observación and category, kept
+    up to date by actualizar_resumen."""
+    __tablename__ = 'resumen'
+    id = db.Column(db.Integer, primary_key=True)
+    observacion_id = db.Column(db.Integer(), db.ForeignKey(Observacion.id),
+                               index=True)
+    conjunto = db.Column(db.String(16), nullable=False)
+    variable = db.Column(db.String(32), nullable=False)
+    categoria = db.Column(db.String(256))
+    cantidad = db.Column(db.Integer, nullable=False)
+    suma_largo = db.Column(db.Integer)
+    suma_ancho = db.Column(db.Integer)
+    suma_espesor = db.Column(db.Integer)
+
+    __table_args__ = (db.Index('ix_resumen_conjunto_variable_observacion',
+                               'conjunto', 'variable', 'observacion_id'),)
+
+class CambioMasivo(db.Model):
+    """Audit record of a bulk edit or delete, see editar_en_bloque."""
+    __tablename__ = 'cambio_masivo'
+    id = db.Column(db.Integer, primary_key=True)
+    fecha = db.Column(db.DateTime, nullable=False, default=datetime.datetime.utcnow)
+    user_id = db.Column(db.Integer(), db.ForeignKey(User.id))
+    user = db.relationship(User)
+    accion = db.Column(db.String(16), nullable=False)
+    modelo = db.Column(db.String(32), nullable=False)
+    campo = db.Column(db.String(64))
+    valor = db.Column(db.Unicode(512))
+    alcance = db.Column(db.UnicodeText)
+    filas = db.Column(db.Integer, nullable=False)
+    # JSON: the previous values of the edited rows, or the deleted ids
+    # and the number of rows deleted per model
+    detalle = db.Column(db.UnicodeText)
+
+    __table_args__ = (db.Index('ix_cambio_masivo_modelo_fecha', modelo, fecha),)
+
+# Lookup tables of the codes stored by the vocabulary columns
+TABLAS_VOCABULARIO = dict(
+    (v.clase, codigos.tabla_codigos(db.metadata, 'vocabulario_' + nombre.lower(), v.clase))
+    for nombre, v in vocabularios.VOCABULARIOS.items())
+
+# Version of each model, read by the page cache
+VERSIONES_CACHE = cache.tabla_versiones(db.metadata)
+
+MODELOS_CON_METRICAS = (Artefacto, Detalle, Desecho)
+
+def actualizar_metricas(mapper, connection, target):
+    target.clase_tamano = codigo_tamano(target.long_pieza, target.ancho_pieza)
+    target.razon_largo_ancho = cociente(target.long_pieza, target.ancho_pieza)
+    target.razon_ancho_espesor = cociente(target.ancho_pieza,
+                                          target.espesor_pieza)
+
+for modelo in MODELOS_CON_METRICAS:
+    db.event.listen(modelo, 'before_insert', actualizar_metricas)
+    db.event.listen(modelo, 'before_update', actualizar_metricas)
+
+# The models written by each flush get a new version, in the same
+# transaction, which invalidates the cached pages that read them
+def _anotar_cambio(mapper, connection, target):
+    sesion = object_session(target)
+    if sesion is not None:
+        sesion.info.setdefault('cache_modelos', set()).add(mapper.class_.__name__)
+
+for evento in ('after_insert', 'after_update', 'after_delete'):
+    db.event.listen(db.Model, evento, _anotar_cambio, propagate=True)
+
+@db.event.listens_for(db.session, 'after_flush')
+def _invalidar_cache(session, flush_context):
+    modelos = session.info.pop('cache_modelos', None)
+    if modelos:
+        cache.invalidar(session.connection(), modelos)
+
+@db.event.listens_for(db.session, 'after_bulk_update')
+@db.event.listens_for(db.session, 'after_bulk_delete')
+def _invalidar_cache_masivo(contexto):
+    cache.invalidar(contexto.session.connection(), [contexto.mapper.class_.__name__])
+
+@db.event.listens_for(db.session, 'after_rollback')
+def _olvidar_cambios(session):
+    session.info.pop('cache_modelos', None)
+
+# Photo derivatives, built by a pool of background threads
+FOTOS = dict(artefacto=FotosArtefactos, desecho=FotosDesechos)
+
+MAX_INTENTOS = 3
+
+def _foto_cambiada(mapper, connection, target):
+    if inspect(target).attrs.path.history.has_changes():
+        if not target.path:
+            target.estado_derivados = None
+        elif derivados.completos(carpeta_fotos(), target.path):
+            # A duplicate of a stored photo reuses its derivatives
+            target.estado_derivados = 'listo'
+        else:
+            target.estado_derivados = 'pendiente'
+
+def _encolar_derivados(mapper, connection, target):
+    if target.estado_derivados == 'pendiente' and \
+            inspect(target).attrs.path.history.has_changes():
+        tipo = next(t for t, modelo in FOTOS.items() if isinstance(target, modelo))
+        connection.execute(TrabajoImagen.__table__.insert().values(
+            tipo=tipo, foto_id=target.id, path=target.path, estado='pendiente',
+            intentos=0, creado=datetime.datetime.utcnow()))
+        inspect(target).session.info['derivados_pendientes'] = True
+
+for modelo in FOTOS.values():
+    db.event.listen(modelo, 'before_insert', _foto_cambiada)
+    db.event.listen(modelo, 'before_update', _foto_cambiada)
+    db.event.listen(modelo, 'after_insert', _encolar_derivados)
+    db.event.listen(modelo, 'after_update', _encolar_derivados)
+
+@db.event.listens_for(db.session, 'after_commit')
+def _despertar_trabajadores(session):
+    if session.info.pop('derivados_pendientes', False) and \
+            current_app.config['IMAGENES_HILOS']:
+        current_app.extensions['trabajadores_imagen'].despertar()
+
+def _reclamar_trabajo(conexion):
+    trabajos = TrabajoImagen.__table__
+    while True:
+        fila = conexion.execute(select([trabajos.c.id])
+                                .where(trabajos.c.estado == 'pendiente')
+                                .order_by(trabajos.c.id).limit(1)).first()
+        if fila is None:
+            return None
+        # Another worker, maybe in another process, may have taken it
+        if conexion.execute(trabajos.update()
+                            .where(trabajos.c.id == fila.id)
+                            .where(trabajos.c.estado == 'pendiente')
+                            .values(estado='en_proceso',
+                                    intentos=trabajos.c.intentos + 1,
+                                    actualizado=datetime.datetime.utcnow())).rowcount:
+            return conexion.execute(select([trabajos])
+                                    .where(trabajos.c.id == fila.id)).first()
+
+def procesar_trabajo_imagen():
+    """Build the derivatives of the oldest pending photo.
+
+    Returns False when the queue is empty. Failed jobs are retried up to
+    MAX_INTENTOS times, a missing original is not retried.
+    """
+    with db.engine.begin() as conexion:
+        trabajo = _reclamar_trabajo(conexion)
+    if trabajo is None:
+        return False
+
+    estado, error = 'listo', None
+    try:
+        derivados.generar(carpeta_fotos(), trabajo.path)
+    except FileNotFoundError as e:
+        estado, error = 'error', str(e)
+    except Exception as e:
+        current_app.logger.exception('No se pudieron generar los derivados de %s', trabajo.path)
+        estado = 'pendiente' if trabajo.intentos < MAX_INTENTOS else 'error'
+        error = str(e)
+
+    trabajos = TrabajoImagen.__table__
+    fotos = FOTOS[trabajo.tipo].__table__
+    with db.engine.begin() as conexion:
+        conexion.execute(trabajos.update().where(trabajos.c.id == trabajo.id)
+                         .values(estado=estado, error=error and error[:256],
+                                 actualizado=datetime.datetime.utcnow()))
+        if estado != 'pendiente':
+            # Only if the photo was not replaced meanwhile
+            conexion.execute(fotos.update()
+                             .where(fotos.c.id == trabajo.foto_id)
+                             .where(fotos.c.path == trabajo.path)
+                             .values(estado_derivados=estado))
+    return True
+
+def reanudar_trabajos_imagen(minutos=10):
+    """Requeue the jobs left in process by a worker that died."""
+    trabajos = TrabajoImagen.__table__
+    limite = datetime.datetime.utcnow() - datetime.timedelta(minutes=minutos)
+    with db.engine.begin() as conexion:
+        conexion.execute(trabajos.update()
+                         .where(trabajos.c.estado == 'en_proceso')
+                         .where(trabajos.c.actualizado < limite)
+                         .values(estado='pendiente'))
+
+def _trabajadores_imagen(app):
+    def procesar():
+        with app.app_context():
+            return procesar_trabajo_imagen()
+    return derivados.Trabajadores(procesar, hilos=app.config['IMAGENES_HILOS'])
+
+def _iniciar_trabajadores():
+    if current_app.config['IMAGENES_HILOS']:
+        reanudar_trabajos_imagen()
+        current_app.extensions['trabajadores_imagen'].despertar()
+
+def referencias_foto(path):
+    """Number of photo rows, of any kind, pointing to `path`."""
+    return sum(modelo.query.filter(modelo.path == path).count()
+               for modelo in FOTOS.values())
+
+class ImagenDiferidaField(formadmin.ImageUploadField):
+    """Image upload into the content-addressed store.
+
+    Only the original is written, once per distinct content; the
+    derivatives are queued on commit and built in the background. A
+    replaced file is deleted when no other photo row uses it.
+    """
+    duplicada = False
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('endpoint', 'foto')
+        super(ImagenDiferidaField, self).__init__(*args, **kwargs)
+
+    def populate_obj(self, obj, name):
+        anterior = getattr(obj, name, None)
+        if anterior and self._should_delete:
+            self._borrar_sin_uso(anterior)
+            setattr(obj, name, None)
+            return
+
+        if self._is_uploaded_file(self.data):
+            path = self._save_file(self.data, self.generate_name(obj, self.data))
+            self.data.filename = path
+            setattr(obj, name, path)
+            if anterior and anterior != path:
+                self._borrar_sin_uso(anterior)
+
+    def _borrar_sin_uso(self, path):
+        # Without the flush the edited row still counts as a reference
+        with db.session.no_autoflush:
+            if referencias_foto(path) <= 1:
+                self._delete_file(path)
+
+    def _save_file(self, data, filename):
+        # pre_validate already read the header to check it is an image
+        data.stream.seek(0)
+        path, nueva = almacen.guardar(self._get_path(''), data.stream, filename)
+        self.duplicada = not nueva
+        return path
+
+    def _delete_thumbnail(self, filename):
+        super(ImagenDiferidaField, self)._delete_thumbnail(filename)
+        derivados.borrar(self._get_path(''), filename)
+
+class FotosMixin(object):
+    """Tell the user when an uploaded photo was already stored."""
+
+    def after_model_change(self, form, model, is_created):
+        if getattr(form.path, 'duplicada', False):
+            flash('Esta imagen ya estaba cargada (%d fotos la usan); se '
+                  'reutiliza el archivo existente.' % referencias_foto(model.path),
+                  'info')
+
+def _miniatura(view, context, model, name):
+    if not model.path:
+        return ''
+    if model.estado_derivados == 'pendiente':
+        return Markup('<span class="label">Procesando…</span>')
+    if model.estado_derivados == 'error':
+        return Markup('<span class="label label-important">Error en la imagen</span>')
+    if model.estado_derivados is None:
+        return Markup('<img src="%s">' % url_foto(formadmin.thumbgen_filename(model.path)))
+    return Markup('<a href="%s"><img src="%s" width="100" height="100"></a>' % (
+        url_foto(derivados.nombre(model.path, 'mediana')),
+        url_foto(derivados.nombre(model.path, 'miniatura'))))
+
+# Photo serving
+CACHE_INMUTABLE = 'public, max-age=31536000, immutable'
+
+def url_foto(path):
+    """URL of a photo or derivative that changes with its content, so
+    browsers can keep it without asking again.
+
+    Stored files have the hash in their name; files saved before the
+    store get their modification time and size appended.
+    """
+    if almacen.digesto(path) is None:
+        try:
+            estado = os.stat(op.join(carpeta_fotos(), path))
+        except OSError:
+            return url_for('foto', filename=path)
+        return url_for('foto', filename=path,
+                       v='%x-%x' % (int(estado.st_mtime), estado.st_size))
+    return url_for('foto', filename=path)
+
+def exponer_metricas():
+    """Request and SQL counters in the Prometheus text format."""
+    token = current_app.config.get('METRICAS_TOKEN')
+    if token and request.headers.get('Authorization') != 'Bearer ' + token:
+        abort(401)
+    texto = current_app.extensions['instrumentacion'].texto()
+    if 'cache' in current_app.extensions:
+        texto += current_app.extensions['cache'].texto()
+    return Response(texto, mimetype='text/plain; version=0.0.4')
+
+def api_vocabularios():
+    """Every vocabulary with its codes and labels, as JSON."""
+    respuesta = Response(vocabularios.JSON, mimetype='application/json')
+    respuesta.set_etag(vocabularios.ETAG)
+    # They only change with a new version of the application
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = 3600
+    return respuesta.make_conditional(request)
+
+# Read-only JSON API, see api
+_FOTOS_ARTEFACTOS_API = api.Recurso(FotosArtefactos)
+_FOTOS_DESECHOS_API = api.Recurso(FotosDesechos)
+_DETALLES_API = api.Recurso(Detalle, dict(procedimientos=api.Recurso(Procedimiento2)))
+_ARTEFACTOS_API = api.Recurso(Artefacto, dict(
+    detalles=_DETALLES_API, fotos=_FOTOS_ARTEFACTOS_API,
+    procedimientos=api.Recurso(Procedimiento)))
+_DESECHOS_API = api.Recurso(Desecho, dict(fotos=_FOTOS_DESECHOS_API))
+
+RECURSOS_API = dict(
+    observaciones=api.Recurso(Observacion, dict(artefactos=_ARTEFACTOS_API,
+                                                desechos=_DESECHOS_API)),
+    artefactos=_ARTEFACTOS_API, detalles=_DETALLES_API, desechos=_DESECHOS_API,
+    fotos_artefactos=_FOTOS_ARTEFACTOS_API, fotos_desechos=_FOTOS_DESECHOS_API)
+
+# Query arguments of the API other than column filters
+_ARGUMENTOS_API = ('campos', 'incluir', 'ids', 'tras', 'limite', 'formato')
+
+def _recurso_api(nombre):
+    """Resource `nombre`, for a logged in user or a client sending
+    "Authorization: Bearer <API_TOKEN>"."""
+    token = current_app.config.get('API_TOKEN')
+    if not (token and request.headers.get('Authorization') == 'Bearer ' + token) and \
+            not login.current_user.is_authenticated:
+        abort(401)
+    if nombre not in RECURSOS_API:
+        abort(404)
+    return RECURSOS_API[nombre]
+
+def _parametros_api(recurso):
+    """Fields, embedded collections and conditions of the request."""
+    incluir = {}
+    for nombre in filter(None, request.args.get('incluir', '').split(',')):
+        if nombre not in recurso.hijos:
+            raise api.ErrorAPI('%s no incluye %r; incluye %s' % (
+                recurso.modelo.__name__, nombre, ', '.join(recurso.hijos)))
+        incluir[nombre] = recurso.hijos[nombre][0].campos(
+            request.args.get('campos[%s]' % nombre))
+    condiciones = []
+    for nombre, valor in request.args.items(multi=True):
+        if nombre == 'ids':
+            ids = api.enteros(valor, nombre)
+            if len(ids) > api.MAXIMO:
+                raise api.ErrorAPI('ids: a lo sumo %d por pedido' % api.MAXIMO)
+            condiciones.append(recurso.columnas['id'].in_(ids))
+        elif nombre in recurso.columnas:
+            condiciones.append(recurso.filtro(nombre, valor))
+        elif nombre not in _ARGUMENTOS_API and not nombre.startswith('campos['):
+            raise api.ErrorAPI('argumento desconocido: %r' % nombre)
+    return recurso.campos(request.args.get('campos')), incluir, condiciones
+
+def _respuesta_api(partes, mimetype):
+    """Response with the chunks of bytes `partes`, gzip-compressed when
+    the client accepts it."""
+    respuesta = Response(partes, mimetype=mimetype)
+    if 'gzip' in request.accept_encodings:
+        respuesta.response = api.gzip(partes)
+        respuesta.headers['Content-Encoding'] = 'gzip'
+    respuesta.vary.add('Accept-Encoding')
+    return respuesta
+
+def api_lista(recurso):
+    """Rows of a resource ordered by id: a page of JSON with the URL of
+    the next one, or every row as NDJSON."""
+    recurso = _recurso_api(recurso)
+    try:
+        campos, incluir, condiciones = _parametros_api(recurso)
+        tras = api.enteros(request.args.get('tras', ''), 'tras')
+        limite = api.enteros(request.args.get('limite', ''), 'limite')
+        if limite and limite[0] < 1:
+            raise api.ErrorAPI('limite: se esperaba un número mayor que 0')
+    except api.ErrorAPI as error:
+        return jsonify(error=str(error)), 400
+    tras = tras[0] if tras else None
+    formato = request.args.get('formato') or \
+        ('ndjson' if request.accept_mimetypes.best == api.NDJSON else 'json')
+    if formato == 'ndjson':
+        filas = recurso.todas(db.session, campos, condiciones, tras,
+                              limite[0] if limite else None, incluir)
+        return _respuesta_api(stream_with_context(api.ndjson(filas)), api.NDJSON)
+
+    limite = min(limite[0], api.MAXIMO) if limite else api.LIMITE
+    filas = recurso.filas(db.session, campos, condiciones, tras, limite, incluir)
+    siguiente = None
+    if len(filas) == limite:
+        argumentos = request.args.to_dict()
+        argumentos['tras'] = filas[-1]['id']
+        siguiente = url_for(request.endpoint, recurso=request.view_args['recurso'],
+                            **argumentos)
+    cuerpo = api.volcar(dict(datos=filas, siguiente=siguiente)).encode('utf-8')
+    return _respuesta_api([cuerpo], 'application/json')
+
+def api_fila(recurso, id):
+    """One row of a resource, as JSON."""
+    recurso = _recurso_api(recurso)
+    try:
+        campos, incluir, _ = _parametros_api(recurso)
+    except api.ErrorAPI as error:
+        return jsonify(error=str(error)), 400
+    filas = recurso.filas(db.session, campos, [recurso.columnas['id'] == id],
+                          limite=1, incluir=incluir)
+    if not filas:
+        abort(404)
+    return _respuesta_api([api.volcar(dict(datos=filas[0])).encode('utf-8')],
+                          'application/json')
+
+def foto(filename):
+    """Serve a photo with validators, Range requests and, for
+    fingerprinted URLs, a cache lifetime of one year.
+
+    The file is sent through the server's wsgi.file_wrapper (sendfile
+    on gunicorn and uWSGI), or by the front-end proxy when
+    USE_X_SENDFILE is set.
+    """
+    digesto = almacen.digesto(filename)
+    inmutable = digesto is not None or 'v' in request.args
+    # The name of a stored file identifies its content: revalidation
+    # needs neither to open nor to stat the file
+    etag = op.basename(filename) if digesto else True
+    if digesto and request.if_none_match.contains(etag):
+        respuesta = Response(status=304)
+        respuesta.set_etag(etag)
+    else:
+        respuesta = send_from_directory(carpeta_fotos(), filename, etag=etag,
+                                        conditional=True)
+    if inmutable:
+        respuesta.headers['Cache-Control'] = CACHE_INMUTABLE
+    return respuesta
+
+# Full-text search
+INDICE_BUSQUEDA = 'busqueda'
+
+MODELOS_BUSQUEDA = dict(observacion=Observacion, artefacto=Artefacto, desecho=Desecho)
+
+def _entidad_busqueda(codigo, tipo, nombre, *textos):
+    modelo = MODELOS_BUSQUEDA[tipo]
+    columnas = inspect(modelo).columns
+    return busqueda.Entidad(codigo, tipo, modelo.__table__.name,
+                            columnas[nombre].name,
+                            [columnas[texto].name for texto in textos])
+
+ENTIDADES_BUSQUEDA = [
+    _entidad_busqueda(1, 'observacion', 'nombre', 'sitio'),
+    _entidad_busqueda(2, 'artefacto', 'nombre', 'obs', 'ubicacion_sustancia'),
+    _entidad_busqueda(3, 'desecho', 'nombre'),
+]
+
+_tabla_busqueda = table(INDICE_BUSQUEDA, column('rowid'))
+
+def busqueda_disponible():
+    return db.engine.dialect.name == 'sqlite'
+
+def _crear_tabla_virtual(conexion, indice, ddl, sentencias_repoblar, repoblar):
+    if conexion.dialect.name != 'sqlite':
+        return
+    repoblar = repoblar or not conexion.dialect.has_table(conexion, indice)
+    for sentencia in ddl:
+        conexion.execute(sentencia)
+    if repoblar:
+        for sentencia in sentencias_repoblar:
+            conexion.execute(sentencia)
+
+def crear_busqueda(conexion, repoblar=False):
+    """Create the FTS5 index and its triggers, filling it if it is new."""
+    _crear_tabla_virtual(conexion, INDICE_BUSQUEDA,
+                         busqueda.ddl(INDICE_BUSQUEDA, ENTIDADES_BUSQUEDA),
+                         busqueda.repoblar(INDICE_BUSQUEDA, ENTIDADES_BUSQUEDA),
+                         repoblar)
+
+def _coincide(expresion):
+    return literal_column(INDICE_BUSQUEDA).op('MATCH')(expresion)
+
+def ids_busqueda(texto, modelo):
+    """Subquery of the ids of `modelo` matching `texto`, or None."""
+    expresion = busqueda.consulta(texto)
+    if expresion is None:
+        return None
+    codigo = next(e.codigo for e in ENTIDADES_BUSQUEDA
+                  if MODELOS_BUSQUEDA[e.tipo] is modelo)
+    rowid = _tabla_busqueda.c.rowid
+    return select([rowid / busqueda.FACTOR]) \
+        .where(_coincide(expresion)) \
+        .where(rowid % busqueda.FACTOR == codigo)
+
+def consulta_busqueda(texto, limite=20, tipos=None):
+    """Select of (rowid, nombre, fragmento, rango) ranked by BM25, or None."""
+    expresion = busqueda.consulta(texto)
+    if expresion is None:
+        return None
+    rowid = _tabla_busqueda.c.rowid
+    rango = func.bm25(literal_column(INDICE_BUSQUEDA), 10.0, 1.0)
+    query = select([rowid, literal_column('nombre'),
+                    func.snippet(literal_column(INDICE_BUSQUEDA), 1, '', '', '…', 12),
+                    rango]) \
+        .select_from(_tabla_busqueda) \
+        .where(_coincide(expresion)) \
+        .order_by(rango).limit(limite)
+    if tipos:
+        codigos = [e.codigo for e in ENTIDADES_BUSQUEDA if e.tipo in tipos]
+        query = query.where((rowid % busqueda.FACTOR).in_(codigos))
+    return query
+
+def buscar(texto, limite=20, tipos=None):
+    """Ranked hits across all indexed entities, best first."""
+    query = consulta_busqueda(texto, limite, tipos)
+    if query is None:
+        return []
+    tipos = dict((e.codigo, e.tipo) for e in ENTIDADES_BUSQUEDA)
+    return [dict(tipo=tipos[i % busqueda.FACTOR], id=i // busqueda.FACTOR,
+                 nombre=nombre, fragmento=fragmento, rango=r)
+            for i, nombre, fragmento, r in db.session.execute(query)]
+
+class BusquedaMixin(object):
+    """Answer the list search box from the full-text index."""
+
+    def _apply_search(self, query, count_query, joins, count_joins, search):
+        if not busqueda_disponible():
+            return super(BusquedaMixin, self)._apply_search(
+                query, count_query, joins, count_joins, search)
+        ids = ids_busqueda(search, self.model)
+        if ids is not None:
+            query = query.filter(self.model.id.in_(ids))
+            if count_query is not None:
+                count_query = count_query.filter(self.model.id.in_(ids))
+        return query, count_query, joins, count_joins
+
+# Spatial queries over the observaciones
+INDICE_ESPACIAL = 'observacion_rtree'
+
+_COLUMNAS_ESPACIALES = (INDICE_ESPACIAL, Observacion.__table__.name,
+                        inspect(Observacion).columns['latitud'].name,
+                        inspect(Observacion).columns['longitud'].name)
+
+_rtree = table(INDICE_ESPACIAL, column('id'), column('lat_min'), column('lat_max'),
+               column('lon_min'), column('lon_max'))
+
+@db.event.listens_for(Engine, 'connect')
+def _funciones_sqlite(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('distancia_km', 4, espacial.distancia_km,
+                                         deterministic=True)
+
+def crear_indice_espacial(conexion, repoblar=False):
+    """Create the R*Tree of the observaciones and its triggers."""
+    _crear_tabla_virtual(conexion, INDICE_ESPACIAL,
+                         espacial.ddl(*_COLUMNAS_ESPACIALES),
+                         espacial.repoblar(*_COLUMNAS_ESPACIALES),
+                         repoblar)
+
+@db.event.listens_for(db.metadata, 'after_create')
+def _crear_tablas_virtuales(target, connection, tables=(), **kw):
+    # Existing databases get them from migrar_esquema, once their columns exist
+    creadas = set(tabla.name for tabla in tables)
+    if all(entidad.tabla in creadas for entidad in ENTIDADES_BUSQUEDA):
+        crear_busqueda(connection)
+    if Observacion.__table__.name in creadas:
+        crear_indice_espacial(connection)
+
+def observaciones_en_caja(oeste, sur, este, norte):
+    """Select of the ids of the observaciones inside the box."""
+    query = select([Observacion.id]).where(and_(
+        Observacion.latitud.between(sur, norte),
+        Observacion.longitud.between(oeste, este)))
+    if db.engine.dialect.name == 'sqlite':
+        # The R*Tree finds the candidates, the columns give exact bounds
+        query = query.select_from(Observacion.__table__.join(
+            _rtree, _rtree.c.id == Observacion.id)).where(and_(
+                _rtree.c.lat_max >= sur, _rtree.c.lat_min <= norte,
+                _rtree.c.lon_max >= oeste, _rtree.c.lon_min <= este))
+    return query
+
+def observaciones_en_radio(latitud, longitud, km):
+    """Select of the ids of the observaciones within `km` of a point."""
+    return observaciones_en_caja(*espacial.caja_radio(latitud, longitud, km)) \
+        .where(func.distancia_km(Observacion.latitud, Observacion.longitud,
+                                 latitud, longitud) <= km)
+
+def _numeros(texto, cantidad):
+    valores = [float(v) for v in texto.split(',')]
+    if len(valores) != cantidad:
+        raise ValueError('se esperaban %d números' % cantidad)
+    return valores
+
+def _radio(latitud, longitud, km):
+    if not (-90 <= latitud <= 90 and -180 <= longitud <= 180 and km > 0):
+        raise ValueError('punto o radio inválido')
+    return latitud, longitud, km
+
+def area_consultada(args):
+    """Select of the observación ids of the `bbox` (oeste,sur,este,norte)
+    or of the `lat`, `lon` and `radio_km` arguments, or None.
+
+    Raises ValueError when the arguments are malformed.
+    """
+    if args.get('bbox'):
+        return observaciones_en_caja(*espacial.validar_caja(*_numeros(args['bbox'], 4)))
+    if args.get('radio_km'):
+        return observaciones_en_radio(*_radio(float(args.get('lat', '')),
+                                              float(args.get('lon', '')),
+                                              float(args['radio_km'])))
+    return None
+
+class FiltroCaja(filters.BaseSQLAFilter):
+    """Observación inside a box written as "oeste, sur, este, norte"."""
+
+    def validate(self, value):
+        try:
+            self.clean(value)
+        except ValueError:
+            return False
+        return True
+
+    def clean(self, value):
+        return espacial.validar_caja(*_numeros(value, 4))
+
+    def apply(self, query, value, alias=None):
+        return query.filter(self.get_column(alias).in_(observaciones_en_caja(*value)))
+
+    def operation(self):
+        return 'dentro de (oeste, sur, este, norte)'
+
+class FiltroRadio(FiltroCaja):
+    """Observación within a radius written as "lat, lon, km"."""
+
+    def clean(self, value):
+        return _radio(*_numeros(value, 3))
+
+    def apply(self, query, value, alias=None):
+        return query.filter(self.get_column(alias).in_(observaciones_en_radio(*value)))
+
+    def operation(self):
+        return 'a menos de (lat, lon, km)'
+
+def filtros_espaciales(columna, nombre):
+    return [FiltroCaja(columna, nombre), FiltroRadio(columna, nombre)]
+
+class SelectVocabulario(Select2Widget):
+    """Select2 widget writing the precomputed options of a vocabulary."""
+
+    def __init__(self, vocabulario):
+        super(SelectVocabulario, self).__init__()
+        self.vocabulario = vocabulario
+
+    def __call__(self, field, **kwargs):
+        kwargs.setdefault('id', field.id)
+        kwargs.setdefault('data-role', 'select2')
+        if 'required' not in kwargs and 'required' in getattr(field, 'flags', []):
+            kwargs['required'] = True
+        en_blanco = getattr(field, 'allow_blank', False)
+        if en_blanco:
+            kwargs['data-allow-blank'] = '1'
+        html = ['<select %s>' % html_params(name=field.name, **kwargs)]
+        if en_blanco:
+            html.append(self.render_option('__None', field.blank_text, field.data is None))
+        opciones = self.vocabulario.html
+        dato = field.data.name if isinstance(field.data, enum.Enum) else field.data
+        posicion = self.vocabulario.posicion.get(dato)
+        if posicion is None:
+            html.extend(opciones)
+        else:
+            html.extend(opciones[:posicion])
+            html.append(self.vocabulario.html_seleccionada[posicion])
+            html.extend(opciones[posicion + 1:])
+        html.append('</select>')
+        return Markup(''.join(html))
+
+class ConversorVocabularios(AdminModelConverter):
+    """Form converter sharing the choices and options of vocabularios."""
+
+    @converts('sqlalchemy.sql.sqltypes.Enum', 'codigos.EnumEntero')
+    def convert_enum(self, column, field_args, **extra):
+        vocabulario = vocabularios.de(getattr(column.type, 'enum_class', None))
+        if vocabulario is None:
+            return super(ConversorVocabularios, self).convert_enum(column, field_args, **extra)
+        aceptados = vocabulario.etiquetas
+        if column.nullable:
+            field_args['allow_blank'] = True
+            aceptados = aceptados + [None]
+            field_args['filters'] = field_args.get('filters', []) + [lambda x: x or None]
+        field_args['choices'] = vocabulario.opciones
+        field_args['validators'].append(validators.AnyOf(aceptados))
+        field_args['coerce'] = lambda v: v.name if isinstance(v, enum.Enum) else str(v)
+        field_args['widget'] = SelectVocabulario(vocabulario)
+        return formadmin.Select2Field(**field_args)
+
+class FiltrosVocabularios(filters.FilterConverter):
+    """Filter converter sharing the choices of vocabularios."""
+
+    @convert('enum', 'enumentero')
+    def conv_enum(self, column, name, options=None, **kwargs):
+        vocabulario = vocabularios.de(getattr(column.type, 'enum_class', None))
+        if not options and vocabulario is not None:
+            options = vocabulario.opciones
+        return super(FiltrosVocabularios, self).conv_enum(column, name, options, **kwargs)
+
+class VocabulariosMixin(object):
+    """Forms and filters built from the shared vocabularios.
+
+    The filter groups, with the options of every vocabulary, are also
+    computed once per view instead of on every list page.
+    """
+    model_form_converter = ConversorVocabularios
+    filter_converter = FiltrosVocabularios()
+
+    def _get_filter_groups(self):
+        if not hasattr(self, '_grupos_filtros'):
+            self._grupos_filtros = super(VocabulariosMixin, self)._get_filter_groups()
+        return self._grupos_filtros
+
+class CargaMixin(object):
+    """Eager loading of the relationships shown in the list view.
+
+    Each relationship in `column_carga` is loaded for the whole page at
+    once: references to one row with a join and collections with a
+    second SELECT ... WHERE id IN (...), so a page takes the same number
+    of queries whatever its size.
+    """
+    column_carga = ()
+
+    def opciones_carga(self):
+        opciones = []
+        for nombre in self.column_carga:
+            atributo = getattr(self.model, nombre)
+            if atributo.property.uselist:
+                opciones.append(selectinload(atributo))
+            elif atributo not in self._auto_joins:
+                opciones.append(joinedload(atributo))
+        return opciones
+
+    def get_list(self, page, sort_column, sort_desc, search, filters,
+                 execute=True, page_size=None):
+        count, query = super(CargaMixin, self).get_list(
+            page, sort_column, sort_desc, search, filters, False, page_size)
+        query = query.options(*self.opciones_carga())
+        return count, query.all() if execute else query
+
+# Totals of the list views: (endpoint, search, filters) -> (time, count),
+# the CONTEOS_MAXIMO most recently used
+CONTEOS_MAXIMO = 1000
+_CONTEOS = collections.OrderedDict()
+_CONTEOS_LOCK = threading.Lock()
+
+class PaginacionMixin(object):
+    """Keyset pagination of the list view.
+
+    The next and previous pages are read after the last row (`tras`) or
+    before the first row (`antes`) of the current one, so every page
+    costs the same as the first. Jumping to any other page uses OFFSET
+    on the same order; sorting by a column of a related model keeps the
+    plain Flask-Admin pagination.
+    """
+    simple_list_pager = True
+
+    # None hides the total; 'exacto' counts at most once every conteo_ttl
+    # seconds and 'aproximado' takes the highest id when nothing is
+    # searched or filtered
+    conteo = 'exacto'
+    conteo_ttl = 60
+
+    def get_sortable_columns(self):
+        columnas = super(PaginacionMixin, self).get_sortable_columns()
+        # Flask-Admin before 1.6 keys a (name, column) entry by the column,
+        # which leaves the list column `name` unsortable
+        for entrada in self.column_sortable_list or ():
+            if isinstance(entrada, tuple) and isinstance(entrada[1], str) and \
+                    entrada[0] not in columnas and entrada[1] in columnas:
+                columnas[entrada[0]] = columnas.pop(entrada[1])
+        return columnas
+
+    def _columna_keyset(self, sort_column):
+        """Sort expression of the keyset, None for the id alone, or False
+        when the sort does not allow one."""
+        if sort_column is None:
+            return False if self.column_default_sort else None
+        if sort_column not in self._sortable_columns or \
+                self._sortable_joins.get(sort_column):
+            return False
+        campo = self._sortable_columns[sort_column]
+        return False if isinstance(campo, list) else campo
+
+    def get_list(self, page, sort_column, sort_desc, search, filters,
+                 execute=True, page_size=None):
+        if page_size is None:
+            page_size = self.page_size
+        count = self.contar(search, filters)
+        columna = self._columna_keyset(sort_column)
+        clave = None
+        if columna is not False:
+            for direccion in ('tras', 'antes'):
+                if request.args.get(direccion):
+                    clave = paginacion.leer_cursor(request.args[direccion], sort_column,
+                                                   getattr(columna, 'type', None))
+                    break
+        if not execute or not page_size or columna is False:
+            return count, super(PaginacionMixin, self).get_list(
+                page, sort_column, sort_desc, search, filters, execute, page_size)[1]
+
+        _, query = super(PaginacionMixin, self).get_list(
+            None, None, False, search, filters, execute=False, page_size=0)
+        # The page before the current one is read backwards
+        desc = bool(sort_desc) != (clave is not None and direccion == 'antes')
+        query = query.order_by(None).order_by(
+            *paginacion.orden(columna, self.model.id, desc))
+        if clave is None:
+            filas = query.offset(page * page_size if page else None).limit(page_size).all()
+        else:
+            filas = []
+            for condicion in paginacion.tramos(columna, self.model.id,
+                                               clave[0], clave[1], desc):
+                filas += query.filter(condicion).limit(page_size - len(filas)).all()
+                if len(filas) == page_size:
+                    break
+        if desc != bool(sort_desc):
+            filas.reverse()
+
+        def cursor(fila):
+            # The value sorted on: a derived column sorts on its metric
+            valor = getattr(fila, columna.key) if columna is not None else None
+            return paginacion.cursor(sort_column, valor, fila.id)
+        g.paginacion = dict(vista=self, pagina=page or 0, sort=sort_column,
+                            desc=bool(sort_desc), search=search, filters=filters,
+                            primero=filas and cursor(filas[0]),
+                            ultimo=len(filas) == page_size and cursor(filas[-1]))
+        return count, filas
+
+    def _get_list_url(self, view_args):
+        extra_args = dict((k, v) for k, v in view_args.extra_args.items()
+                          if k not in ('tras', 'antes'))
+        actual = g.get('paginacion')
+        sort = self._get_column_by_idx(view_args.sort)
+        if actual and actual['vista'] is self and view_args.page and \
+                (sort and sort[0]) == actual['sort'] and \
+                view_args.sort_desc == actual['desc'] and \
+                view_args.search == actual['search'] and \
+                (view_args.filters or None) == (actual['filters'] or None):
+            if view_args.page == actual['pagina'] + 1 and actual['ultimo']:
+                extra_args['tras'] = actual['ultimo']
+            elif view_args.page == actual['pagina'] - 1 and actual['primero']:
+                extra_args['antes'] = actual['primero']
+        return super(PaginacionMixin, self)._get_list_url(
+            view_args.clone(extra_args=extra_args))
+
+    def contar(self, search, filters):
+        """Total rows of the list, from the cache when it is recent."""
+        if not self.conteo:
+            return None
+        if self.conteo == 'aproximado' and not search and not filters:
+            return self.session.query(func.max(self.model.id)).scalar() or 0
+
+        clave = (self.endpoint, search, repr(filters))
+        with _CONTEOS_LOCK:
+            guardado = _CONTEOS.get(clave)
+            if guardado:
+                _CONTEOS.move_to_end(clave)
+        if guardado and time.time() - guardado[0] < self.conteo_ttl:
+            return guardado[1]
+        query, count_query = self.get_query(), self.get_count_query()
+        joins, count_joins = {}, {}
+        if self._search_supported and search:
+            query, count_query, joins, count_joins = self._apply_search(
+                query, count_query, joins, count_joins, search)
+        if filters and self._filters:
+            query, count_query, joins, count_joins = self._apply_filters(
+                query, count_query, joins, count_joins, filters)
+        total = count_query.scalar()
+        with _CONTEOS_LOCK:
+            _CONTEOS[clave] = (time.time(), total)
+            _CONTEOS.move_to_end(clave)
+            while len(_CONTEOS) > CONTEOS_MAXIMO:
+                _CONTEOS.popitem(last=False)
+        return total
+
+    def _olvidar_conteos(self):
+        with _CONTEOS_LOCK:
+            for clave in [c for c in _CONTEOS if c[0] == self.endpoint]:
+                del _CONTEOS[clave]
+
+    def after_model_change(self, form, model, is_created):
+        self._olvidar_conteos()
+        super(PaginacionMixin, self).after_model_change(form, model, is_created)
+
+    def after_model_delete(self, model):
+        self._olvidar_conteos()
+        super(PaginacionMixin, self).after_model_delete(model)
+
+# Attribute shown by __str__ of the models referenced in exports
+COLUMNA_NOMBRE = {User: 'login'}
+
+class CacheMixin(object):
+    """Serve the GET requests of the `cache_vistas` methods from the page
+    cache. Pages are stored per user and query arguments and invalidated
+    by any write to the `cache_modelos` models, see cache."""
+    cache_vistas = ('index_view',)
+    cache_modelos = ()
+
+    def _run_view(self, fn, *args, **kwargs):
+        paginas = current_app.extensions.get('cache')
+        if paginas is None or request.method != 'GET' or \
+                fn.__name__ not in self.cache_vistas or '_flashes' in session:
+            return super(CacheMixin, self)._run_view(fn, *args, **kwargs)
+        clave = cache.clave(request.endpoint, login.current_user.get_id(),
+                            sorted(request.args.items(multi=True)),
+                            cache.versiones(db.session, VERSIONES_CACHE, self.cache_modelos))
+        guardada = paginas.leer(request.endpoint, clave)
+        if guardada is not None:
+            return Response(guardada[1], mimetype=guardada[0])
+        respuesta = make_response(super(CacheMixin, self)._run_view(fn, *args, **kwargs))
+        # Pages showing messages are not kept
+        if respuesta.status_code == 200 and not respuesta.direct_passthrough and \
+                not get_flashed_messages():
+            paginas.guardar(clave, respuesta.mimetype, respuesta.get_data())
+        return respuesta
+
+def consulta_listado(vista, view_args):
+    """Query of the rows that the list view `vista` shows for the search
+    and filters of `view_args`, unsorted, and the joins it made."""
+    joins = {}
+    query = vista.get_query()
+    if vista._search_supported and view_args.search:
+        query, _, joins, _ = vista._apply_search(query, None, joins, {}, view_args.search)
+    if view_args.filters and vista._filters:
+        query, _, joins, _ = vista._apply_filters(query, None, joins, {}, view_args.filters)
+    return query, joins
+
+class ExportacionMixin(object):
+    """Stream the admin export straight from a column query.
+
+    The list search, filters and sort are applied as in the list view,
+    but only the exported columns are selected (relations by name,
+    derived columns with their SQL expression) and rows are fetched with
+    yield_per, so no model is loaded and memory stays flat.
+    """
+
+    export_types = exportacion.FORMATOS
+    export_lote = 1000
+
+    def _columna_export(self, query, nombre):
+        relacion = inspect(self.model).relationships.get(nombre)
+        if relacion is None:
+            expresion = getattr(self.model, nombre)
+            tipo = getattr(expresion, 'type', None)
+            if isinstance(tipo, codigos.EnumEntero):
+                # The label comes from the lookup table of the vocabulary
+                etiquetas = TABLAS_VOCABULARIO[tipo.enum_class].alias()
+                query = query.outerjoin(etiquetas, etiquetas.c.codigo == expresion)
+                return query, etiquetas.c.etiqueta
+            return query, expresion
+
+        destino = relacion.mapper.class_
+        columna = COLUMNA_NOMBRE.get(destino, 'nombre')
+        if relacion.uselist:
+            expresion = select([func.group_concat(getattr(destino, columna), ', ')]) \
+                .where(relacion.primaryjoin).as_scalar()
+            return query, expresion
+        alias = aliased(destino)
+        query = query.outerjoin(alias, getattr(self.model, nombre).of_type(alias))
+        return query, getattr(alias, columna)
+
+    def consulta_export(self):
+        """Query of the exported columns for the current list arguments."""
+        view_args = self._get_list_extra_args()
+        sort_column = self._get_column_by_idx(view_args.sort)
+        if sort_column is not None:
+            sort_column = sort_column[0]
+
+        query, joins = consulta_listado(self, view_args)
+        query, joins = self._apply_sorting(query, joins, sort_column,
+                                           view_args.sort_desc)
+
+        expresiones = []
+        for nombre, etiqueta in self._export_columns:
+            query, expresion = self._columna_export(query, nombre)
+            expresiones.append(expresion.label(nombre))
+        query = query.with_entities(*expresiones)
+        if self.export_max_rows:
+            query = query.limit(self.export_max_rows)
+        return query.yield_per(self.export_lote)
+
+    @expose('/export/<export_type>/')
+    def export(self, export_type):
+        return_url = helpers.get_redirect_target() or self.get_url('.index_view')
+        if not self.can_export or export_type not in self.export_types:
+            flash('Permiso denegado.', 'error')
+            return redirect(return_url)
+
+        query = self.consulta_export()
+        encabezados = [etiqueta for nombre, etiqueta in self._export_columns]
+        if export_type == 'csv':
+            datos = exportacion.csv_stream(encabezados, query, self.export_lote)
+        else:
+            tipos = [columna['type'] for columna in query.column_descriptions]
+            datos = exportacion.columnar_stream(encabezados, tipos, query,
+                                                export_type)
+
+        nombre = secure_filename(self.get_export_name(export_type=export_type))
+        return Response(stream_with_context(datos),
+                        headers={'Content-Disposition': 'attachment;filename=%s' % nombre},
+                        mimetype=exportacion.MIMETYPES[export_type])
+
+class EdicionMasivaMixin(object):
+    """Set a column to one value on the selected rows or on every row of
+    the filtered list, or delete them, with editar_en_bloque and
+    borrar_en_bloque. Deleting a single row takes the same path, so its
+    detalles, procedimientos and fotos go with it."""
+    list_template = 'admin/masivo_lista.html'
+
+    def campos_masivos(self):
+        """(name, label) of the columns that can be set in bulk."""
+        columnas = inspect(self.model).columns
+        return [(nombre, self.get_column_name(nombre))
+                for nombre in self.form_columns if nombre in columnas]
+
+    def _seleccion(self):
+        """Query of the ids of the rows to change, and its description."""
+        if request.args.get('ids'):
+            try:
+                ids = [int(i) for i in request.args['ids'].split(',')]
+            except ValueError:
+                abort(400)
+            return select([self.model.id]).where(self.model.id.in_(ids)), \
+                'Filas seleccionadas (N° %s)' % ', '.join(str(i) for i in ids)
+        view_args = self._get_list_extra_args()
+        query, _ = consulta_listado(self, view_args)
+        partes = []
+        if view_args.search:
+            partes.append('Búsqueda «%s»' % view_args.search)
+        for indice, nombre, valor in view_args.filters or ():
+            partes.append('%s %s %s' % (nombre, self._filters[indice].operation(), valor))
+        return query.with_entities(self.model.id).statement, \
+            '; '.join(partes) or 'Todas las filas'
+
+    def _mensaje_borradas(self, borradas):
+        otras = ', '.join('%s: %d' % (modelo, cantidad)
+                          for modelo, cantidad in sorted(borradas.items())
+                          if modelo != self.model.__name__ and cantidad)
+        mensaje = '%d filas borradas' % borradas[self.model.__name__]
+        return mensaje + (' (y %s)' % otras if otras else '') + '.'
+
+    def is_action_allowed(self, name):
+        if name == 'editar' and not self.can_edit:
+            return False
+        return super(EdicionMasivaMixin, self).is_action_allowed(name)
+
+    @action('editar', 'Editar en bloque')
+    def action_editar(self, ids):
+        return redirect(self.get_url('.masivo_view', ids=','.join(ids),
+                                     url=helpers.get_redirect_target()))
+
+    @action('delete', 'Borrar',
+            '¿Borrar las filas seleccionadas con sus detalles, procedimientos y fotos?')
+    def action_delete(self, ids):
+        try:
+            borradas = borrar_en_bloque(
+                self.model, select([self.model.id]).where(self.model.id.in_([int(i) for i in ids])),
+                login.current_user.get_id(), 'Filas seleccionadas')
+        except Exception as ex:
+            if not self.handle_view_exception(ex):
+                raise
+            flash('No se pudieron borrar las filas. %s' % ex, 'error')
+        else:
+            flash(self._mensaje_borradas(borradas), 'success')
+
+    def delete_model(self, model):
+        try:
+            self.on_model_delete(model)
+            self.session.expunge(model)
+            borrar_en_bloque(self.model, select([self.model.id]).where(self.model.id == model.id),
+                             login.current_user.get_id(), 'N° %d' % model.id)
+        except Exception as ex:
+            if not self.handle_view_exception(ex):
+                flash('No se pudo borrar la fila. %s' % ex, 'error')
+            self.session.rollback()
+            return False
+        else:
+            self.after_model_delete(model)
+        return True
+
+    @expose('/masivo/', methods=('GET', 'POST'))
+    def masivo_view(self):
+        return_url = helpers.get_redirect_target() or self.get_url('.index_view')
+        borrar = request.form.get('accion') == 'borrar'
+        if not (self.can_edit or self.can_delete) or request.method == 'POST' and \
+                not (self.can_delete if borrar else self.can_edit):
+            abort(403)
+        ids, alcance = self._seleccion()
+        campos = self.campos_masivos()
+        campo = request.values.get('campo')
+        if campo not in dict(campos):
+            campo = campos[0][0]
+        formulario = self._edit_form_class(request.form if request.method == 'POST' else None)
+        if request.method == 'POST':
+            usuario = login.current_user.get_id()
+            try:
+                if borrar:
+                    borradas = borrar_en_bloque(self.model, ids, usuario, alcance)
+                    flash(self._mensaje_borradas(borradas), 'success')
+                    return redirect(return_url)
+                if formulario[campo].validate(formulario):
+                    filas = editar_en_bloque(self.model, ids, campo, formulario[campo].data,
+                                             usuario, alcance)
+                    flash('%s cambiado en %d filas.' % (dict(campos)[campo], filas), 'success')
+                    return redirect(return_url)
+            except Exception as ex:
+                if not self.handle_view_exception(ex):
+                    raise
+                flash('No se pudieron cambiar las filas. %s' % ex, 'error')
+
+        tabla = self.model.__table__
+        total = db.session.execute(select([func.count()]).select_from(tabla)
+                                   .where(tabla.c.id.in_(ids))).scalar()
+        dependientes = sorted(set(self.get_column_name(relacion.key)
+                                  for relacion in inspect(self.model).relationships
+                                  if relacion.uselist))
+        cambios = CambioMasivo.query.filter_by(modelo=self.model.__name__) \
+            .order_by(CambioMasivo.fecha.desc()).limit(10).all()
+        return self.render('admin/masivo.html', return_url=return_url, alcance=alcance,
+                           total=total, campos=campos, campo=campo,
+                           campo_form=formulario[campo], dependientes=dependientes,
+                           cambios=cambios)
+
+class ObservacionAdmin(CacheMixin, BusquedaMixin, ExportacionMixin, sqla.ModelView):
     column_labels = dict(id = 'Id',
                          nombre = 'Nombre o etiqueta de la observación',
     sitio = 'Sitio o Localidad',
@@ -783,16 +1721,20 @@ class ObservacionAdmin(sqla.ModelView):
 
     column_sortable_list = column_list
 
-    column_filters = column_list
+    column_filters = list(column_list) + filtros_espaciales(Observacion.id, 'Ubicación')
+
+    column_searchable_list = ('nombre', 'sitio')
 
     form_columns = column_list
 
     can_export = True
 
+    cache_modelos = ('Observacion', 'User')
+
     def is_accessible(self):
         return login.current_user.is_authenticated
 
-class ArtefactoAdmin(sqla.ModelView):
+class ArtefactoAdmin(CacheMixin, EdicionMasivaMixin, PaginacionMixin, CargaMixin, VocabulariosMixin, BusquedaMixin, ExportacionMixin, sqla.ModelView):
     """ Flask-admin can not automatically find a association_proxy yet.
     You will need to manually define the column
     in list_view/filters/sorting/etc. Moreover,
@@ -823,6 +1765,9 @@ class ArtefactoAdmin(sqla.ModelView):
                          peso_pieza = 'Peso pieza (g)',
                          mod_ancho_largo_pieza = 'Módulo ancho-largo',
                          mod_ancho_espesor_pieza = 'Módulo ancho-espesor',
+                         clase_tamano = 'Tamano de la pieza',
+                         razon_largo_ancho = 'Razón largo/ancho',
+                         razon_ancho_espesor = 'Razón ancho/espesor',
                          clase_tecnica = 'Clase técnica',
                          reduc_uni_sbordes = "Reduccion unifacial sin bordes",
                          las_inv_lim = "Lascado inverso limitante",
@@ -876,20 +1821,34 @@ class ArtefactoAdmin(sqla.ModelView):
                    'ubicacion_sustancia',
                    'obs']
 
-    lista_sin_hibridos = [col for col in column_list if col != 'tamano']
-    lista_sin_hibridos = [col for col in lista_sin_hibridos
-                                    if col != 'mod_ancho_largo_pieza']
-    lista_sin_hibridos = [col for col in lista_sin_hibridos
-                                    if col != 'mod_ancho_espesor_pieza']
+    lista_sin_hibridos = [col for col in column_list
+                          if col not in ('tamano',
+                                         'mod_ancho_largo_pieza',
+                                         'mod_ancho_espesor_pieza')]
 
-    column_sortable_list = lista_sin_hibridos
+    # The derived columns sort and filter on their stored, indexed metrics
+    column_sortable_list = lista_sin_hibridos + [
+        ('tamano', 'clase_tamano'),
+        ('mod_ancho_largo_pieza', 'razon_largo_ancho'),
+        ('mod_ancho_espesor_pieza', 'razon_ancho_espesor')]
 
-    column_filters = lista_sin_hibridos
+    column_filters = lista_sin_hibridos + ['clase_tamano',
+                                           'razon_largo_ancho',
+                                           'razon_ancho_espesor'] + \
+        filtros_espaciales(Artefacto.observacion_id, 'Ubicación de la observación')
+
+    column_searchable_list = ('nombre', 'obs', 'ubicacion_sustancia')
+
+    column_carga = ('observacion', 'procedimientos')
+
+    column_choices = dict(clase_tamano = OPCIONES_TAMANO)
 
     form_columns = lista_sin_hibridos
 
     can_export = True
 
+    cache_modelos = ('Artefacto', 'Observacion', 'Procedimiento')
+
     def is_accessible(self):
         return login.current_user.is_authenticated
 
@@ -903,31 +1862,26 @@ class ProcedimientoAdmin(sqla.ModelView):
 
     column_list = ['id', 'nombre']
 
-class FotosArtefactosView(sqla.ModelView):
-    def _list_thumbnail(view, context, model, name):
-        if not model.path:
-            return ''
-
-        return Markup('<img src="%s">' % url_for('static',
-        filename=formadmin.thumbgen_filename(model.path)))
-
+class FotosArtefactosView(FotosMixin, sqla.ModelView):
     column_formatters = {
-        'path': _list_thumbnail
+        'path': _miniatura
     }
 
+    column_exclude_list = ['estado_derivados']
+
     # Alternative way to contribute field is to override it completely.
     # In this case, Flask-Admin won't attempt to merge various parameters for the field.
     form_extra_fields = {
-        'path': formadmin.ImageUploadField('Image',
-                                      base_path=file_path,
-                                      thumbnail_size=(100, 100, True))
+        'path': ImagenDiferidaField('Image', base_path=carpeta_fotos)
     }
 
+    form_excluded_columns = ['estado_derivados']
+
     def is_accessible(self):
         return login.current_user.is_authenticated
 
 
-class DetalleAdmin(sqla.ModelView):
+class DetalleAdmin(CacheMixin, EdicionMasivaMixin, PaginacionMixin, CargaMixin, VocabulariosMixin, ExportacionMixin, sqla.ModelView):
 
     column_labels = dict(nombre = 'Nombre o etiqueta del detalle',
                          artefacto = 'Artefacto al que pertenece',
@@ -936,6 +1890,9 @@ class DetalleAdmin(sqla.ModelView):
                          ancho_pieza = 'Ancho pieza (mm)',
                          espesor_pieza = 'Espesor pieza (mm)',
                          mod_ancho_espesor_pieza = 'Módulo ancho-espesor',
+                         clase_tamano = 'Tamano de la pieza',
+                         razon_largo_ancho = 'Razón largo/ancho',
+                         razon_ancho_espesor = 'Razón ancho/espesor',
                          clase_tecnica = 'Clase técnica',
                          reduc_uni_sbordes = "Reduccion unifacial sin bordes",
                          las_inv_lim = "Lascado inverso limitante",
@@ -969,14 +1926,23 @@ class DetalleAdmin(sqla.ModelView):
 
     lista_sin_hibridos = [col for col in column_list if col != 'mod_ancho_espesor_pieza']
 
-    column_sortable_list = lista_sin_hibridos
+    column_sortable_list = lista_sin_hibridos + [
+        ('mod_ancho_espesor_pieza', 'razon_ancho_espesor')]
+
+    column_filters = lista_sin_hibridos + ['clase_tamano',
+                                           'razon_largo_ancho',
+                                           'razon_ancho_espesor']
 
-    column_filters = lista_sin_hibridos
+    column_choices = dict(clase_tamano = OPCIONES_TAMANO)
+
+    column_carga = ('artefacto', 'procedimientos')
 
     form_columns = lista_sin_hibridos
 
     can_export = True
 
+    cache_modelos = ('Detalle', 'Artefacto', 'Procedimiento2')
+
 
     def is_accessible(self):
         return login.current_user.is_authenticated
@@ -990,7 +1956,7 @@ class Procedimiento2Admin(sqla.ModelView):
 
     column_list = ['id', 'nombre']
 
-class DesechoAdmin(sqla.ModelView):
+class DesechoAdmin(CacheMixin, EdicionMasivaMixin, PaginacionMixin, VocabulariosMixin, BusquedaMixin, ExportacionMixin, sqla.ModelView):
     column_labels = dict(nombre = 'Nombre o etiqueta del desecho',
                          sitio = 'Sitio o Localidad',
                          sigla = 'Sigla del Sitio',
@@ -1025,40 +1991,615 @@ class DesechoAdmin(sqla.ModelView):
 
     column_sortable_list = column_list
 
-    column_filters = column_list
+    column_filters = list(column_list) + \
+        filtros_espaciales(Desecho.observacion_id, 'Ubicación de la observación')
+
+    column_searchable_list = ('nombre',)
 
     form_columns = column_list
 
     can_export = True
 
+    cache_modelos = ('Desecho', 'Observacion')
+
 
     def is_accessible(self):
         return login.current_user.is_authenticated
 
-class FotosDesechosView(sqla.ModelView):
-    def _list_thumbnail(view, context, model, name):
-        if not model.path:
-            return ''
-
-        return Markup('<img src="%s">' % url_for('static',
-        filename=formadmin.thumbgen_filename(model.path)))
-
+class FotosDesechosView(FotosMixin, sqla.ModelView):
     column_formatters = {
-        'path': _list_thumbnail
+        'path': _miniatura
     }
 
+    column_exclude_list = ['estado_derivados']
+
     # Alternative way to contribute field is to override it completely.
     # In this case, Flask-Admin won't attempt to merge various parameters for the field.
     form_extra_fields = {
-        'path': formadmin.ImageUploadField('Image',
-                                      base_path=file_path,
-                                      thumbnail_size=(100, 100, True))
+        'path': ImagenDiferidaField('Image', base_path=carpeta_fotos)
     }
 
+    form_excluded_columns = ['estado_derivados']
+
+    def is_accessible(self):
+        return login.current_user.is_authenticated
+
+# Comparison of lithic subsets
+SIN_DATO = 'Sin dato'
+
+_OBSERVACION_ARTEFACTO = (Observacion, Artefacto.observacion_id == Observacion.id)
+_OBSERVACION_DESECHO = (Observacion, Desecho.observacion_id == Observacion.id)
+_DETALLE_ARTEFACTO = (Detalle, Detalle.artefacto_id == Artefacto.id)
+
+CONJUNTOS = {
+    'artefactos': dict(
+        nombre='Artefactos',
+        modelo=Artefacto,
+        grupos=dict(
+            observacion=('Observación', Observacion.nombre, [_OBSERVACION_ARTEFACTO]),
+            capa=('Capa o nivel', Observacion.capa, [_OBSERVACION_ARTEFACTO]),
+            sitio=('Sitio o Localidad', Observacion.sitio, [_OBSERVACION_ARTEFACTO]),
+            roca=('Roca o materia prima', Artefacto.roca, [])),
+        variables=dict(
+            clase_tecnica=('Clase técnica', Artefacto.clase_tecnica, []),
+            forma_geo=('Forma geométrica', Artefacto.forma_geo, []),
+            clase_art=('Clase Artefactual', Artefacto.clase_art, []),
+            clasificacion_Forma_Base=('Tipo de forma base',
+                                      Artefacto.clasificacion_Forma_Base, []),
+            roca=('Roca o materia prima', Artefacto.roca, []),
+            tamano=('Tamano de la pieza', Artefacto.clase_tamano, []),
+            subgrupos=('Grupos y subgrupos (detalles)', Detalle.subgrupos,
+                       [_DETALLE_ARTEFACTO]))),
+    'desechos': dict(
+        nombre='Desechos de talla',
+        modelo=Desecho,
+        grupos=dict(
+            observacion=('Observación', Observacion.nombre, [_OBSERVACION_DESECHO]),
+            capa=('Capa o nivel', Desecho.capa, []),
+            sitio=('Sitio o Localidad', Desecho.sitio, [])),
+        variables=dict(
+            estado=('Estado', Desecho.estado, []),
+            sup_talon=('Superficie talon', Desecho.sup_talon, []),
+            tamano=('Tamano de la pieza', Desecho.clase_tamano, []))),
+}
+
+def _orden_valor(valor):
+    return (valor is None, valor.name if isinstance(valor, enum.Enum) else valor)
+
+def etiqueta_valor(valor, variable=None):
+    if valor is None:
+        return SIN_DATO
+    if isinstance(valor, enum.Enum):
+        return valor.name
+    if variable == 'tamano':
+        return TAMANOS[valor][1]
+    return str(valor)
+
+def condicion_grupos(columna, grupos):
+    """Condition selecting the pieces of the group labels `grupos` of
+    `columna`, SIN_DATO for the pieces without a value. Raises ValueError
+    for a label that is not a value of a vocabulary column."""
+    etiquetas = [g for g in grupos if g != SIN_DATO]
+    enums = getattr(columna.type, 'enums', None)
+    if enums is not None:
+        desconocidas = [g for g in etiquetas if g not in enums]
+        if desconocidas:
+            raise ValueError('grupos desconocidos: %s' % ', '.join(desconocidas))
+    else:
+        etiquetas = grupos
+    condicion = columna.in_(etiquetas)
+    if SIN_DATO in grupos:
+        condicion = or_(condicion, columna.is_(None))
+    return condicion
+
+def comparar_subconjuntos(conjunto, agrupar_por, variable, grupos=None,
+                          observaciones=None):
+    """Cross `variable` by `agrupar_por` for the pieces of `conjunto`.
+
+    The counts come from a single GROUP BY query; the contingency table,
+    chi-square test and diversity indices are computed with NumPy.
+    `grupos` optionally restricts the comparison to some group labels and
+    `observaciones` (ids or a select of ids) to the pieces of those
+    observaciones. Raises ValueError for an unknown group label.
+    """
+    definicion = CONJUNTOS[conjunto]
+    nombre_grupo, col_grupo, joins_grupo = definicion['grupos'][agrupar_por]
+    nombre_variable, col_variable, joins_variable = definicion['variables'][variable]
+    tipo_variable = col_variable.type
+
+    resumen = col_grupo.class_ is Observacion
+    if resumen:
+        # Groups that are attributes of the observación read the summary
+        query = db.session.query(col_grupo, Resumen.categoria,
+                                 func.sum(Resumen.cantidad)) \
+            .select_from(Resumen) \
+            .outerjoin(Observacion, Resumen.observacion_id == Observacion.id) \
+            .filter(Resumen.conjunto == conjunto,
+                    Resumen.variable == variable)
+        col_variable = Resumen.categoria
+        if observaciones is not None:
+            query = query.filter(Resumen.observacion_id.in_(observaciones))
+    else:
+        query = db.session.query(col_grupo, col_variable, func.count()) \
+            .select_from(definicion['modelo'])
+        for join in joins_grupo:
+            query = query.outerjoin(*join)
+        for join in joins_variable:
+            query = query.join(*join)
+        if observaciones is not None:
+            query = query.filter(
+                definicion['modelo'].observacion_id.in_(observaciones))
+    if grupos:
+        query = query.filter(condicion_grupos(col_grupo, grupos))
+    filas = query.group_by(col_grupo, col_variable).all()
+    if variable == 'tamano':
+        filas = [(g, None if c is None else int(c), n) for g, c, n in filas]
+    elif resumen and isinstance(tipo_variable, codigos.EnumEntero):
+        # The summary keeps the codes as text
+        filas = [(g, tipo_variable.process_result_value(c, None), n) for g, c, n in filas]
+
+    valores_grupo, valores_variable, tabla = \
+        estadistica.tabla_contingencia(filas, clave=_orden_valor)
+
+    return dict(conjunto=definicion['nombre'],
+                agrupar_por=nombre_grupo,
+                variable=nombre_variable,
+                grupos=[etiqueta_valor(g) for g in valores_grupo],
+                categorias=[etiqueta_valor(c, variable) for c in valores_variable],
+                tabla=tabla.tolist(),
+                totales_grupo=tabla.sum(axis=1).tolist(),
+                totales_categoria=tabla.sum(axis=0).tolist(),
+                total=int(tabla.sum()),
+                chi_cuadrado=estadistica.chi_cuadrado(tabla),
+                diversidad=estadistica.diversidad(tabla))
+
+def _en_observaciones(columna, observaciones):
+    ids = [i for i in observaciones if i is not None]
+    condicion = columna.in_(ids)
+    if None in observaciones:
+        condicion = or_(condicion, columna.is_(None))
+    return condicion
+
+def actualizar_resumen(conexion, observaciones=None, variables=None):
+    """Recompute the Resumen rows of the given observación ids, or of the
+    whole database when `observaciones` is None, with one
+    INSERT ... SELECT ... GROUP BY per variable. `variables`, pairs of
+    (conjunto, variable), limits it to those variables."""
+    tabla = Resumen.__table__
+    borrar = tabla.delete()
+    if observaciones is not None:
+        borrar = borrar.where(_en_observaciones(tabla.c.observacion_id,
+                                                observaciones))
+    if variables is not None:
+        borrar = borrar.where(or_(*[and_(tabla.c.conjunto == conjunto,
+                                         tabla.c.variable == variable)
+                                    for conjunto, variable in variables]))
+    conexion.execute(borrar)
+
+    columnas = ['observacion_id', 'conjunto', 'variable', 'categoria',
+                'cantidad', 'suma_largo', 'suma_ancho', 'suma_espesor']
+    for conjunto, definicion in CONJUNTOS.items():
+        modelo = definicion['modelo']
+        for variable, (nombre, columna, joins) in definicion['variables'].items():
+            if variables is not None and (conjunto, variable) not in variables:
+                continue
+            medidas = columna.class_
+            desde = modelo.__table__
+            for destino, condicion in joins:
+                desde = desde.join(destino.__table__, condicion)
+            consulta = select([modelo.observacion_id,
+                               literal(conjunto),
+                               literal(variable),
+                               cast(columna, String),
+                               func.count(),
+                               func.sum(medidas.long_pieza),
+                               func.sum(medidas.ancho_pieza),
+                               func.sum(medidas.espesor_pieza)]) \
+                .select_from(desde) \
+                .group_by(modelo.observacion_id, columna)
+            if observaciones is not None:
+                consulta = consulta.where(
+                    _en_observaciones(modelo.observacion_id, observaciones))
+            conexion.execute(tabla.insert().from_select(columnas, consulta))
+
+def _valores(objeto, atributo):
+    # Unset attributes have an empty history and mean NULL
+    return set(inspect(objeto).attrs[atributo].history.sum()) or set([None])
+
+# Summed with every variable of the summary
+MEDIDAS = ('long_pieza', 'ancho_pieza', 'espesor_pieza')
+
+def _dependencias_resumen():
+    """(conjunto, variable) -> {table: keys of the columns it reads}."""
+    dependencias = {}
+    for conjunto, definicion in CONJUNTOS.items():
+        for variable, (_, columna, joins) in definicion['variables'].items():
+            tablas = {definicion['modelo'].__table__: set(['observacion_id'])}
+            tablas.setdefault(columna.class_.__table__, set()) \
+                .update((columna.key,) + MEDIDAS)
+            for _, condicion in joins:
+                for lado in (condicion.left, condicion.right):
+                    tablas.setdefault(lado.table, set()).add(lado.key)
+            dependencias[conjunto, variable] = tablas
+    return dependencias
+
+DEPENDENCIAS_RESUMEN = _dependencias_resumen()
+
+def _cambiadas(objeto):
+    """Keys of the columns of `objeto` changed in this flush."""
+    estado = inspect(objeto)
+    claves = set()
+    for atributo in estado.attrs:
+        if atributo.history.has_changes():
+            propiedad = estado.mapper.attrs[atributo.key]
+            claves.update(columna.key for columna in getattr(
+                propiedad, 'local_columns', [propiedad]))
+    return claves
+
+@db.event.listens_for(db.session, 'after_flush')
+def _resumen_after_flush(session, flush_context):
+    observaciones = set()
+    artefactos = set()
+    variables = set()
+    for objeto in itertools.chain(session.new, session.dirty, session.deleted):
+        if not isinstance(objeto, (Artefacto, Desecho, Detalle)):
+            continue
+        tabla = type(objeto).__table__
+        if objeto in session.dirty:
+            cambiadas = _cambiadas(objeto)
+            afectadas = set(v for v, tablas in DEPENDENCIAS_RESUMEN.items()
+                            if cambiadas & tablas.get(tabla, set()))
+        else:
+            afectadas = set(v for v, tablas in DEPENDENCIAS_RESUMEN.items()
+                            if tabla in tablas)
+        if not afectadas:
+            continue
+        variables |= afectadas
+        if isinstance(objeto, Detalle):
+            artefactos |= _valores(objeto, 'artefacto_id')
+        else:
+            observaciones |= _valores(objeto, 'observacion_id')
+    artefactos.discard(None)
+    if artefactos:
+        observaciones.update(fila[0] for fila in session.execute(
+            select([Artefacto.observacion_id])
+            .where(Artefacto.id.in_(artefactos))))
+    if observaciones:
+        actualizar_resumen(session.connection(), observaciones, variables)
+
+class CambioMasivoView(sqla.ModelView):
+    """Read-only list of the bulk edits and deletes."""
+    can_create = False
+    can_edit = False
+    can_delete = False
+    can_view_details = True
+
+    column_labels = dict(fecha='Fecha', user='Usuario', accion='Acción', modelo='Tabla',
+                         campo='Campo', valor='Valor nuevo', alcance='Filas elegidas',
+                         filas='Filas', detalle='Detalle')
+    column_list = ('fecha', 'user', 'accion', 'modelo', 'campo', 'valor', 'alcance', 'filas')
+    column_filters = ('fecha', 'accion', 'modelo', 'campo')
+    column_default_sort = ('fecha', True)
+
+    def is_accessible(self):
+        return login.current_user.is_authenticated
+
+class AnalisisView(CacheMixin, admin.BaseView):
+    """Contingency tables, chi-square and diversity between subsets."""
+    cache_vistas = ('index', 'json', 'observaciones')
+    cache_modelos = ('Artefacto', 'Detalle', 'Desecho', 'Observacion', 'Resumen')
+
+    def _parametros(self):
+        conjunto = request.args.get('conjunto', 'artefactos')
+        if conjunto not in CONJUNTOS:
+            abort(400)
+        definicion = CONJUNTOS[conjunto]
+        agrupar_por = request.args.get('agrupar_por', 'observacion')
+        variable = request.args.get('variable', 'clase_tecnica')
+        if agrupar_por not in definicion['grupos']:
+            agrupar_por = 'observacion'
+        if variable not in definicion['variables']:
+            variable = next(iter(definicion['variables']))
+        grupos = [g for g in request.args.getlist('grupo') if g]
+        return conjunto, agrupar_por, variable, grupos, self._area()
+
+    def _area(self):
+        try:
+            return area_consultada(request.args)
+        except (TypeError, ValueError):
+            abort(400)
+
+    @expose('/')
+    def index(self):
+        conjunto, agrupar_por, variable, grupos, area = self._parametros()
+        return self.render('admin/analisis.html',
+                           conjuntos=CONJUNTOS,
+                           conjunto=conjunto,
+                           agrupar_por=agrupar_por,
+                           variable=variable,
+                           grupos=grupos,
+                           resultado=self._comparar(
+                               conjunto, agrupar_por, variable, grupos, area))
+
+    @expose('/json')
+    def json(self):
+        return jsonify(self._comparar(*self._parametros()))
+
+    def _comparar(self, *parametros):
+        try:
+            return comparar_subconjuntos(*parametros)
+        except ValueError:
+            abort(400)
+
+    @expose('/observaciones')
+    def observaciones(self):
+        """The observaciones of the requested box or radius, nearest first."""
+        area = self._area()
+        if area is None:
+            abort(400)
+        latitud = request.args.get('lat', type=float)
+        longitud = request.args.get('lon', type=float)
+        filas = db.session.query(Observacion.id, Observacion.nombre,
+                                 Observacion.sitio, Observacion.capa,
+                                 Observacion.latitud, Observacion.longitud) \
+            .filter(Observacion.id.in_(area)).all()
+        resultado = [dict(id=f.id, nombre=f.nombre, sitio=f.sitio, capa=f.capa,
+                          latitud=f.latitud, longitud=f.longitud,
+                          distancia_km=espacial.distancia_km(
+                              latitud, longitud, f.latitud, f.longitud))
+                     for f in filas]
+        resultado.sort(key=lambda o: (o['distancia_km'] is None,
+                                      o['distancia_km'], o['nombre'] or ''))
+        return jsonify(observaciones=resultado)
+
+    def is_accessible(self):
+        return login.current_user.is_authenticated
+
+# Bulk import of field spreadsheets
+IMPORTABLES = dict(artefactos=Artefacto, detalles=Detalle, desechos=Desecho)
+
+METRICAS = ('clase_tamano', 'razon_largo_ancho', 'razon_ancho_espesor')
+
+def _ids_por_nombre(columna):
+    """Lookup of normalized names, and ids as text, to ids."""
+    ids = {}
+    filas = db.session.query(columna.class_.id, columna) \
+        .order_by(columna.class_.id).all()
+    for id, nombre in filas:
+        if nombre:
+            ids.setdefault(importacion.normalizar(nombre), id)
+    for id, nombre in filas:
+        ids.setdefault(str(id), id)
+    return ids
+
+def importar_planilla(archivo, nombre, conjunto, observacion_id=None):
+    """Import a CSV or XLSX file of `conjunto` in a single transaction.
+
+    Rows that fail validation are skipped and listed in the returned
+    importacion.Resultado; `observacion_id` assigns every artefacto or
+    desecho to that observación.
+    """
+    modelo = IMPORTABLES[conjunto]
+    fijos = {}
+    if modelo is Detalle:
+        clave = 'artefacto_id'
+        referencias = dict(artefacto=(clave, _ids_por_nombre(Artefacto.nombre)))
+    else:
+        clave = 'observacion_id'
+        referencias = dict(observacion=(clave, _ids_por_nombre(Observacion.nombre)))
+        if observacion_id:
+            fijos[clave] = observacion_id
+    importador = importacion.Importador(modelo, referencias, excluir=METRICAS)
+    padres = set()
+
+    def completar(lote):
+        metricas = metricas_piezas([fila.get('long_pieza') for fila in lote],
+                                   [fila.get('ancho_pieza') for fila in lote],
+                                   [fila.get('espesor_pieza') for fila in lote])
+        for i, fila in enumerate(lote):
+            for metrica in METRICAS:
+                fila[metrica] = metricas[metrica][i]
+            padres.add(fila.get(clave))
+
+    conexion = db.session.connection()
+    try:
+        resultado = importador.importar(
+            conexion, importacion.leer_planilla(archivo, nombre),
+            fijos=fijos, completar=completar)
+        if modelo is Detalle:
+            ids = [i for i in padres if i is not None]
+            observaciones = set(fila[0] for fila in conexion.execute(
+                select([Artefacto.observacion_id])
+                .where(Artefacto.id.in_(ids))))
+        else:
+            observaciones = padres
+        if observaciones:
+            actualizar_resumen(conexion, observaciones)
+        # Rows inserted without the ORM, that records the other writes
+        cache.invalidar(conexion, [modelo.__name__])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return resultado
+
+# Bulk edits and deletes, see masivo
+
+@contextlib.contextmanager
+def _escritura():
+    with db.engine.begin() as conexion:
+        if conexion.dialect.name == 'sqlite':
+            # Take the write lock before reading the rows to change;
+            # pysqlite would only open the transaction at the first write
+            conexion.execute('BEGIN IMMEDIATE')
+        yield conexion
+    with _CONTEOS_LOCK:
+        _CONTEOS.clear()
+
+def _observaciones_de(conexion, modelo, ids):
+    """Ids of the observaciones of the rows of `modelo` selected by `ids`."""
+    if modelo is Detalle:
+        ids = select([Detalle.artefacto_id]).where(Detalle.id.in_(ids))
+        modelo = Artefacto
+    return set(fila[0] for fila in conexion.execute(
+        select([modelo.observacion_id]).where(modelo.id.in_(ids)).distinct()))
+
+def _auditar(conexion, accion, modelo, filas, detalle, usuario=None, alcance=None,
+             campo=None, valor=None):
+    if isinstance(valor, enum.Enum):
+        valor = valor.name
+    conexion.execute(CambioMasivo.__table__.insert().values(
+        fecha=datetime.datetime.utcnow(), user_id=usuario, accion=accion,
+        modelo=modelo.__name__, campo=campo, valor=None if valor is None else str(valor),
+        alcance=alcance, filas=filas,
+        detalle=api.volcar(detalle)))
+
+def editar_en_bloque(modelo, ids, campo, valor, usuario=None, alcance=None):
+    """Set column `campo` to `valor` on the rows of `modelo` selected by the
+    query of ids `ids`, with a single UPDATE that also recomputes the
+    stored metrics of a changed measurement. The summary of the affected
+    observaciones is rebuilt and the previous values are kept in a
+    CambioMasivo, all in one transaction. Returns the rows changed."""
+    tabla = modelo.__table__
+    columna = inspect(modelo).columns[campo]
+    valores = {columna: valor}
+    if campo in MEDIDAS:
+        medidas = dict((nombre, inspect(modelo).columns[nombre]) for nombre in MEDIDAS)
+        medidas[campo] = literal(valor, columna.type)
+        valores.update({
+            tabla.c.clase_tamano: sql_codigo_tamano(medidas['long_pieza'],
+                                                    medidas['ancho_pieza']),
+            tabla.c.razon_largo_ancho: sql_cociente(medidas['long_pieza'],
+                                                    medidas['ancho_pieza']),
+            tabla.c.razon_ancho_espesor: sql_cociente(medidas['ancho_pieza'],
+                                                      medidas['espesor_pieza'])})
+    with _escritura() as conexion, masivo.seleccion(conexion, ids) as seleccion:
+        anteriores = {}
+        for id, anterior in conexion.execute(
+                select([tabla.c.id, columna]).where(tabla.c.id.in_(seleccion))):
+            anteriores.setdefault(anterior, []).append(id)
+        filas = conexion.execute(
+            tabla.update().where(tabla.c.id.in_(seleccion)).values(valores)).rowcount
+        # The summarized variables of this column, or all those of the
+        # model when its measurements, summed with every variable, change
+        variables = set((conjunto, variable) for conjunto, definicion in CONJUNTOS.items()
+                        for variable, (_, columna_variable, _) in definicion['variables'].items()
+                        if columna_variable.class_ is modelo and
+                        (columna_variable.key == campo or campo in MEDIDAS))
+        observaciones = _observaciones_de(conexion, modelo, seleccion) if variables else None
+        if observaciones:
+            actualizar_resumen(conexion, observaciones, variables)
+        cache.invalidar(conexion, [modelo.__name__])
+        _auditar(conexion, 'editar', modelo, filas,
+                 dict(anteriores=[[v, ids] for v, ids in anteriores.items()]),
+                 usuario, alcance, campo, valor)
+    return filas
+
+def borrar_en_bloque(modelo, ids, usuario=None, alcance=None):
+    """Delete the rows of `modelo` selected by the query of ids `ids` with
+    their detalles, procedimientos and fotos, one DELETE per table, and
+    rebuild the summary of their observaciones in the same transaction.
+    The photo files stay in the store. Returns the rows deleted per model."""
+    with _escritura() as conexion, masivo.seleccion(conexion, ids) as seleccion:
+        borrados = [fila[0] for fila in conexion.execute(seleccion)]
+        observaciones = _observaciones_de(conexion, modelo, seleccion)
+        # The queued derivatives of the deleted photos
+        trabajos = TrabajoImagen.__table__
+        for hijo, condicion in masivo.dependientes(modelo, seleccion):
+            for tipo in [t for t, fotos in FOTOS.items() if fotos is hijo]:
+                conexion.execute(trabajos.delete().where(trabajos.c.tipo == tipo).where(
+                    trabajos.c.foto_id.in_(select([hijo.id]).where(condicion))))
+        borradas = masivo.borrar(conexion, modelo, seleccion)
+        variables = set((conjunto, variable) for conjunto, definicion in CONJUNTOS.items()
+                        for variable, (_, columna, _) in definicion['variables'].items()
+                        if borradas.get(definicion['modelo'].__name__) or
+                        borradas.get(columna.class_.__name__))
+        if observaciones and variables:
+            actualizar_resumen(conexion, observaciones, variables)
+        cache.invalidar(conexion, list(borradas))
+        _auditar(conexion, 'borrar', modelo, borradas[modelo.__name__],
+                 dict(ids=borrados, borradas=borradas), usuario, alcance)
+    return borradas
+
+class ImportacionForm(form.Form):
+    archivo = fields.FileField('Planilla (CSV o XLSX)',
+                               validators=[validators.required()])
+    conjunto = fields.SelectField('Tipo de piezas', choices=[
+        ('artefactos', 'Artefactos'),
+        ('detalles', 'Detalles'),
+        ('desechos', 'Desechos de talla')])
+    observacion = fields.SelectField('Observación', coerce=int)
+
+class ImportacionView(admin.BaseView):
+    """Upload a spreadsheet of artefactos, detalles or desechos."""
+
+    @expose('/', methods=('GET', 'POST'))
+    def index(self):
+        form = ImportacionForm(CombinedMultiDict((request.files, request.form)))
+        form.observacion.choices = [(0, 'Según la planilla')] + \
+            db.session.query(Observacion.id, Observacion.nombre) \
+            .order_by(Observacion.nombre).all()
+        resultado = error = None
+        if helpers.validate_form_on_submit(form):
+            try:
+                resultado = importar_planilla(form.archivo.data.stream,
+                                              form.archivo.data.filename,
+                                              form.conjunto.data,
+                                              form.observacion.data or None)
+            except importacion.ErrorImportacion as e:
+                error = str(e)
+        return self.render('admin/importacion.html', form=form,
+                           resultado=resultado, error=error)
+
     def is_accessible(self):
         return login.current_user.is_authenticated
 
 # Create customized model view class
+class BusquedaView(admin.BaseView):
+    """Search observaciones, artefactos and desechos at once."""
+
+    def _resultados(self):
+        texto = request.args.get('q', '')
+        limite = max(1, min(request.args.get('limite', 50, type=int), 500))
+        tipos = [t for t in request.args.getlist('tipo') if t in MODELOS_BUSQUEDA]
+        resultados = buscar(texto, limite, tipos) if busqueda_disponible() else []
+        for resultado in resultados:
+            resultado['url'] = url_for('%s.edit_view' % resultado['tipo'],
+                                       id=resultado['id'])
+        return texto, resultados
+
+    @expose('/')
+    def index(self):
+        texto, resultados = self._resultados()
+        return self.render('admin/busqueda.html', texto=texto,
+                           resultados=resultados)
+
+    @expose('/json')
+    def json(self):
+        texto, resultados = self._resultados()
+        return jsonify(consulta=texto, resultados=resultados)
+
+    def is_accessible(self):
+        return login.current_user.is_authenticated
+
+class RendimientoView(admin.BaseView):
+    """Latency and SQL statements per endpoint, and the slowest statements."""
+
+    @expose('/')
+    def index(self):
+        registro = current_app.extensions['instrumentacion']
+        paginas = current_app.extensions.get('cache')
+        return self.render('admin/rendimiento.html',
+                           endpoints=registro.resumen(),
+                           lentas=registro.sentencias_lentas(),
+                           lenta=registro.lenta,
+                           desde=datetime.datetime.fromtimestamp(registro.inicio),
+                           cache=paginas and paginas.resumen(),
+                           cache_tamano=paginas and paginas.almacen.tamano())
+
+    def is_accessible(self):
+        return login.current_user.is_authenticated
+
 class MyModelView(sqla.ModelView):
 
     def is_accessible(self):
@@ -1116,31 +2657,316 @@ class MyAdminIndexView(admin.AdminIndexView):
 
 
 # Create admin
-admin = admin.Admin(app, 'ARQcheros', index_view=MyAdminIndexView(), base_template='my_master.html')
-
-# Add view
-#admin.add_view(MyModelView(User, db.session))
-admin.add_view(ObservacionAdmin(Observacion, db.session))
-admin.add_view(ArtefactoAdmin(Artefacto, db.session))
-admin.add_view(ProcedimientoAdmin(Procedimiento, db.session))
-admin.add_view(Procedimiento2Admin(Procedimiento2, db.session))
-admin.add_view(FotosArtefactosView(FotosArtefactos, db.session))
-admin.add_view(DetalleAdmin(Detalle, db.session))
-admin.add_view(DesechoAdmin(Desecho, db.session))
-admin.add_view(FotosDesechosView(FotosDesechos, db.session))
-
+def registrar_admin(app):
+    """Build the admin UI of `app`, once."""
+    if app.extensions.get('admin'):
+        return app.extensions['admin'][0]
+    panel = admin.Admin(app, 'ARQcheros', index_view=MyAdminIndexView(), base_template='my_master.html')
+
+    # Add view
+    #panel.add_view(MyModelView(User, db.session))
+    panel.add_view(ObservacionAdmin(Observacion, db.session))
+    panel.add_view(ArtefactoAdmin(Artefacto, db.session))
+    panel.add_view(ProcedimientoAdmin(Procedimiento, db.session))
+    panel.add_view(Procedimiento2Admin(Procedimiento2, db.session))
+    panel.add_view(FotosArtefactosView(FotosArtefactos, db.session))
+    panel.add_view(DetalleAdmin(Detalle, db.session))
+    panel.add_view(DesechoAdmin(Desecho, db.session))
+    panel.add_view(FotosDesechosView(FotosDesechos, db.session))
+    panel.add_view(CambioMasivoView(CambioMasivo, db.session, name='Cambios en bloque'))
+    panel.add_view(AnalisisView(name='Análisis', endpoint='analisis'))
+    panel.add_view(ImportacionView(name='Importar', endpoint='importacion'))
+    panel.add_view(BusquedaView(name='Buscar', endpoint='busqueda'))
+    if 'instrumentacion' in app.extensions:
+        panel.add_view(RendimientoView(name='Rendimiento', endpoint='rendimiento'))
+    return panel
+
+class _AdminDiferido(object):
+    """WSGI wrapper that builds the admin UI before the first request, so
+    that CLI commands and scripts never pay for it."""
+
+    def __init__(self, app, wsgi_app):
+        self.app = app
+        self.wsgi_app = wsgi_app
+        self.lock = threading.Lock()
+        self.listo = False
+
+    def __call__(self, environ, start_response):
+        if not self.listo:
+            with self.lock:
+                if not self.listo:
+                    registrar_admin(self.app)
+                    self.listo = True
+        return self.wsgi_app(environ, start_response)
+
+
+# Schema upgrades and maintenance commands
+def migrar_esquema(avance=None):
+    """Create missing tables, columns and indexes on an existing database,
+    and store the vocabulary columns still holding names as codes."""
+    db.create_all()
+    nuevos_indices = False
+    with db.engine.begin() as conexion:
+        inspector = inspect(conexion)
+        for tabla in db.metadata.sorted_tables:
+            columnas = set(c['name'] for c in inspector.get_columns(tabla.name))
+            for columna in tabla.columns:
+                if columna.name not in columnas:
+                    conexion.execute('ALTER TABLE "%s" ADD COLUMN "%s" %s' % (
+                        tabla.name, columna.name,
+                        columna.type.compile(dialect=conexion.dialect)))
+            indices = set(i['name'] for i in inspector.get_indexes(tabla.name))
+            for indice in tabla.indexes:
+                if indice.name not in indices:
+                    indice.create(conexion)
+                    nuevos_indices = True
+        crear_busqueda(conexion)
+        crear_indice_espacial(conexion)
+        for tabla in TABLAS_VOCABULARIO.values():
+            codigos.sincronizar(conexion, tabla)
+        if nuevos_indices and conexion.dialect.name == 'sqlite':
+            # Give the query planner statistics for the new indexes
+            conexion.execute('ANALYZE')
+    if migrar_vocabularios(avance=avance):
+        # The summary keeps the categories as codes too
+        reconstruir_resumen()
+        db.engine.execute('ANALYZE')
+
+def _recrear_triggers(conexion):
+    crear_busqueda(conexion)
+    crear_indice_espacial(conexion)
+
+def migrar_vocabularios(lote=5000, avance=None):
+    """Rewrite, online, the tables whose vocabulary columns store names;
+    see codigos.migrar_tabla. Returns the names of the tables rewritten."""
+    if db.engine.dialect.name != 'sqlite':
+        return []
+    migradas = []
+    for tabla in db.metadata.sorted_tables:
+        copiadas = codigos.migrar_tabla(db.engine, tabla, TABLAS_VOCABULARIO, lote,
+                                        avance, despues=_recrear_triggers)
+        if copiadas is not None:
+            migradas.append(tabla.name)
+    return migradas
+
+def recalcular_metricas():
+    """Fill the stored metrics of every row with one UPDATE per table."""
+    for modelo in MODELOS_CON_METRICAS:
+        db.session.query(modelo).update({
+            modelo.clase_tamano: sql_codigo_tamano(modelo.long_pieza,
+                                                   modelo.ancho_pieza),
+            modelo.razon_largo_ancho: sql_cociente(modelo.long_pieza,
+                                                   modelo.ancho_pieza),
+            modelo.razon_ancho_espesor: sql_cociente(modelo.ancho_pieza,
+                                                     modelo.espesor_pieza),
+        }, synchronize_session=False)
+    db.session.commit()
+
+MODELOS_SINTETICOS = dict(
+    observacion=Observacion, artefacto=Artefacto, detalle=Detalle, desecho=Desecho,
+    procedimiento=Procedimiento, procedimiento2=Procedimiento2,
+    fotos_artefactos=FotosArtefactos, fotos_desechos=FotosDesechos)
+
+def generar_datos(artefactos, semilla=0, avance=None):
+    """Add a synthetic collection, see sinteticos, with its metrics and summary."""
+    db.create_all()
+    with db.engine.begin() as conexion:
+        ids = sinteticos.generar(conexion, MODELOS_SINTETICOS, artefactos,
+                                 semilla, avance=avance)
+        cache.invalidar(conexion, [modelo.__name__ for modelo in MODELOS_SINTETICOS.values()])
+    recalcular_metricas()
+    reconstruir_resumen()
+    return ids
+
+def build_sample_db(artefactos=2000, semilla=0):
+    """Fill a new database with a small synthetic collection."""
+    return generar_datos(artefactos, semilla)
+
+# Command line, added to the application by create_app
+comandos = AppGroup('arqcheros')
+
+@comandos.command('importar')
+@click.argument('archivo', type=click.Path(exists=True, dir_okay=False))
+@click.option('--conjunto', type=click.Choice(sorted(IMPORTABLES)),
+              default='artefactos', show_default=True)
+@click.option('--observacion',
+              help='Nombre de la observación de todas las filas.')
+def importar_command(archivo, conjunto, observacion):
+    """Import a CSV or XLSX spreadsheet of pieces."""
+    observacion_id = None
+    if observacion:
+        observacion_id = _ids_por_nombre(Observacion.nombre).get(
+            importacion.normalizar(observacion))
+        if observacion_id is None:
+            raise click.BadParameter('no existe la observación %r' % observacion)
+    with open(archivo, 'rb') as planilla:
+        resultado = importar_planilla(planilla, archivo, conjunto, observacion_id)
+    for columna in resultado.columnas_ignoradas:
+        click.echo('Columna ignorada: %s' % columna, err=True)
+    for numero, mensaje in resultado.errores:
+        click.echo('Fila %d: %s' % (numero, mensaje), err=True)
+    click.echo('%d filas importadas, %d con errores.' % (
+        resultado.insertadas, len(resultado.errores)))
+
+@comandos.command('generar-datos')
+@click.option('--artefactos', type=int, default=10000, show_default=True,
+              help='Cantidad de artefactos; las demás tablas crecen en proporción.')
+@click.option('--semilla', type=int, default=0, show_default=True)
+def generar_datos_command(artefactos, semilla):
+    """Add a reproducible synthetic collection to the database."""
+    migrar_esquema()
+    ids = generar_datos(artefactos, semilla,
+                        avance=lambda tabla, n: click.echo('%s: %d' % (tabla, n), err=True))
+    for tabla, rango in ids.items():
+        click.echo('%s: %d filas' % (tabla, len(rango)))
+
+@comandos.command('migrar')
+def migrar_command():
+    """Create the tables, columns and indexes missing from the database."""
+    migrar_esquema(avance=lambda tabla, n: click.echo('%s: %d' % (tabla, n), err=True))
+    click.echo('Esquema actualizado.')
+
+def reconstruir_resumen():
+    with db.engine.begin() as conexion:
+        actualizar_resumen(conexion)
+        cache.invalidar(conexion, [Resumen.__name__])
+
+@comandos.command('reconstruir-resumen')
+def reconstruir_resumen_command():
+    """Rebuild the per-observación summary tables from scratch."""
+    migrar_esquema()
+    reconstruir_resumen()
+    click.echo('Resumen reconstruido.')
+
+@comandos.command('reconstruir-busqueda')
+def reconstruir_busqueda_command():
+    """Rebuild the full-text search index from scratch."""
+    with db.engine.begin() as conexion:
+        crear_busqueda(conexion, repoblar=True)
+    click.echo('Índice de búsqueda reconstruido.')
+
+def migrar_fotos():
+    """Move the photos stored by filename into the content-addressed store.
+
+    Rows that shared a file keep sharing it; the derivatives are queued
+    again under the new names. Returns the number of files moved and
+    the paths whose file is missing.
+    """
+    carpeta = carpeta_fotos()
+    movidas, faltantes = {}, set()
+    for modelo in FOTOS.values():
+        for foto in modelo.query.filter(modelo.path != None).all():
+            if almacen.es_direccionada(foto.path) or foto.path in faltantes:
+                continue
+            if foto.path not in movidas:
+                origen = op.join(carpeta, foto.path)
+                if not op.exists(origen):
+                    faltantes.add(foto.path)
+                    continue
+                with open(origen, 'rb') as archivo:
+                    movidas[foto.path] = almacen.guardar(carpeta, archivo,
+                                                         foto.path)[0]
+            foto.path = movidas[foto.path]
+    db.session.commit()
+
+    for anterior in movidas:
+        for path in (anterior, formadmin.thumbgen_filename(anterior)):
+            if op.exists(op.join(carpeta, path)):
+                os.remove(op.join(carpeta, path))
+        derivados.borrar(carpeta, anterior)
+    return len(movidas), sorted(faltantes)
+
+@comandos.command('migrar-fotos')
+def migrar_fotos_command():
+    """Move stored photos into the content-addressed store."""
+    movidas, faltantes = migrar_fotos()
+    for path in faltantes:
+        click.echo('Falta el archivo %s' % path, err=True)
+    click.echo('%d archivos movidos. Los derivados se generan con '
+               '`flask procesar-imagenes`.' % movidas)
+
+@comandos.command('procesar-imagenes')
+@click.option('--todas', is_flag=True,
+              help='Regenerar también las fotos cargadas antes de la cola.')
+def procesar_imagenes_command(todas):
+    """Build the pending photo derivatives in the foreground."""
+    if todas:
+        for modelo in FOTOS.values():
+            for foto in modelo.query.filter(modelo.path != None,
+                                            modelo.estado_derivados == None).all():
+                foto.estado_derivados = 'pendiente'
+                db.session.add(TrabajoImagen(tipo=next(
+                    t for t, m in FOTOS.items() if m is modelo),
+                    foto_id=foto.id, path=foto.path))
+        db.session.commit()
+    reanudar_trabajos_imagen()
+    cantidad = 0
+    while procesar_trabajo_imagen():
+        cantidad += 1
+    click.echo('%d imágenes procesadas.' % cantidad)
+
+@comandos.command('recalcular-metricas')
+def recalcular_metricas_command():
+    """Add the stored metric columns to an existing database and fill them."""
+    migrar_esquema()
+    recalcular_metricas()
+    reconstruir_resumen()
+    click.echo('Métricas recalculadas.')
 
 
-if __name__ == '__main__':
+# Create Flask application
+def create_app(config=None):
+    """Application factory.
+
+    `config` is the name of a profile or a dict of settings applied over
+    the ARQCHEROS_PERFIL profile, see configuracion. The admin UI is
+    built on the first request; call registrar_admin to build it earlier.
+    """
+    app = Flask(__name__)
+    if isinstance(config, str):
+        configuracion.cargar(app.config, perfil=config)
+    else:
+        configuracion.cargar(app.config, ajustes=config)
+    db.init_app(app)
+    login_manager.init_app(app)
 
-    # Build a sample db on the fly, if one does not exist yet.
-    app_dir = os.path.realpath(os.path.dirname(__file__))
-    database_path = os.path.join(app_dir, app.config['DATABASE_FILE'])
-    if not os.path.exists(database_path):
-        build_sample_db()
+    # Create directory for file fields to use
+    os.makedirs(app.config['FOTOS_DIR'], exist_ok=True)
+
+    app.add_url_rule('/', 'index', index)
+    app.add_url_rule('/imagenes/<path:filename>', 'foto', foto)
+    app.add_url_rule('/api/vocabularios', 'api_vocabularios', api_vocabularios)
+    app.add_url_rule('/api/<recurso>', 'api_lista', api_lista)
+    app.add_url_rule('/api/<recurso>/<int:id>', 'api_fila', api_fila)
+    if app.config['METRICAS']:
+        instrumentacion.instalar(app, app.config['METRICAS_LENTA'],
+                                 app.config['METRICAS_MUESTRAS'])
+        app.add_url_rule('/metrics', 'metricas', exponer_metricas)
+    if app.config['CACHE']:
+        cache.instalar(app, app.config['CACHE_ENTRADAS'], app.config['CACHE_BYTES'],
+                       app.config['CACHE_REDIS_URL'], app.config['CACHE_TTL'])
+    for comando in comandos.commands.values():
+        app.cli.add_command(comando)
+
+    app.extensions['trabajadores_imagen'] = _trabajadores_imagen(app)
+    app.before_first_request(_iniciar_trabajadores)
+    app.wsgi_app = _AdminDiferido(app, app.wsgi_app)
+    return app
 
-     # Create db
-    db.create_all()
 
-    # Run app
-    app.run(debug=True)
+if __name__ == '__main__':
+    app = create_app()
+    with app.app_context():
+        # Build a sample db on the fly, if one does not exist yet.
+        app_dir = os.path.realpath(os.path.dirname(__file__))
+        database_path = os.path.join(app_dir, app.config['DATABASE_FILE'])
+        if not os.path.exists(database_path):
+            build_sample_db()
+
+         # Create db
+        migrar_esquema()
+        if not Resumen.query.first():
+            reconstruir_resumen()
+
+    # Run app; in production use a WSGI server on wsgi.py instead
+    app.run(debug=app.config['DEBUG'])
@@ -0,0 +1,114 @@
+# -*- encoding: utf-8 -*-
+"""SQLite connection settings: pragmas and connection pool.
+
+In WAL mode readers keep working while a writer commits, instead of
+waiting for it; with ``synchronous = NORMAL`` a commit no longer waits
+for the disk, at the risk of losing the last transactions (never of
+corrupting the file) if the machine loses power.
+"""
+import contextlib
+
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.pool import NullPool, QueuePool, SingletonThreadPool
+
+import codigos
+
+PRAGMAS = dict(
+    journal_mode='WAL',
+    synchronous='NORMAL',
+    # Negative sizes are in KiB: 64 MiB per connection
+    cache_size=-65536,
+    mmap_size=256 * 1024 * 1024,
+    busy_timeout=10000,
+    temp_store='MEMORY',
+)
+
+# 'cola' shares a few connections among all threads, 'hilo' keeps one
+# per thread and 'ninguno' opens one per request, for servers that fork
+POOLS = dict(cola=QueuePool, hilo=SingletonThreadPool, ninguno=NullPool)
+
+
+def opciones_pool(pool='cola', tamano=5):
+    """create_engine options for a SQLite file with the given pool."""
+    if pool not in POOLS:
+        raise ValueError('Pool desconocido: %s (%s)' % (pool, ', '.join(POOLS)))
+    opciones = dict(poolclass=POOLS[pool])
+    if pool == 'cola':
+        opciones.update(pool_size=tamano, max_overflow=2 * tamano,
+                        connect_args=dict(check_same_thread=False))
+    elif pool == 'hilo':
+        opciones.update(pool_size=tamano)
+    return opciones
+
+
+def configurar(engine, pragmas=None):
+    """Set `pragmas`, on top of PRAGMAS, on every new connection of a
+    SQLite `engine`. A pragma set to None keeps the SQLite default."""
+    if engine.dialect.name != 'sqlite':
+        return engine
+    pragmas = dict(PRAGMAS, **(pragmas or {}))
+
+    @event.listens_for(engine, 'connect')
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for nombre, valor in pragmas.items():
+            if valor is not None:
+                cursor.execute('PRAGMA %s = %s' % (nombre, valor))
+        cursor.close()
+
+    return engine
+
+
+class Consultas(list):
+    """Statements run inside a contar_consultas block."""
+
+    @property
+    def total(self):
+        return len(self)
+
+
+@contextlib.contextmanager
+def contar_consultas(engine, maximo=None):
+    """Record the statements `engine` runs inside the block; with
+    `maximo`, raise AssertionError listing them if there were more.
+
+        with contar_consultas(db.engine, maximo=3) as consultas:
+            cliente.get('/admin/artefacto/?page_size=100')
+    """
+    consultas = Consultas()
+
+    def _anotar(conn, cursor, statement, parameters, context, executemany):
+        consultas.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', _anotar)
+    try:
+        yield consultas
+    finally:
+        event.remove(engine, 'before_cursor_execute', _anotar)
+    if maximo is not None and consultas.total > maximo:
+        raise AssertionError('%d consultas, se esperaban a lo sumo %d:\n%s'
+                             % (consultas.total, maximo, '\n'.join(consultas)))
+
+
+def en_memoria(sa_url):
+    return sa_url.database in (None, '', ':memory:')
+
+
+class BaseDatos(SQLAlchemy):
+    """Flask-SQLAlchemy taking the SQLite pool and pragmas from the
+    SQLITE_POOL, SQLITE_POOL_TAMANO and SQLITE_PRAGMAS settings, with
+    the EnumEntero column type next to the SQLAlchemy ones."""
+
+    EnumEntero = codigos.EnumEntero
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        sa_url, options = super(BaseDatos, self).apply_driver_hacks(app, sa_url, options)
+        if sa_url.drivername == 'sqlite' and not en_memoria(sa_url):
+            options.update(opciones_pool(app.config.get('SQLITE_POOL', 'cola'),
+                                         app.config.get('SQLITE_POOL_TAMANO', 5)))
+        return sa_url, options
+
+    def create_engine(self, sa_url, engine_opts):
+        engine = super(BaseDatos, self).create_engine(sa_url, engine_opts)
+        return configurar(engine, self.get_app().config.get('SQLITE_PRAGMAS'))
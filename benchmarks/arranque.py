@@ -0,0 +1,68 @@
+# -*- encoding: utf-8 -*-
+"""Startup time of a fresh interpreter: importing the models, creating
+the application (what CLI commands and importers pay) and building the
+admin UI on the first request.
+
+    python benchmarks/arranque.py [--repeticiones 5]
+"""
+import argparse
+import os
+import os.path as op
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = op.dirname(op.dirname(op.abspath(__file__)))
+
+ETAPAS = [
+    ('Importar los modelos', 'import arqcheros'),
+    ('create_app()', 'app = arqcheros.create_app()'),
+    ('Construir el admin', 'arqcheros.registrar_admin(app)'),
+    ('Primer pedido a /admin/', "app.test_client().get('/admin/')"),
+]
+
+# Runs the stages in order and prints the elapsed seconds after each one
+PROGRAMA = '''
+import sys, time
+sys.path.insert(0, %r)
+inicio = time.perf_counter()
+%s
+'''
+
+
+def medir(entorno):
+    codigo = '\n'.join('%s\nprint(time.perf_counter() - inicio)' % etapa
+                       for _, etapa in ETAPAS)
+    salida = subprocess.run([sys.executable, '-c', PROGRAMA % (RAIZ, codigo)],
+                            env=entorno, check=True, capture_output=True,
+                            text=True).stdout
+    return [float(linea) * 1000 for linea in salida.split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        entorno = dict(os.environ,
+                       ARQCHEROS_PERFIL='prod', ARQCHEROS_SECRET_KEY='benchmark',
+                       ARQCHEROS_METRICAS_TOKEN='benchmark',
+                       ARQCHEROS_SQLALCHEMY_DATABASE_URI='sqlite:///' + op.join(directorio, 'bench.sqlite'),
+                       ARQCHEROS_FOTOS_DIR=op.join(directorio, 'fotos'),
+                       ARQCHEROS_IMAGENES_HILOS='0')
+        # The first run fills the bytecode caches
+        medir(entorno)
+        tiempos = list(zip(*[medir(entorno) for _ in range(args.repeticiones)]))
+
+    print('%-28s %12s %12s' % ('Etapa (mediana, ms)', 'etapa', 'acumulado'))
+    anterior = 0
+    for (nombre, _), acumulados in zip(ETAPAS, tiempos):
+        acumulado = statistics.median(acumulados)
+        print('%-28s %12.1f %12.1f' % (nombre, acumulado - anterior, acumulado))
+        anterior = acumulado
+
+
+if __name__ == '__main__':
+    main()
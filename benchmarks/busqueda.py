@@ -0,0 +1,92 @@
+# -*- encoding: utf-8 -*-
+"""Search latency on a synthetic collection: LIKE scans against the
+FTS5 index.
+
+    python benchmarks/busqueda.py [--filas 250000]
+
+`--filas` artefactos and as many desechos are generated.
+"""
+import argparse
+import os.path as op
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, op.dirname(op.abspath(__file__)))
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+from sqlalchemy import create_engine, or_
+from sqlalchemy.orm import Session
+
+import arqcheros as a
+import indices
+
+PALABRAS = ['pátina', 'córtex', 'fractura', 'retoque', 'ocre', 'hollín',
+            'superficie', 'rodado', 'lustre', 'astillado', 'bisel', 'filo']
+
+
+def textos(session, filas, semilla=0):
+    azar = random.Random(semilla)
+    columnas = a.Artefacto.__table__.c
+    session.execute(a.Artefacto.__table__.update()
+                    .where(columnas.id == a.db.bindparam('_id'))
+                    .values({columnas['Observaciones']: a.db.bindparam('_obs')}),
+                    [dict(_id=i + 1, _obs=' '.join(azar.sample(PALABRAS, 3)))
+                     for i in range(filas)])
+    session.commit()
+
+
+def consultas(session):
+    Artefacto = a.Artefacto
+
+    def like(texto):
+        patron = '%' + texto + '%'
+        query = session.query(Artefacto).filter(or_(
+            Artefacto.nombre.ilike(patron), Artefacto.obs.ilike(patron),
+            Artefacto.ubicacion_sustancia.ilike(patron)))
+        query.count()
+        query.order_by(Artefacto.id).limit(20).all()
+
+    def fts(texto):
+        query = session.query(Artefacto).filter(
+            Artefacto.id.in_(a.ids_busqueda(texto, Artefacto)))
+        query.count()
+        query.order_by(Artefacto.id).limit(20).all()
+
+    def global_(texto):
+        session.execute(a.consulta_busqueda(texto)).fetchall()
+
+    return [('Lista de artefactos, LIKE', like),
+            ('Lista de artefactos, FTS5', fts),
+            ('Búsqueda global, FTS5 + bm25', global_)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=250000)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = create_engine('sqlite:///' + op.join(directorio, 'bench.sqlite'))
+        a.db.metadata.create_all(engine)
+        session = Session(bind=engine)
+        print('Generando %d artefactos y desechos...' % args.filas)
+        indices.poblar(session, args.filas)
+        textos(session, args.filas)
+        engine.execute('ANALYZE')
+
+        terminos = ['Art 12345', 'Art 999', 'ocre', 'pátina fractura', 'lustr']
+        print('%-32s %s' % ('Consulta (mediana, ms)', ' '.join('%12s' % t for t in terminos)))
+        for nombre, consulta in consultas(session):
+            tiempos = []
+            for termino in terminos:
+                resultado = indices.medir([(termino, lambda azar: consulta(termino))],
+                                          args.repeticiones)
+                tiempos.append(resultado[0][1])
+            print('%-32s %s' % (nombre, ' '.join('%12.2f' % t for t in tiempos)))
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
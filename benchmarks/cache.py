@@ -0,0 +1,72 @@
+# -*- encoding: utf-8 -*-
+"""Latency of the list and analysis pages rendered after a write that
+invalidates them, and served from the page cache.
+
+    python benchmarks/cache.py [--artefactos 20000]
+"""
+import argparse
+import os.path as op
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+
+import arqcheros as a
+import cache
+
+URLS = [
+    '/admin/observacion/',
+    '/admin/artefacto/',
+    '/admin/artefacto/?page=50',
+    '/admin/desecho/',
+    '/admin/analisis/?conjunto=artefactos&agrupar_por=roca&variable=clase_tecnica',
+]
+
+# Everything the pages above read
+MODELOS = ['Artefacto', 'Detalle', 'Desecho', 'Observacion', 'Resumen', 'User']
+
+
+def tiempo(cliente, url):
+    inicio = time.perf_counter()
+    respuesta = cliente.get(url)
+    assert respuesta.status_code == 200, (url, respuesta.status_code)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artefactos', type=int, default=20000)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = a.create_app(dict(
+            SQLALCHEMY_DATABASE_URI='sqlite:///' + op.join(directorio, 'bench.sqlite'),
+            FOTOS_DIR=op.join(directorio, 'fotos'), SQLALCHEMY_ECHO=False,
+            DEBUG=False, IMAGENES_HILOS=0))
+        with app.app_context():
+            a.generar_datos(args.artefactos)
+            a.db.session.add(a.User(login='benchmark',
+                                    password=generate_password_hash('benchmark')))
+            a.db.session.commit()
+        cliente = app.test_client()
+        cliente.post('/admin/login/', data=dict(login='benchmark', password='benchmark'))
+
+        print('%-40s %12s %12s' % ('Página (mediana, ms)', 'renderizada', 'en caché'))
+        for url in URLS:
+            renderizada, guardada = [], []
+            for _ in range(args.repeticiones):
+                with app.app_context(), a.db.engine.begin() as conexion:
+                    cache.invalidar(conexion, MODELOS)
+                renderizada.append(tiempo(cliente, url))
+                guardada.append(tiempo(cliente, url))
+            print('%-40s %12.2f %12.2f' % (url[:40], statistics.median(renderizada),
+                                           statistics.median(guardada)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+# -*- encoding: utf-8 -*-
+"""Size and GROUP BY time of the vocabulary columns stored as codes,
+against a copy of the same tables storing the member names.
+
+    python benchmarks/codigos.py [--artefactos 100000]
+"""
+import argparse
+import os.path as op
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from sqlalchemy import inspect
+
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+import arqcheros as a
+import codigos
+
+# (model, grouping column, vocabulary column) of the measured GROUP BYs
+AGRUPAMIENTOS = [
+    (a.Artefacto, 'observacion_id', 'roca'),
+    (a.Artefacto, 'observacion_id', 'clase_tecnica'),
+    (a.Detalle, 'artefacto_id', 'subgrupos'),
+]
+
+SUFIJO = '_nombres'
+
+
+def copiar_con_nombres(conexion, tabla):
+    """Copy `tabla` storing labels instead of codes, with the same indexes."""
+    valores = []
+    for columna in tabla.columns:
+        if isinstance(columna.type, codigos.EnumEntero):
+            etiquetas = a.TABLAS_VOCABULARIO[columna.type.enum_class].name
+            valores.append('(SELECT etiqueta FROM "%s" WHERE codigo = "%s") AS "%s"'
+                           % (etiquetas, columna.name, columna.name))
+        else:
+            valores.append('"%s"' % columna.name)
+    conexion.execute('CREATE TABLE "%s%s" AS SELECT %s FROM "%s"'
+                     % (tabla.name, SUFIJO, ', '.join(valores), tabla.name))
+    for indice in tabla.indexes:
+        conexion.execute('CREATE INDEX "%s%s" ON "%s%s" (%s)' % (
+            indice.name, SUFIJO, tabla.name, SUFIJO,
+            ', '.join('"%s"' % c.name for c in indice.columns)))
+
+
+def tamano(conexion, tabla):
+    """Bytes of `tabla` and of its indexes."""
+    return conexion.execute(
+        'SELECT sum(pgsize) FROM dbstat WHERE name = ? OR name IN '
+        '(SELECT name FROM sqlite_master WHERE type = \'index\' AND tbl_name = ?)',
+        (tabla, tabla)).fetchone()[0]
+
+
+def medir(conexion, sentencia, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        conexion.execute(sentencia).fetchall()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artefactos', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = op.join(directorio, 'bench.sqlite')
+        app = a.create_app(dict(SQLALCHEMY_DATABASE_URI='sqlite:///' + ruta,
+                                FOTOS_DIR=op.join(directorio, 'fotos'),
+                                SQLALCHEMY_ECHO=False, METRICAS=False))
+        with app.app_context():
+            a.generar_datos(args.artefactos)
+            with a.db.engine.begin() as conexion:
+                for modelo in set(m for m, _, _ in AGRUPAMIENTOS):
+                    copiar_con_nombres(conexion, modelo.__table__)
+                conexion.execute('ANALYZE')
+
+        conexion = sqlite3.connect(ruta)
+        print('%-12s %14s %14s' % ('Tabla (MiB)', 'nombres', 'códigos'))
+        for modelo in sorted(set(m for m, _, _ in AGRUPAMIENTOS), key=lambda m: m.__name__):
+            nombre = modelo.__table__.name
+            print('%-12s %14.1f %14.1f' % (nombre, tamano(conexion, nombre + SUFIJO) / 2 ** 20,
+                                           tamano(conexion, nombre) / 2 ** 20))
+        print()
+        print('%-28s %14s %14s' % ('GROUP BY (mediana, ms)', 'nombres', 'códigos'))
+        for modelo, grupo, variable in AGRUPAMIENTOS:
+            columnas = inspect(modelo).columns
+            sentencia = 'SELECT "{g}", "{v}", count(*) FROM "%s" GROUP BY "{g}", "{v}"'.format(
+                g=columnas[grupo].name, v=columnas[variable].name)
+            nombre = modelo.__table__.name
+            print('%-28s %14.2f %14.2f' % (
+                '%s.%s' % (nombre, variable),
+                medir(conexion, sentencia % (nombre + SUFIJO), args.repeticiones),
+                medir(conexion, sentencia % nombre, args.repeticiones)))
+        conexion.close()
+
+
+if __name__ == '__main__':
+    main()
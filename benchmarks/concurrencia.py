@@ -0,0 +1,118 @@
+# -*- encoding: utf-8 -*-
+"""Mixed readers and writers on one SQLite file, with the default
+connection settings and with WAL, the pragmas and a connection pool.
+
+    python benchmarks/concurrencia.py [--filas 20000] [--lectores 4] [--escritores 2]
+"""
+import argparse
+import os.path as op
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, op.dirname(op.abspath(__file__)))
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import arqcheros as a
+import basedatos
+import indices
+
+
+def leer(session, azar):
+    query = session.query(a.Artefacto).filter(
+        a.Artefacto.roca == azar.choice(list(a.Roca)))
+    query.count()
+    query.order_by(a.Artefacto.id.desc()).limit(20).all()
+
+
+def escribir(session, azar):
+    session.add(a.Artefacto(nombre='Nuevo', observacion_id=1,
+                            roca=azar.choice(list(a.Roca)),
+                            long_pieza=azar.randint(5, 200),
+                            ancho_pieza=azar.randint(5, 120),
+                            espesor_pieza=azar.randint(1, 50)))
+    session.commit()
+
+
+def trabajar(engine, operacion, semilla, hasta, resultados):
+    azar = random.Random(semilla)
+    session = Session(bind=engine)
+    tiempos, errores = [], 0
+    while time.perf_counter() < hasta:
+        inicio = time.perf_counter()
+        try:
+            operacion(session, azar)
+        except OperationalError:
+            session.rollback()
+            errores += 1
+            continue
+        finally:
+            session.close()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    resultados.append((operacion.__name__, tiempos, errores))
+
+
+def correr(engine, lectores, escritores, segundos):
+    hasta = time.perf_counter() + segundos
+    resultados = []
+    hilos = [threading.Thread(target=trabajar,
+                              args=(engine, leer if i < lectores else escribir,
+                                    i, hasta, resultados))
+             for i in range(lectores + escritores)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    resumen = {}
+    for nombre, tiempos, errores in resultados:
+        total = resumen.setdefault(nombre, ([], [0]))
+        total[0].extend(tiempos)
+        total[1][0] += errores
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=20000)
+    parser.add_argument('--lectores', type=int, default=4)
+    parser.add_argument('--escritores', type=int, default=2)
+    parser.add_argument('--segundos', type=float, default=5)
+    args = parser.parse_args()
+
+    hilos = args.lectores + args.escritores
+    configuraciones = [
+        ('Por defecto', lambda url: create_engine(url)),
+        ('WAL + pragmas + pool', lambda url: basedatos.configurar(
+            create_engine(url, **basedatos.opciones_pool('cola', hilos)))),
+    ]
+
+    print('%-22s %-9s %8s %10s %10s %8s' % ('Configuración', 'Operación', 'ops/s',
+                                          'p50 (ms)', 'p95 (ms)', 'errores'))
+    with tempfile.TemporaryDirectory() as directorio:
+        for i, (nombre, crear) in enumerate(configuraciones):
+            engine = crear('sqlite:///' + op.join(directorio, 'bench%d.sqlite' % i))
+            a.db.metadata.create_all(engine)
+            session = Session(bind=engine)
+            indices.poblar(session, args.filas)
+            session.close()
+
+            resumen = correr(engine, args.lectores, args.escritores, args.segundos)
+            for operacion, (tiempos, errores) in sorted(resumen.items()):
+                tiempos.sort()
+                p95 = tiempos[int(len(tiempos) * .95)] if tiempos else 0
+                print('%-22s %-9s %8.0f %10.2f %10.2f %8d' % (
+                    nombre, operacion, len(tiempos) / args.segundos,
+                    statistics.median(tiempos) if tiempos else 0, p95, errores[0]))
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
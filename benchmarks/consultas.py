@@ -0,0 +1,76 @@
+# -*- encoding: utf-8 -*-
+"""Queries and time to render a page of the artefacto list, with lazy
+relationships and with the eager loading of the list view.
+
+    python benchmarks/consultas.py [--filas 20000]
+"""
+import argparse
+import os.path as op
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, op.dirname(op.abspath(__file__)))
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+import arqcheros as a
+import basedatos
+import indices
+
+TAMANOS = [20, 50, 100]
+
+
+class SinCarga(a.ArtefactoAdmin):
+    column_auto_select_related = False
+    column_carga = ()
+
+
+def pagina(app, vista, tamano):
+    """Load a page and read what the list template shows of each row."""
+    with app.test_request_context('/?page_size=%d' % tamano):
+        _, filas = vista.get_list(0, None, False, None, [], page_size=tamano)
+        for fila in filas:
+            str(fila.observacion)
+            [str(p) for p in fila.procedimientos]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=20000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = a.create_app(dict(
+            SQLALCHEMY_DATABASE_URI='sqlite:///' + op.join(directorio, 'bench.sqlite'),
+            FOTOS_DIR=op.join(directorio, 'fotos'), SQLALCHEMY_ECHO=False,
+            IMAGENES_HILOS=0))
+        with app.app_context():
+            a.db.create_all()
+            indices.poblar(a.db.session, args.filas)
+            a.db.session.bulk_insert_mappings(a.Procedimiento, [
+                dict(nombre='Proc %d' % (i % 7), artefacto_id=i // 2 + 1)
+                for i in range(args.filas * 2)])
+            a.db.session.commit()
+
+            print('%-12s %8s %10s %14s' % ('Relaciones', 'Filas', 'Consultas',
+                                           'Mediana (ms)'))
+            for nombre, clase in [('Diferidas', SinCarga), ('Anticipadas', a.ArtefactoAdmin)]:
+                vista = clase(a.Artefacto, a.db.session, endpoint='bench_' + nombre)
+                vista.conteo = None
+                for tamano in TAMANOS:
+                    with basedatos.contar_consultas(a.db.engine) as consultas:
+                        pagina(app, vista, tamano)
+                    tiempos = []
+                    for _ in range(args.repeticiones):
+                        a.db.session.expire_all()
+                        inicio = time.perf_counter()
+                        pagina(app, vista, tamano)
+                        tiempos.append((time.perf_counter() - inicio) * 1000)
+                    print('%-12s %8d %10d %14.2f' % (nombre, tamano, consultas.total,
+                                                     statistics.median(tiempos)))
+
+
+if __name__ == '__main__':
+    main()
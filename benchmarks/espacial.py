@@ -0,0 +1,78 @@
+# -*- encoding: utf-8 -*-
+"""Radius queries over the observaciones: loading every site and
+measuring distances in Python, against the R*Tree index.
+
+    python benchmarks/espacial.py [--sitios 100000]
+"""
+import argparse
+import os.path as op
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, op.dirname(op.abspath(__file__)))
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import arqcheros as a
+import indices
+
+
+def poblar(session, sitios, semilla=0):
+    azar = random.Random(semilla)
+    session.bulk_insert_mappings(a.Observacion, [
+        dict(nombre='Obs %d' % i, latitud=azar.uniform(-55, -22),
+             longitud=azar.uniform(-73, -54))
+        for i in range(sitios)])
+    session.commit()
+
+
+def consultas(session):
+    Observacion = a.Observacion
+
+    def todo_en_python(punto):
+        latitud, longitud, km = punto
+        distancias = ((o.id, a.espacial.distancia_km(latitud, longitud,
+                                                     o.latitud, o.longitud))
+                      for o in session.query(Observacion.id, Observacion.latitud,
+                                             Observacion.longitud))
+        [i for i, d in distancias if d is not None and d <= km]
+
+    def rtree(punto):
+        session.execute(a.observaciones_en_radio(*punto)).fetchall()
+
+    return [('Todas las observaciones + Python', todo_en_python),
+            ('R*Tree + distancia exacta', rtree)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sitios', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = create_engine('sqlite:///' + op.join(directorio, 'bench.sqlite'))
+        a.db.metadata.create_all(engine)
+        session = Session(bind=engine)
+        print('Generando %d observaciones...' % args.sitios)
+        poblar(session, args.sitios)
+
+        radios = [20, 100, 500]
+        print('%-36s %s' % ('Consulta (mediana, ms)', ' '.join('%10s' % ('%d km' % r) for r in radios)))
+        for nombre, consulta in consultas(session):
+            tiempos = []
+            for km in radios:
+                resultado = indices.medir(
+                    [(nombre, lambda azar: consulta((azar.uniform(-50, -25),
+                                                     azar.uniform(-70, -57), km)))],
+                    args.repeticiones)
+                tiempos.append(resultado[0][1])
+            print('%-36s %s' % (nombre, ' '.join('%10.2f' % t for t in tiempos)))
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+# -*- encoding: utf-8 -*-
+"""List and filter latency on a synthetic collection, first without and
+then with the indexes declared on the models.
+
+    python benchmarks/indices.py [--filas 100000]
+"""
+import argparse
+import os.path as op
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+
+import arqcheros as a
+
+
+def poblar(session, filas, semilla=0):
+    azar = random.Random(semilla)
+    rocas, clases = list(a.Roca), list(a.Clase_tecnica)
+    formas, estados = list(a.Forma_geo), list(a.Estado)
+    n_observaciones = max(1, filas // 200)
+
+    session.bulk_insert_mappings(a.Observacion, [
+        dict(id=i + 1, nombre='Obs %d' % i, sitio='Sitio %d' % (i % 20),
+             capa='Capa %d' % (i % 8))
+        for i in range(n_observaciones)])
+    session.bulk_insert_mappings(a.Artefacto, [
+        dict(id=i + 1, nombre='Art %d' % i,
+             observacion_id=azar.randint(1, n_observaciones),
+             cuadro='C%d' % azar.randint(1, 30),
+             roca=azar.choice(rocas), clase_tecnica=azar.choice(clases),
+             forma_geo=azar.choice(formas),
+             long_pieza=azar.randint(5, 200), ancho_pieza=azar.randint(5, 120),
+             espesor_pieza=azar.randint(1, 50))
+        for i in range(filas)])
+    session.bulk_insert_mappings(a.Detalle, [
+        dict(nombre='Det %d' % i, artefacto_id=azar.randint(1, filas),
+             ancho_pieza=azar.randint(5, 120), espesor_pieza=azar.randint(1, 50))
+        for i in range(filas // 2)])
+    session.bulk_insert_mappings(a.Desecho, [
+        dict(nombre='Des %d' % i, observacion_id=azar.randint(1, n_observaciones),
+             capa='Capa %d' % azar.randint(0, 7), cuadro='C%d' % azar.randint(1, 30),
+             estado=azar.choice(estados))
+        for i in range(filas)])
+    session.commit()
+    return n_observaciones
+
+
+def consultas(session, filas, n_observaciones):
+    """Queries shaped like the admin list, filter and backref loads."""
+    Artefacto, Detalle, Desecho = a.Artefacto, a.Detalle, a.Desecho
+
+    def lista_por_roca(azar):
+        query = session.query(Artefacto).filter(
+            Artefacto.roca == azar.choice(list(a.Roca)))
+        query.count()
+        query.order_by(Artefacto.id).limit(20).all()
+
+    def artefactos_de_observacion(azar):
+        session.query(Artefacto).filter(
+            Artefacto.observacion_id == azar.randint(1, n_observaciones)).all()
+
+    def observacion_y_cuadro(azar):
+        session.query(Artefacto).filter(
+            Artefacto.observacion_id == azar.randint(1, n_observaciones),
+            Artefacto.cuadro == 'C%d' % azar.randint(1, 30)).all()
+
+    def detalles_de_artefacto(azar):
+        session.query(Detalle).filter(
+            Detalle.artefacto_id == azar.randint(1, filas)).all()
+
+    def desechos_observacion_capa_cuadro(azar):
+        session.query(Desecho).filter(
+            Desecho.observacion_id == azar.randint(1, n_observaciones),
+            Desecho.capa == 'Capa %d' % azar.randint(0, 7),
+            Desecho.cuadro == 'C%d' % azar.randint(1, 30)).all()
+
+    def conteo_clase_y_forma(azar):
+        session.query(func.count(Artefacto.id)).filter(
+            Artefacto.clase_tecnica == azar.choice(list(a.Clase_tecnica)),
+            Artefacto.forma_geo == azar.choice(list(a.Forma_geo))).scalar()
+
+    return [('Lista filtrada por roca (count + página)', lista_por_roca),
+            ('Artefactos de una observación', artefactos_de_observacion),
+            ('Observación > cuadro', observacion_y_cuadro),
+            ('Detalles de un artefacto', detalles_de_artefacto),
+            ('Desechos observación > capa > cuadro', desechos_observacion_capa_cuadro),
+            ('Conteo clase técnica + forma geométrica', conteo_clase_y_forma)]
+
+
+def medir(consultas, repeticiones):
+    resultados = []
+    for nombre, consulta in consultas:
+        azar = random.Random(1)
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            consulta(azar)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        resultados.append((nombre, statistics.median(tiempos)))
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = create_engine('sqlite:///' + op.join(directorio, 'bench.sqlite'))
+        a.db.metadata.create_all(engine)
+        indices = [indice for tabla in a.db.metadata.sorted_tables
+                   for indice in tabla.indexes]
+        for indice in indices:
+            indice.drop(engine)
+
+        session = Session(bind=engine)
+        print('Generando %d artefactos y desechos...' % args.filas)
+        n_observaciones = poblar(session, args.filas)
+        lista = consultas(session, args.filas, n_observaciones)
+
+        engine.execute('ANALYZE')
+        sin_indices = medir(lista, args.repeticiones)
+
+        for indice in indices:
+            indice.create(engine)
+        engine.execute('ANALYZE')
+        con_indices = medir(lista, args.repeticiones)
+
+        print('%-45s %12s %12s' % ('Consulta (mediana, ms)', 'sin índices', 'con índices'))
+        for (nombre, antes), (_, despues) in zip(sin_indices, con_indices):
+            print('%-45s %12.2f %12.2f' % (nombre, antes, despues))
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# -*- encoding: utf-8 -*-
+"""Latency of deep list pages with OFFSET and with keyset pagination,
+sorted by id and by an indexed column.
+
+    python benchmarks/paginacion.py [--filas 200000]
+"""
+import argparse
+import os.path as op
+import sys
+import tempfile
+
+sys.path.insert(0, op.dirname(op.abspath(__file__)))
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import Session
+
+import arqcheros as a
+import indices
+import paginacion
+
+POR_PAGINA = 20
+
+
+def consultas(session, columna, pagina):
+    Artefacto = a.Artefacto
+    orden = paginacion.orden(columna, Artefacto.id)
+    # Key of the last row of the previous page, as the list view keeps it
+    anterior = session.query(columna if columna is not None else Artefacto.id,
+                             Artefacto.id).order_by(*orden) \
+        .offset(pagina * POR_PAGINA - 1).limit(1).first()
+
+    def offset(azar):
+        session.query(Artefacto).order_by(*orden) \
+            .offset(pagina * POR_PAGINA).limit(POR_PAGINA).all()
+
+    def keyset(azar):
+        filas = []
+        for condicion in paginacion.tramos(columna, Artefacto.id, anterior[0],
+                                           anterior[1]):
+            filas += session.query(Artefacto).filter(condicion).order_by(*orden) \
+                .limit(POR_PAGINA - len(filas)).all()
+            if len(filas) == POR_PAGINA:
+                break
+
+    return [('OFFSET', offset), ('Keyset', keyset)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--filas', type=int, default=200000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        engine = create_engine('sqlite:///' + op.join(directorio, 'bench.sqlite'))
+        a.db.metadata.create_all(engine)
+        session = Session(bind=engine)
+        print('Generando %d artefactos y desechos...' % args.filas)
+        indices.poblar(session, args.filas)
+        engine.execute('ANALYZE')
+
+        ultima = args.filas // POR_PAGINA - 1
+        paginas = [1, 100, ultima // 10, ultima]
+        print('%-26s %s' % ('Página (mediana, ms)', ' '.join('%10d' % p for p in paginas)))
+        for nombre_orden, columna in [('id', None), ('roca', a.Artefacto.roca),
+                                      ('clase técnica', a.Artefacto.clase_tecnica)]:
+            tiempos = {}
+            for pagina in paginas:
+                for nombre, consulta in consultas(session, columna, pagina):
+                    tiempos.setdefault(nombre, []).append(
+                        indices.medir([(nombre, consulta)], args.repeticiones)[0][1])
+            for nombre, fila in tiempos.items():
+                print('%-26s %s' % ('%s, por %s' % (nombre, nombre_orden),
+                                    ' '.join('%10.2f' % t for t in fila)))
+
+        conteo = indices.medir([('COUNT(*)', lambda azar: session.query(
+            func.count(a.Artefacto.id)).scalar())], args.repeticiones)[0][1]
+        print('COUNT(*) de la lista: %.2f ms (la vista lo guarda %d s)'
+              % (conteo, a.PaginacionMixin.conteo_ttl))
+        session.close()
+
+
+if __name__ == '__main__':
+    main()
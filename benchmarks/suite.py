@@ -0,0 +1,185 @@
+# -*- encoding: utf-8 -*-
+"""Time the main pages of the application through Flask's test client on
+a reproducible synthetic collection, and save the results as JSON to
+compare them with a previous run.
+
+    python benchmarks/suite.py [--artefactos 20000] [--salida actual.json]
+                               [--comparar anterior.json]
+
+With --comparar the exit status is 1 when some page got slower than
+--umbral times its previous median.
+"""
+import argparse
+import datetime
+import io
+import json
+import os.path as op
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+from flask_admin.contrib.sqla import filters
+from werkzeug.security import generate_password_hash
+
+import arqcheros as a
+import basedatos
+import sinteticos
+
+FORMATO = 1
+
+
+def planilla(filas, semilla):
+    """CSV of `filas` artefactos, as the import page receives it."""
+    rocas = [r.value for r in a.Roca]
+    lineas = ['nombre,long_pieza,ancho_pieza,espesor_pieza,roca']
+    for i in range(filas):
+        lineas.append('Importado %d-%d,%d,%d,%d,%s' % (
+            semilla, i, 20 + i % 80, 10 + i % 50, 2 + i % 20, rocas[i % len(rocas)]))
+    return '\n'.join(lineas).encode('utf-8')
+
+
+def casos(panel, semilla):
+    """(name, method, url, form data) of the measured requests."""
+    vistas = dict((v.endpoint, v) for v in panel._views)
+    artefactos = vistas['artefacto']
+    columnas = [nombre for nombre, _ in artefactos._list_columns]
+    roca = next(i for i, f in enumerate(artefactos._filters)
+                if f.name == artefactos.column_labels['roca']
+                and isinstance(f, filters.FilterEqual))
+    valor_roca = next(iter(a.Roca)).name
+    return [
+        ('lista artefactos', 'GET', '/admin/artefacto/', None),
+        ('lista artefactos página 50', 'GET', '/admin/artefacto/?page=50', None),
+        ('orden por roca', 'GET', '/admin/artefacto/?sort=%d' % columnas.index('roca'), None),
+        ('orden por roca desc', 'GET',
+         '/admin/artefacto/?sort=%d&desc=1' % columnas.index('roca'), None),
+        ('filtro por roca', 'GET', '/admin/artefacto/?flt0_%d=%s' % (roca, valor_roca), None),
+        ('búsqueda en la lista', 'GET', '/admin/artefacto/?search=sintética', None),
+        ('lista detalles', 'GET', '/admin/detalle/', None),
+        ('lista desechos', 'GET', '/admin/desecho/', None),
+        ('búsqueda general', 'GET', '/admin/busqueda/?q=sitio', None),
+        ('análisis por observación', 'GET',
+         '/admin/analisis/?conjunto=artefactos&agrupar_por=observacion&variable=roca', None),
+        ('análisis por roca', 'GET',
+         '/admin/analisis/?conjunto=artefactos&agrupar_por=roca&variable=clase_tecnica', None),
+        ('análisis de desechos', 'GET',
+         '/admin/analisis/?conjunto=desechos&agrupar_por=capa&variable=estado', None),
+        ('exportar CSV', 'GET', '/admin/artefacto/export/csv/', None),
+        ('api artefactos', 'GET', '/api/artefactos', None),
+        ('api artefactos con detalles', 'GET', '/api/artefactos?incluir=detalles,fotos', None),
+        ('api 500 artefactos por id', 'GET',
+         '/api/artefactos?campos=nombre,roca&ids=' + ','.join(str(i) for i in range(1, 1001, 2)),
+         None),
+        ('api desechos en NDJSON', 'GET', '/api/desechos?formato=ndjson', None),
+        ('editar en bloque', 'POST',
+         '/admin/artefacto/masivo/?flt0_%d=%s&campo=obs' % (roca, valor_roca),
+         lambda i: dict(campo='obs', obs='Revisado %d' % i)),
+        # Last: every run adds rows
+        ('importar 500 filas', 'POST', '/admin/importacion/',
+         lambda i: dict(conjunto='artefactos', observacion='0',
+                        archivo=(io.BytesIO(planilla(500, semilla * 1000 + i)),
+                                 'planilla.csv'))),
+    ]
+
+
+def medir(cliente, metodo, url, datos, repeticiones):
+    def pedir(i):
+        respuesta = cliente.open(url, method=metodo, data=datos(i) if datos else None)
+        cuerpo = respuesta.get_data()
+        # Forms redirect after saving
+        if respuesta.status_code not in (200, 302):
+            raise RuntimeError('%s %s: %d' % (metodo, url, respuesta.status_code))
+        return len(cuerpo)
+
+    pedir(0)
+    with basedatos.contar_consultas(a.db.engine) as consultas:
+        tamano = pedir(1)
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        pedir(i + 2)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    tiempos.sort()
+    return dict(mediana_ms=round(statistics.median(tiempos), 3),
+                p95_ms=round(tiempos[min(len(tiempos) - 1, int(len(tiempos) * .95))], 3),
+                consultas=consultas.total, bytes=tamano)
+
+
+def comparar(actual, anterior, umbral):
+    """Print both runs side by side; True if some page regressed."""
+    if anterior.get('escala') != actual['escala']:
+        print('Atención: la corrida anterior usó otra escala.')
+    print('%-30s %12s %12s %8s' % ('Caso (mediana, ms)', 'anterior', 'actual', 'razón'))
+    peor = False
+    for nombre, resultado in actual['casos'].items():
+        previo = anterior['casos'].get(nombre)
+        if previo is None:
+            print('%-30s %12s %12.2f' % (nombre, '-', resultado['mediana_ms']))
+            continue
+        razon = resultado['mediana_ms'] / previo['mediana_ms']
+        marca = ' <-- más lento' if razon > umbral else ''
+        peor = peor or razon > umbral
+        print('%-30s %12.2f %12.2f %8.2f%s' % (nombre, previo['mediana_ms'],
+                                               resultado['mediana_ms'], razon, marca))
+    return peor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--artefactos', type=int, default=20000)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    parser.add_argument('--salida', help='Archivo JSON con los resultados.')
+    parser.add_argument('--comparar', help='Resultados JSON de una corrida anterior.')
+    parser.add_argument('--umbral', type=float, default=1.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        app = a.create_app(dict(
+            SQLALCHEMY_DATABASE_URI='sqlite:///' + op.join(directorio, 'bench.sqlite'),
+            FOTOS_DIR=op.join(directorio, 'fotos'), SQLALCHEMY_ECHO=False,
+            DEBUG=False, IMAGENES_HILOS=0,
+            # Measure the rendering of every page, see benchmarks/cache.py
+            CACHE=False))
+        with app.app_context():
+            print('Generando %r...' % sinteticos.Escala(args.artefactos))
+            a.generar_datos(args.artefactos, args.semilla)
+            a.db.session.add(a.User(login='benchmark',
+                                    password=generate_password_hash('benchmark')))
+            a.db.session.commit()
+            a.db.engine.execute('ANALYZE')
+            panel = a.registrar_admin(app)
+
+        cliente = app.test_client()
+        cliente.post('/admin/login/', data=dict(login='benchmark', password='benchmark'))
+        resultados = {}
+        print('%-30s %10s %10s %10s' % ('Caso', 'p50 (ms)', 'p95 (ms)', 'consultas'))
+        with app.app_context():
+            for nombre, metodo, url, datos in casos(panel, args.semilla):
+                resultado = medir(cliente, metodo, url, datos, args.repeticiones)
+                resultados[nombre] = dict(resultado, metodo=metodo, url=url)
+                print('%-30s %10.2f %10.2f %10d' % (nombre, resultado['mediana_ms'],
+                                                    resultado['p95_ms'],
+                                                    resultado['consultas']))
+
+    actual = dict(formato=FORMATO, fecha=datetime.datetime.now().isoformat(timespec='seconds'),
+                  escala=vars(sinteticos.Escala(args.artefactos)), semilla=args.semilla,
+                  repeticiones=args.repeticiones, python=platform.python_version(),
+                  sqlite=sqlite3.sqlite_version, casos=resultados)
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            json.dump(actual, archivo, indent=2, ensure_ascii=False)
+    if args.comparar:
+        with open(args.comparar) as archivo:
+            anterior = json.load(archivo)
+        if comparar(actual, anterior, args.umbral):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# -*- encoding: utf-8 -*-
+"""Full-text search index built on SQLite FTS5.
+
+A single FTS5 table indexes several entity tables. Each indexed row has
+a ``nombre`` column, weighted higher when ranking, and a ``texto``
+column with the free-text fields. The FTS rowid packs the entity code
+and the row id (``id * FACTOR + codigo``) so the triggers that keep the
+index in sync update it by rowid, without scanning.
+"""
+import re
+
+FACTOR = 8
+
+TOKENIZADOR = 'unicode61 remove_diacritics 2'
+
+
+class Entidad(object):
+    """An indexed table: `codigo` < FACTOR, `tabla` and column names."""
+
+    def __init__(self, codigo, tipo, tabla, nombre, textos=()):
+        assert 0 < codigo < FACTOR
+        self.codigo = codigo
+        self.tipo = tipo
+        self.tabla = tabla
+        self.nombre = nombre
+        self.textos = list(textos)
+
+    def valores(self, fila):
+        texto = " || ' ' || ".join("coalesce(%s.\"%s\", '')" % (fila, c)
+                                   for c in self.textos) or "''"
+        return ('%s.id * %d + %d' % (fila, FACTOR, self.codigo),
+                '%s."%s"' % (fila, self.nombre), texto)
+
+    def insertar(self, indice, fila='new'):
+        return 'INSERT INTO %s(rowid, nombre, texto) VALUES (%s, %s, %s)' % (
+            (indice,) + self.valores(fila))
+
+    def borrar(self, indice, fila='old'):
+        return 'DELETE FROM %s WHERE rowid = %s' % (indice, self.valores(fila)[0])
+
+    def triggers(self, indice):
+        nombre = '%s_%s' % (indice, self.tabla)
+        columnas = ', '.join('"%s"' % c for c in ['id', self.nombre] + self.textos)
+        return [
+            'CREATE TRIGGER IF NOT EXISTS %s_ai AFTER INSERT ON "%s" BEGIN %s; END'
+            % (nombre, self.tabla, self.insertar(indice)),
+            'CREATE TRIGGER IF NOT EXISTS %s_ad AFTER DELETE ON "%s" BEGIN %s; END'
+            % (nombre, self.tabla, self.borrar(indice)),
+            'CREATE TRIGGER IF NOT EXISTS %s_au AFTER UPDATE OF %s ON "%s" '
+            'BEGIN %s; %s; END'
+            % (nombre, columnas, self.tabla, self.borrar(indice),
+               self.insertar(indice)),
+        ]
+
+
+def ddl(indice, entidades):
+    """Statements creating the FTS5 table and the sync triggers."""
+    sentencias = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS %s USING fts5("
+        "nombre, texto, tokenize = '%s', prefix = '2 3')" % (indice, TOKENIZADOR)]
+    for entidad in entidades:
+        sentencias.extend(entidad.triggers(indice))
+    return sentencias
+
+
+def repoblar(indice, entidades):
+    """Statements that rebuild the whole index from the entity tables."""
+    sentencias = ['DELETE FROM %s' % indice]
+    for entidad in entidades:
+        sentencias.append('INSERT INTO %s(rowid, nombre, texto) SELECT %s, %s, %s '
+                          'FROM "%s" AS fila' % ((indice,) + entidad.valores('fila')
+                                                 + (entidad.tabla,)))
+    sentencias.append("INSERT INTO %s(%s) VALUES ('optimize')" % (indice, indice))
+    return sentencias
+
+
+def consulta(texto):
+    """FTS5 query matching every word of `texto` as a prefix, or None.
+
+    Words are quoted, so FTS5 operators typed by the user are searched
+    as plain text.
+    """
+    palabras = re.findall(r'\w+', texto or '', re.UNICODE)
+    if not palabras:
+        return None
+    return ' '.join('"%s"*' % palabra for palabra in palabras)
@@ -0,0 +1,171 @@
+# -*- encoding: utf-8 -*-
+"""Cache of rendered pages.
+
+Entries are keyed by view, user and query arguments, plus the version
+of every model the page reads. Versions live in a table of the database
+and each transaction that writes a model increases its version, so a
+change makes the pages that read it unreachable in every process; the
+storage evicts them later. Pages are kept in an LRU of each process,
+bounded by entries and bytes, or in a Redis server shared by all of
+them (its maxmemory policy then bounds the size).
+"""
+import collections
+import hashlib
+import json
+import threading
+
+from sqlalchemy import Column, Integer, String, Table, select, text
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+TABLA = 'cache_version'
+
+
+def tabla_versiones(metadata):
+    return Table(TABLA, metadata,
+                 Column('modelo', String(64), primary_key=True),
+                 Column('version', Integer, nullable=False))
+
+
+def versiones(conexion, tabla, modelos):
+    """Versions of `modelos`, in their order; 0 for models never written."""
+    guardadas = dict(conexion.execute(
+        select([tabla.c.modelo, tabla.c.version]).where(tabla.c.modelo.in_(modelos))).fetchall())
+    return [guardadas.get(modelo, 0) for modelo in modelos]
+
+
+def invalidar(conexion, modelos):
+    """Increase the version of `modelos`, in the transaction of `conexion`."""
+    conexion.execute(text('INSERT INTO %s (modelo, version) VALUES (:modelo, 1) '
+                          'ON CONFLICT (modelo) DO UPDATE SET version = version + 1' % TABLA),
+                     [dict(modelo=modelo) for modelo in sorted(modelos)])
+
+
+def clave(*partes):
+    return hashlib.sha1(json.dumps(partes, sort_keys=True, default=str)
+                        .encode('utf-8')).hexdigest()
+
+
+class LRU(object):
+    """Thread-safe LRU of byte strings, bounded by entries and bytes."""
+
+    def __init__(self, entradas=500, bytes=64 * 2 ** 20):
+        self.maximo = entradas
+        self.maximo_bytes = bytes
+        self.lock = threading.Lock()
+        self.datos = collections.OrderedDict()
+        self.bytes = 0
+        self.desalojos = 0
+
+    def leer(self, clave):
+        with self.lock:
+            valor = self.datos.get(clave)
+            if valor is not None:
+                self.datos.move_to_end(clave)
+            return valor
+
+    def guardar(self, clave, valor):
+        if len(valor) > self.maximo_bytes:
+            return
+        with self.lock:
+            anterior = self.datos.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= len(anterior)
+            self.datos[clave] = valor
+            self.bytes += len(valor)
+            while len(self.datos) > self.maximo or self.bytes > self.maximo_bytes:
+                _, desalojado = self.datos.popitem(last=False)
+                self.bytes -= len(desalojado)
+                self.desalojos += 1
+
+    def tamano(self):
+        with self.lock:
+            return len(self.datos), self.bytes
+
+
+class Redis(object):
+    """Byte strings in a Redis server, expiring after `ttl` seconds."""
+
+    def __init__(self, url, ttl=600, prefijo='arqcheros:pagina:'):
+        if redis is None:
+            raise RuntimeError('CACHE_REDIS_URL necesita el paquete redis')
+        self.cliente = redis.Redis.from_url(url)
+        self.ttl = ttl
+        self.prefijo = prefijo
+        self.desalojos = None
+
+    def leer(self, clave):
+        return self.cliente.get(self.prefijo + clave)
+
+    def guardar(self, clave, valor):
+        self.cliente.set(self.prefijo + clave, valor, ex=self.ttl)
+
+    def tamano(self):
+        return None, None
+
+
+class Cache(object):
+    """Pages of a storage, with hits and misses per endpoint."""
+
+    def __init__(self, almacen):
+        self.almacen = almacen
+        self.lock = threading.Lock()
+        self.cuentas = collections.defaultdict(lambda: [0, 0])
+
+    def leer(self, endpoint, clave):
+        """(mimetype, body) of a stored page, or None."""
+        valor = self.almacen.leer(clave)
+        with self.lock:
+            self.cuentas[endpoint][valor is None] += 1
+        if valor is None:
+            return None
+        mimetype, cuerpo = valor.split(b'\n', 1)
+        return mimetype.decode('ascii'), cuerpo
+
+    def guardar(self, clave, mimetype, cuerpo):
+        self.almacen.guardar(clave, mimetype.encode('ascii') + b'\n' + cuerpo)
+
+    def resumen(self):
+        """One dict per endpoint, the most requested first."""
+        with self.lock:
+            filas = [dict(endpoint=endpoint, aciertos=aciertos, fallos=fallos,
+                          tasa=aciertos / (aciertos + fallos))
+                     for endpoint, (aciertos, fallos) in self.cuentas.items()]
+        return sorted(filas, key=lambda f: f['aciertos'] + f['fallos'], reverse=True)
+
+    def texto(self):
+        """The counters in the Prometheus text exposition format."""
+        lineas = []
+
+        def metrica(nombre, tipo, ayuda):
+            lineas.extend(['# HELP %s %s' % (nombre, ayuda), '# TYPE %s %s' % (nombre, tipo)])
+
+        with self.lock:
+            cuentas = sorted(self.cuentas.items())
+        for indice, nombre, ayuda in ((0, 'aciertos', 'Páginas servidas desde la caché.'),
+                                      (1, 'fallos', 'Páginas buscadas y no encontradas.')):
+            metrica('arqcheros_cache_%s_total' % nombre, 'counter', ayuda)
+            for endpoint, valores in cuentas:
+                lineas.append('arqcheros_cache_%s_total{endpoint="%s"} %d' % (
+                    nombre, endpoint.replace('\\', '\\\\').replace('"', '\\"'),
+                    valores[indice]))
+        entradas, bytes = self.almacen.tamano()
+        if entradas is not None:
+            metrica('arqcheros_cache_desalojos_total', 'counter',
+                    'Páginas descartadas por falta de lugar.')
+            lineas.append('arqcheros_cache_desalojos_total %d' % self.almacen.desalojos)
+            metrica('arqcheros_cache_entradas', 'gauge', 'Páginas guardadas.')
+            lineas.append('arqcheros_cache_entradas %d' % entradas)
+            metrica('arqcheros_cache_bytes', 'gauge', 'Tamaño de las páginas guardadas.')
+            lineas.append('arqcheros_cache_bytes %d' % bytes)
+        return '\n'.join(lineas) + '\n'
+
+
+def instalar(app, entradas=500, bytes=64 * 2 ** 20, redis_url=None, ttl=600):
+    """Give `app` a page cache, in this process or in Redis."""
+    almacen = Redis(redis_url, ttl) if redis_url else LRU(entradas, bytes)
+    app.extensions['cache'] = Cache(almacen)
+    return app.extensions['cache']
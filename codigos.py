@@ -0,0 +1,197 @@
+# -*- encoding: utf-8 -*-
+"""Enum columns stored as integer codes.
+
+An EnumEntero column keeps the position of the member in its Enum class
+(1 for the first) in a SMALLINT, where a plain Enum keeps the member
+name: a couple of bytes per row and per index entry instead of up to a
+few hundred, and integer comparisons when grouping. Codes follow the
+declaration order, so new members go at the end of their class. Each
+vocabulary also gets a lookup table (codigo, etiqueta, valor) for the
+SQL that needs the labels, like exports.
+
+Tables created with the name columns are converted online by
+migrar_tabla: rows are copied in batches into a new table while
+triggers copy the writes made meanwhile, and the tables are swapped in
+a short final transaction.
+"""
+from sqlalchemy import Column, SmallInteger, Table, Unicode, event, inspect, select, \
+    text, types
+from sqlalchemy.schema import CreateTable
+
+SUFIJO = '__codigos'
+
+
+class EnumEntero(types.TypeDecorator):
+    """Enum stored as the code of the member. Binds members or their
+    names and loads members; names left by a database not yet migrated
+    are read too."""
+
+    impl = SmallInteger
+    # The state is the Enum class, so SQLAlchemy 1.4+ can cache statements
+    cache_ok = True
+
+    def __init__(self, enum_class):
+        super(EnumEntero, self).__init__()
+        self.enum_class = enum_class
+        self.miembros = list(enum_class)
+        self.enums = [miembro.name for miembro in self.miembros]
+        self.codigos = dict((miembro, i) for i, miembro in enumerate(self.miembros, 1))
+        self.codigos.update((miembro.name, i) for i, miembro in enumerate(self.miembros, 1))
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self.codigos[value]
+        except (KeyError, TypeError):
+            raise LookupError('%r no es un valor de %s' % (value, self.enum_class.__name__))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if isinstance(value, str) and not value.isdigit():
+            return self.enum_class[value]
+        return self.miembros[int(value) - 1]
+
+    @property
+    def python_type(self):
+        return self.enum_class
+
+
+def filas(enum_class):
+    """Rows of the lookup table of `enum_class`."""
+    return [dict(codigo=i, etiqueta=miembro.name, valor=str(miembro.value))
+            for i, miembro in enumerate(enum_class, 1)]
+
+
+def tabla_codigos(metadata, nombre, enum_class):
+    """Lookup table of the codes of `enum_class`, filled when created."""
+    tabla = Table(nombre, metadata,
+                  Column('codigo', SmallInteger, primary_key=True, autoincrement=False),
+                  Column('etiqueta', Unicode(512), nullable=False, unique=True),
+                  Column('valor', Unicode(512)),
+                  info=dict(enum_class=enum_class))
+
+    @event.listens_for(tabla, 'after_create')
+    def _llenar(target, connection, **kw):
+        sincronizar(connection, tabla)
+
+    return tabla
+
+
+def sincronizar(conexion, tabla):
+    """Add the new members of the vocabulary of the lookup `tabla` and
+    the renamed labels. Raises ValueError if members were reordered or
+    removed, which would change what the stored codes mean."""
+    guardadas = dict(conexion.execute(select([tabla.c.codigo, tabla.c.etiqueta])).fetchall())
+    actuales = filas(tabla.info['enum_class'])
+    etiquetas = set(fila['etiqueta'] for fila in actuales)
+    sobrantes = set(guardadas) - set(fila['codigo'] for fila in actuales)
+    if sobrantes:
+        raise ValueError('%s: faltan los códigos %s en %s' % (
+            tabla.name, sorted(sobrantes), tabla.info['enum_class'].__name__))
+    for fila in actuales:
+        guardada = guardadas.get(fila['codigo'])
+        if guardada is None:
+            conexion.execute(tabla.insert(), fila)
+        elif guardada != fila['etiqueta']:
+            if guardada in etiquetas:
+                raise ValueError('%s: el código %d era %r; los valores nuevos van al final'
+                                 % (tabla.name, fila['codigo'], guardada))
+            conexion.execute(tabla.update().where(tabla.c.codigo == fila['codigo'])
+                             .values(etiqueta=fila['etiqueta'], valor=fila['valor']))
+
+
+def columnas_texto(conexion, tabla):
+    """EnumEntero columns of `tabla` still stored as names."""
+    if not conexion.dialect.has_table(conexion, tabla.name):
+        return []
+    tipos = dict((c['name'], c['type']) for c in inspect(conexion).get_columns(tabla.name))
+    return [columna for columna in tabla.columns
+            if isinstance(columna.type, EnumEntero) and columna.name in tipos
+            and not isinstance(tipos[columna.name], types.Integer)]
+
+
+# Code of a value of a name column: its name, or the code that EnumEntero
+# binds, stored as text, in the rows written once the models use codes
+_CODIGO = ('coalesce((SELECT codigo FROM "%(tabla)s" WHERE etiqueta = %(valor)s), '
+           "CASE WHEN %(valor)s <> '' AND %(valor)s NOT GLOB '*[^0-9]*' "
+           'THEN CAST(%(valor)s AS INTEGER) END)')
+
+
+def _valores(tabla, pendientes, tablas_codigos, fila):
+    valores = []
+    for columna in tabla.columns:
+        valor = '%s."%s"' % (fila, columna.name)
+        if columna in pendientes:
+            valor = _CODIGO % dict(tabla=tablas_codigos[columna.type.enum_class].name,
+                                   valor=valor)
+        valores.append(valor)
+    return ', '.join(valores)
+
+
+def migrar_tabla(engine, tabla, tablas_codigos, lote=5000, avance=None, despues=None):
+    """Rewrite the name columns of `tabla` as codes, with the database
+    in use. `tablas_codigos` maps Enum classes to their lookup tables;
+    `despues(conexion)` recreates, inside the swap transaction, the
+    triggers of other features dropped with the old table. Returns the
+    number of rows copied, None if the table needed no change."""
+    with engine.connect() as conexion:
+        pendientes = columnas_texto(conexion, tabla)
+    if not pendientes:
+        return None
+
+    nombre = tabla.name
+    copia = nombre + SUFIJO
+    columnas = ', '.join('"%s"' % columna.name for columna in tabla.columns)
+    insertar = 'INSERT OR REPLACE INTO "%s" (%s) SELECT %s' % (
+        copia, columnas, _valores(tabla, pendientes, tablas_codigos, 'new'))
+    with engine.begin() as conexion:
+        preparador = conexion.dialect.identifier_preparer
+        for sufijo in ('ai', 'au', 'ad'):
+            conexion.execute('DROP TRIGGER IF EXISTS "%s_%s"' % (copia, sufijo))
+        conexion.execute('DROP TABLE IF EXISTS "%s"' % copia)
+        ddl = str(CreateTable(tabla).compile(dialect=conexion.dialect)).strip()
+        original = 'CREATE TABLE %s ' % preparador.format_table(tabla)
+        assert ddl.startswith(original), ddl
+        conexion.execute('CREATE TABLE "%s" %s' % (copia, ddl[len(original):]))
+        # Writes made during the copy; INSERT OR IGNORE below keeps them
+        conexion.execute('CREATE TRIGGER "%s_ai" AFTER INSERT ON "%s" BEGIN %s; END'
+                         % (copia, nombre, insertar))
+        conexion.execute('CREATE TRIGGER "%s_au" AFTER UPDATE ON "%s" BEGIN '
+                         'DELETE FROM "%s" WHERE id = old.id; %s; END'
+                         % (copia, nombre, copia, insertar))
+        conexion.execute('CREATE TRIGGER "%s_ad" AFTER DELETE ON "%s" BEGIN '
+                         'DELETE FROM "%s" WHERE id = old.id; END' % (copia, nombre, copia))
+
+    siguiente = text('SELECT max(id) FROM (SELECT id FROM "%s" WHERE id > :desde '
+                     'ORDER BY id LIMIT :lote)' % nombre)
+    copiar = text('INSERT OR IGNORE INTO "%s" (%s) SELECT %s FROM "%s" AS fila '
+                  'WHERE fila.id > :desde AND fila.id <= :hasta' % (
+                      copia, columnas, _valores(tabla, pendientes, tablas_codigos, 'fila'),
+                      nombre))
+    desde, copiadas = 0, 0
+    while True:
+        # One transaction per batch, so that other writers get their turn
+        with engine.begin() as conexion:
+            hasta = conexion.execute(siguiente, desde=desde, lote=lote).scalar()
+            if hasta is None:
+                break
+            copiadas += conexion.execute(copiar, desde=desde, hasta=hasta).rowcount
+        desde = hasta
+        if avance:
+            avance(nombre, copiadas)
+
+    with engine.begin() as conexion:
+        # pysqlite only opens transactions before DML
+        conexion.execute('BEGIN IMMEDIATE')
+        # Leave the references of other tables to the old name as they are
+        conexion.execute('PRAGMA legacy_alter_table = ON')
+        conexion.execute('DROP TABLE "%s"' % nombre)
+        conexion.execute('ALTER TABLE "%s" RENAME TO "%s"' % (copia, nombre))
+        conexion.execute('PRAGMA legacy_alter_table = OFF')
+        for indice in tabla.indexes:
+            indice.create(conexion)
+        if despues:
+            despues(conexion)
+    return copiadas
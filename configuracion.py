@@ -0,0 +1,118 @@
+# -*- encoding: utf-8 -*-
+"""Configuration profiles.
+
+The profile is chosen with ARQCHEROS_PERFIL (``dev`` by default). Its
+settings can be overridden by a Python file named in ARQCHEROS_CONFIG
+and then by ARQCHEROS_<SETTING> environment variables, whose values are
+read as JSON when possible (``ARQCHEROS_SQLITE_POOL_TAMANO=8``) and as
+plain text otherwise.
+"""
+import json
+import os
+import os.path as op
+
+PREFIJO = 'ARQCHEROS_'
+
+
+class Desarrollo(object):
+    DEBUG = True
+    TESTING = False
+
+    # Only good for development: production needs its own
+    SECRET_KEY = '123456790'
+
+    # SQLALCHEMY_DATABASE_URI defaults to this file, relative to the app
+    DATABASE_FILE = 'sample_db.sqlite'
+    SQLALCHEMY_DATABASE_URI = None
+    SQLALCHEMY_ECHO = True
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Connection pool ('cola', 'hilo' or 'ninguno', see basedatos.POOLS) and
+    # pragmas overriding basedatos.PRAGMAS
+    SQLITE_POOL = 'cola'
+    SQLITE_POOL_TAMANO = 5
+    SQLITE_PRAGMAS = {}
+
+    # Uploaded photos and their derivatives
+    FOTOS_DIR = op.join(op.dirname(op.abspath(__file__)), 'static')
+
+    # Threads building photo derivatives in the background; 0 leaves the
+    # queue to `flask procesar-imagenes`
+    IMAGENES_HILOS = 2
+
+    # Request and SQL counters, served on /metrics (to a client sending
+    # "Authorization: Bearer <METRICAS_TOKEN>" when that is set) and on
+    # the admin performance page; statements slower than METRICAS_LENTA
+    # seconds are kept, the last METRICAS_MUESTRAS of them
+    METRICAS = True
+    METRICAS_TOKEN = None
+    METRICAS_LENTA = 0.1
+    METRICAS_MUESTRAS = 50
+
+    # Cache of the list and analysis pages: up to CACHE_ENTRADAS pages and
+    # CACHE_BYTES bytes in each process or, with CACHE_REDIS_URL, in that
+    # Redis server for CACHE_TTL seconds, shared by every process
+    CACHE = True
+    CACHE_ENTRADAS = 500
+    CACHE_BYTES = 64 * 2 ** 20
+    CACHE_REDIS_URL = None
+    CACHE_TTL = 600
+
+    # The JSON API on /api answers logged in users and, when this is set,
+    # clients sending "Authorization: Bearer <API_TOKEN>"
+    API_TOKEN = None
+
+
+class Pruebas(Desarrollo):
+    DEBUG = False
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_ECHO = False
+    IMAGENES_HILOS = 0
+
+
+class Produccion(Desarrollo):
+    DEBUG = False
+    SECRET_KEY = None
+    SQLALCHEMY_ECHO = False
+    SQLALCHEMY_RECORD_QUERIES = False
+    # One pool per worker process, shared by its threads
+    SQLITE_POOL_TAMANO = 8
+
+
+PERFILES = dict(dev=Desarrollo, test=Pruebas, prod=Produccion)
+
+
+def valor_entorno(texto):
+    try:
+        return json.loads(texto)
+    except ValueError:
+        return texto
+
+
+def cargar(config, perfil=None, ajustes=None, entorno=os.environ):
+    """Fill a Flask `config` from the profile, the settings file, the
+    environment and then `ajustes`. Returns the profile name."""
+    perfil = perfil or entorno.get(PREFIJO + 'PERFIL', 'dev')
+    if perfil not in PERFILES:
+        raise RuntimeError('Perfil desconocido: %s (%s)' % (perfil, ', '.join(PERFILES)))
+    config.from_object(PERFILES[perfil])
+    if entorno.get(PREFIJO + 'CONFIG'):
+        config.from_pyfile(entorno[PREFIJO + 'CONFIG'])
+    for nombre, texto in entorno.items():
+        clave = nombre[len(PREFIJO):]
+        if nombre.startswith(PREFIJO) and clave.isupper() and clave not in ('PERFIL', 'CONFIG'):
+            config[clave] = valor_entorno(texto)
+    config.update(ajustes or {})
+    config['PERFIL'] = perfil
+
+    if not config['SQLALCHEMY_DATABASE_URI']:
+        config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + config['DATABASE_FILE']
+    if not config['SECRET_KEY']:
+        raise RuntimeError('Falta SECRET_KEY: definirla con %sSECRET_KEY o en %sCONFIG'
+                           % (PREFIJO, PREFIJO))
+    # /metrics lists the views, their latencies and SQL statements
+    if perfil == 'prod' and config['METRICAS'] and not config['METRICAS_TOKEN']:
+        raise RuntimeError('Falta METRICAS_TOKEN: definirla con %sMETRICAS_TOKEN o '
+                           'desactivar las métricas con %sMETRICAS=false' % (PREFIJO, PREFIJO))
+    return perfil
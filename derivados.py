@@ -0,0 +1,118 @@
+# -*- encoding: utf-8 -*-
+"""Image derivatives (thumbnail, medium preview, WebP) and the thread
+pool that builds them in the background.
+
+Derivatives are written next to the original, each to a temporary file
+renamed into place, so a reader never sees a half-written image.
+"""
+import logging
+import os
+import os.path as op
+import threading
+
+from PIL import Image, ImageOps, features
+
+log = logging.getLogger(__name__)
+
+# (type, maximum size, crop to fill, format, filename suffix), largest first
+DERIVADOS = [
+    ('webp', (1600, 1600), False, 'WEBP', '.webp'),
+    ('mediana', (800, 800), False, 'JPEG', '_mediana.jpg'),
+    ('miniatura', (100, 100), True, 'JPEG', '_thumb.jpg'),
+]
+
+if not features.check('webp'):
+    DERIVADOS = [d for d in DERIVADOS if d[3] != 'WEBP']
+
+TIPOS = [d[0] for d in DERIVADOS]
+
+
+def nombre(path, tipo):
+    """Filename of the `tipo` derivative of the image at `path`."""
+    sufijo = next(d[4] for d in DERIVADOS if d[0] == tipo)
+    return op.splitext(path)[0] + sufijo
+
+
+def _guardar(imagen, destino, formato):
+    temporal = '%s.%d.tmp' % (destino, threading.get_ident())
+    with open(temporal, 'wb') as archivo:
+        imagen.save(archivo, formato, quality=85)
+    os.replace(temporal, destino)
+
+
+def generar(directorio, path):
+    """Write every derivative of `directorio/path` and return their names."""
+    mayor = DERIVADOS[0][1]
+    with Image.open(op.join(directorio, path)) as original:
+        # JPEG can decode straight at a reduced scale, much cheaper than
+        # decoding the full image and resizing it afterwards
+        original.draft('RGB', mayor)
+        imagen = ImageOps.exif_transpose(original)
+        if imagen.mode != 'RGB':
+            imagen = imagen.convert('RGB')
+
+        nombres = []
+        for tipo, tamano, recortar, formato, sufijo in DERIVADOS:
+            # Each derivative is reduced from the previous, larger one
+            if recortar:
+                imagen = ImageOps.fit(imagen, tamano, Image.LANCZOS)
+            else:
+                imagen = imagen.copy()
+                imagen.thumbnail(tamano, Image.LANCZOS, reducing_gap=3.0)
+            _guardar(imagen, op.join(directorio, nombre(path, tipo)), formato)
+            nombres.append(nombre(path, tipo))
+    return nombres
+
+
+def completos(directorio, path):
+    """Whether every derivative of `path` is already written."""
+    return all(op.exists(op.join(directorio, nombre(path, tipo))) for tipo in TIPOS)
+
+
+def borrar(directorio, path):
+    for tipo in TIPOS:
+        destino = op.join(directorio, nombre(path, tipo))
+        if op.exists(destino):
+            os.remove(destino)
+
+
+class Trabajadores(object):
+    """Pool of daemon threads calling `procesar` until it returns False.
+
+    `procesar` takes and runs one job from a shared queue. Idle threads
+    wake up on `despertar` or every `espera` seconds, so jobs queued by
+    other processes are also picked up.
+    """
+
+    def __init__(self, procesar, hilos=2, espera=5.0):
+        self.procesar = procesar
+        self.hilos = hilos
+        self.espera = espera
+        self._evento = threading.Event()
+        self._lock = threading.Lock()
+        self._activos = []
+
+    def iniciar(self):
+        with self._lock:
+            if self._activos:
+                return
+            for i in range(self.hilos):
+                hilo = threading.Thread(target=self._bucle,
+                                        name='derivados-%d' % i)
+                hilo.daemon = True
+                hilo.start()
+                self._activos.append(hilo)
+
+    def despertar(self):
+        self.iniciar()
+        self._evento.set()
+
+    def _bucle(self):
+        while True:
+            self._evento.clear()
+            try:
+                while self.procesar():
+                    pass
+            except Exception:
+                log.exception('Error procesando imágenes')
+            self._evento.wait(self.espera)
@@ -0,0 +1,70 @@
+# -*- encoding: utf-8 -*-
+"""Spatial index of points on an SQLite R*Tree.
+
+The R*Tree holds one degenerate box per row with coordinates, kept in
+sync by triggers. Box queries are answered by the R*Tree; radius
+queries use the box that encloses the circle and then the exact
+great-circle distance.
+"""
+import math
+
+RADIO_TIERRA_KM = 6371.0088
+
+KM_POR_GRADO = math.pi * RADIO_TIERRA_KM / 180
+
+
+def distancia_km(lat1, lon1, lat2, lon2):
+    """Haversine distance in kilometres, or None if a coordinate is missing."""
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2 +
+         math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def caja_radio(lat, lon, km):
+    """Box (oeste, sur, este, norte) enclosing the circle of `km` around
+    a point. Near the poles or the antimeridian it spans every longitude."""
+    dlat = km / KM_POR_GRADO
+    sur, norte = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    if sur == -90.0 or norte == 90.0:
+        return -180.0, sur, 180.0, norte
+    dlon = dlat / math.cos(math.radians(max(abs(sur), abs(norte))))
+    if lon - dlon < -180 or lon + dlon > 180:
+        return -180.0, sur, 180.0, norte
+    return lon - dlon, sur, lon + dlon, norte
+
+
+def validar_caja(oeste, sur, este, norte):
+    if not (-180 <= oeste <= este <= 180 and -90 <= sur <= norte <= 90):
+        raise ValueError('caja inválida')
+    return oeste, sur, este, norte
+
+
+def ddl(indice, tabla, latitud, longitud):
+    """Statements creating the R*Tree of `tabla` and its sync triggers."""
+    insertar = ('INSERT INTO {i} SELECT new.id, new."{lat}", new."{lat}", '
+                'new."{lon}", new."{lon}" '
+                'WHERE new."{lat}" IS NOT NULL AND new."{lon}" IS NOT NULL')
+    borrar = 'DELETE FROM {i} WHERE id = old.id'
+    sentencias = [
+        'CREATE VIRTUAL TABLE IF NOT EXISTS {i} USING rtree('
+        'id, lat_min, lat_max, lon_min, lon_max)',
+        'CREATE TRIGGER IF NOT EXISTS {i}_ai AFTER INSERT ON "{t}" '
+        'BEGIN %s; END' % insertar,
+        'CREATE TRIGGER IF NOT EXISTS {i}_ad AFTER DELETE ON "{t}" '
+        'BEGIN %s; END' % borrar,
+        'CREATE TRIGGER IF NOT EXISTS {i}_au AFTER UPDATE OF id, "{lat}", "{lon}" '
+        'ON "{t}" BEGIN %s; %s; END' % (borrar, insertar),
+    ]
+    return [s.format(i=indice, t=tabla, lat=latitud, lon=longitud)
+            for s in sentencias]
+
+
+def repoblar(indice, tabla, latitud, longitud):
+    """Statements that rebuild the R*Tree from `tabla`."""
+    return ['DELETE FROM %s' % indice,
+            'INSERT INTO {i} SELECT id, "{lat}", "{lat}", "{lon}", "{lon}" '
+            'FROM "{t}" WHERE "{lat}" IS NOT NULL AND "{lon}" IS NOT NULL'
+            .format(i=indice, t=tabla, lat=latitud, lon=longitud)]
@@ -0,0 +1,115 @@
+# -*- encoding: utf-8 -*-
+"""Statistics used to compare lithic subsets.
+
+Everything works on plain NumPy arrays built from aggregated counts, so
+callers only need to feed the rows of a GROUP BY query.
+"""
+import math
+
+import numpy as np
+
+
+def tabla_contingencia(filas, clave=None):
+    """Build a contingency table from (grupo, categoria, cantidad) rows.
+
+    Returns the group values and category values, sorted with `clave`,
+    and an integer matrix with one row per group and one column per
+    category.
+    """
+    grupos = sorted(set(f[0] for f in filas), key=clave)
+    categorias = sorted(set(f[1] for f in filas), key=clave)
+    if not filas:
+        return grupos, categorias, np.zeros((0, 0), dtype=np.int64)
+
+    indice_grupo = dict((g, i) for i, g in enumerate(grupos))
+    indice_categoria = dict((c, i) for i, c in enumerate(categorias))
+    tabla = np.zeros((len(grupos), len(categorias)), dtype=np.int64)
+    i = np.fromiter((indice_grupo[f[0]] for f in filas), dtype=np.intp)
+    j = np.fromiter((indice_categoria[f[1]] for f in filas), dtype=np.intp)
+    np.add.at(tabla, (i, j), np.fromiter((f[2] for f in filas), dtype=np.int64))
+    return grupos, categorias, tabla
+
+
+def _gamma_superior(a, x):
+    """Regularized upper incomplete gamma function Q(a, x)."""
+    if x <= 0:
+        return 1.0
+    if x < a + 1:
+        # Series expansion of the lower function
+        termino = suma = 1.0 / a
+        n = a
+        for _ in range(1000):
+            n += 1
+            termino *= x / n
+            suma += termino
+            if abs(termino) < abs(suma) * 1e-15:
+                break
+        return 1.0 - suma * math.exp(-x + a * math.log(x) - math.lgamma(a))
+
+    # Continued fraction (modified Lentz)
+    pequeno = 1e-300
+    b = x + 1 - a
+    c = 1 / pequeno
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = pequeno if abs(d) < pequeno else d
+        c = b + an / c
+        c = pequeno if abs(c) < pequeno else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(-x + a * math.log(x) - math.lgamma(a)) * h
+
+
+def chi_cuadrado(tabla):
+    """Pearson's chi-square test of independence.
+
+    Returns a dict with the statistic, degrees of freedom, p-value and
+    Cramér's V, or None when the table has fewer than two rows or columns.
+    """
+    tabla = np.asarray(tabla, dtype=float)
+    tabla = tabla[tabla.sum(axis=1) > 0][:, tabla.sum(axis=0) > 0]
+    if tabla.ndim != 2 or min(tabla.shape) < 2:
+        return None
+
+    total = tabla.sum()
+    esperados = np.outer(tabla.sum(axis=1), tabla.sum(axis=0)) / total
+    estadistico = float(((tabla - esperados) ** 2 / esperados).sum())
+    gl = (tabla.shape[0] - 1) * (tabla.shape[1] - 1)
+    return dict(chi2=estadistico,
+                gl=gl,
+                p=_gamma_superior(gl / 2.0, estadistico / 2.0),
+                v_cramer=math.sqrt(estadistico / (total * (min(tabla.shape) - 1))),
+                esperados_bajos=int((esperados < 5).sum()))
+
+
+def diversidad(tabla):
+    """Diversity indices for each row of a contingency table.
+
+    Returns a list of dicts with the number of pieces (n), the richness
+    (riqueza), Shannon's H, Pielou's evenness and Simpson's 1 - D.
+    """
+    tabla = np.asarray(tabla, dtype=float)
+    n = tabla.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = tabla / n[:, None]
+        shannon = -np.where(p > 0, p * np.log(p), 0).sum(axis=1)
+        simpson = 1 - (p ** 2).sum(axis=1)
+    riqueza = (tabla > 0).sum(axis=1)
+
+    indices = []
+    for i in range(tabla.shape[0]):
+        indices.append(dict(
+            n=int(n[i]),
+            riqueza=int(riqueza[i]),
+            shannon=float(shannon[i]) if n[i] else None,
+            equitatividad=(float(shannon[i] / math.log(riqueza[i]))
+                           if riqueza[i] > 1 else None),
+            simpson=float(simpson[i]) if n[i] else None))
+    return indices
@@ -0,0 +1,125 @@
+# -*- encoding: utf-8 -*-
+"""Streaming export of query rows as CSV, Parquet or Arrow.
+
+Rows are consumed in batches from any iterable (usually a query with
+``yield_per``) and each batch is encoded and yielded before the next one
+is fetched, so memory depends on the batch size and not on the number
+of rows. Parquet and Arrow need the optional pyarrow package.
+"""
+import csv
+import io
+import itertools
+
+from sqlalchemy import types
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+MIMETYPES = {'csv': 'text/csv',
+             'parquet': 'application/vnd.apache.parquet',
+             'arrow': 'application/vnd.apache.arrow.stream'}
+
+FORMATOS = ['csv', 'parquet', 'arrow'] if pyarrow is not None else ['csv']
+
+
+def lotes(filas, tamano):
+    """Split an iterable of rows into lists of at most `tamano` rows."""
+    filas = iter(filas)
+    while True:
+        lote = list(itertools.islice(filas, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def csv_stream(encabezados, filas, tamano_lote=1000):
+    """Yield the CSV text of `filas`, one chunk per batch."""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(encabezados)
+    for lote in lotes(filas, tamano_lote):
+        escritor.writerows(lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _Salida(object):
+    """Write-only file that hands out what was written since the last
+    call to `vaciar`, so the encoded bytes can be streamed."""
+
+    closed = False
+
+    def __init__(self):
+        self.partes = []
+        self.posicion = 0
+
+    def write(self, datos):
+        datos = bytes(datos)
+        self.partes.append(datos)
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.posicion
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def vaciar(self):
+        datos = b''.join(self.partes)
+        self.partes = []
+        return datos
+
+
+def tipo_arrow(tipo):
+    """Arrow type for a SQLAlchemy column type."""
+    if isinstance(tipo, types.Boolean):
+        return pyarrow.bool_()
+    if isinstance(tipo, types.Integer):
+        return pyarrow.int64()
+    if isinstance(tipo, (types.Float, types.Numeric)):
+        return pyarrow.float64()
+    if isinstance(tipo, types.DateTime):
+        return pyarrow.timestamp('us')
+    if isinstance(tipo, types.Date):
+        return pyarrow.date32()
+    return pyarrow.string()
+
+
+def columnar_stream(encabezados, tipos, filas, formato='parquet',
+                    tamano_lote=10000):
+    """Yield `filas` encoded as a Parquet file or an Arrow IPC stream.
+
+    `tipos` are the SQLAlchemy types of the columns. Each batch becomes a
+    Parquet row group or an Arrow record batch.
+    """
+    if pyarrow is None:
+        raise RuntimeError('Se necesita pyarrow para exportar en %s' % formato)
+    esquema = pyarrow.schema([(nombre, tipo_arrow(tipo))
+                              for nombre, tipo in zip(encabezados, tipos)])
+    salida = _Salida()
+    if formato == 'parquet':
+        escritor = pyarrow.parquet.ParquetWriter(salida, esquema)
+        escribir = escritor.write_table
+    else:
+        escritor = pyarrow.ipc.new_stream(salida, esquema)
+        escribir = escritor.write
+
+    for lote in lotes(filas, tamano_lote):
+        columnas = zip(*lote)
+        escribir(pyarrow.Table.from_arrays(
+            [pyarrow.array(columna, type=campo.type)
+             for columna, campo in zip(columnas, esquema)], schema=esquema))
+        yield salida.vaciar()
+    escritor.close()
+    yield salida.vaciar()
@@ -0,0 +1,13 @@
+# -*- encoding: utf-8 -*-
+"""Gunicorn settings: several worker processes, each with a few threads
+sharing its SQLite connection pool (SQLITE_POOL_TAMANO)."""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# Keep-alive lets the browser load a page of thumbnails on one connection
+keepalive = 5
+accesslog = '-'
@@ -0,0 +1,288 @@
+# -*- encoding: utf-8 -*-
+"""Bulk import of field spreadsheets (CSV or XLSX).
+
+Rows are validated against the columns of a model, using lookup dicts
+built once per process for the enum vocabularies, and inserted with
+executemany in batches. Invalid rows are reported and skipped, the rest
+of the file is still imported.
+"""
+import csv
+import datetime
+import enum
+import functools
+import io
+import os.path as op
+
+from sqlalchemy import inspect
+from sqlalchemy import types
+
+
+class ErrorImportacion(Exception):
+    pass
+
+
+class ErrorFila(ErrorImportacion):
+    pass
+
+
+class Resultado(object):
+    def __init__(self):
+        self.insertadas = 0
+        self.errores = []
+        self.columnas_ignoradas = []
+
+    def __repr__(self):
+        return '<Resultado insertadas=%d errores=%d>' % (self.insertadas,
+                                                       len(self.errores))
+
+
+def normalizar(texto):
+    return ' '.join(str(texto).strip().lower().split())
+
+
+def leer_planilla(archivo, nombre):
+    """Yield the rows of a CSV or XLSX file as dicts keyed by header.
+
+    `archivo` is a binary file object; the format is taken from the
+    extension of `nombre`. CSV files may be separated by commas or
+    semicolons.
+    """
+    if op.splitext(nombre)[1].lower() in ('.xlsx', '.xlsm'):
+        # Imported on use: it takes longer to load than the whole app
+        try:
+            import openpyxl
+        except ImportError:
+            raise ErrorImportacion('Se necesita openpyxl para leer archivos XLSX')
+        libro = openpyxl.load_workbook(archivo, read_only=True, data_only=True)
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = [str(e) if e is not None else '' for e in next(filas, [])]
+        for fila in filas:
+            yield dict(zip(encabezados, fila))
+        libro.close()
+        return
+
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    for fila in csv.DictReader(texto, dialect=dialecto):
+        yield fila
+
+
+class Importador(object):
+    """Validate and insert spreadsheet rows for one model.
+
+    Headers may be the attribute name (``long_pieza``) or the database
+    column name (``Cuadro o microsector``), in any case. Enum cells may
+    hold the label or the code of the vocabulary. `referencias` maps
+    extra headers to a foreign key, e.g. ``{'observacion':
+    ('observacion_id', {'nombre normalizado': id})}``. Attributes in
+    `excluir` are not read from the file but may be set by `completar`.
+    """
+
+    def __init__(self, modelo, referencias=None, excluir=()):
+        self.modelo = modelo
+        self.tabla = modelo.__table__
+        self.referencias = dict((normalizar(k), v)
+                                for k, v in (referencias or {}).items())
+
+        self.columnas = {}
+        self.claves = {}
+        for atributo in inspect(modelo).column_attrs:
+            columna = atributo.columns[0]
+            if columna.primary_key:
+                continue
+            self.columnas[atributo.key] = columna
+            if atributo.key in excluir:
+                continue
+            self.claves[normalizar(atributo.key)] = atributo.key
+            self.claves[normalizar(columna.name)] = atributo.key
+
+        self.vocabularios = {}
+        for atributo, columna in self.columnas.items():
+            clase = getattr(columna.type, 'enum_class', None)
+            if clase is not None:
+                self.vocabularios[atributo] = self._vocabulario(clase)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _vocabulario(clase):
+        vocabulario = {}
+        for miembro in clase:
+            vocabulario[normalizar(miembro.value)] = miembro
+        for miembro in clase:
+            vocabulario[normalizar(miembro.name)] = miembro
+        return vocabulario
+
+    def mapear(self, encabezados):
+        """Return {header: attribute or reference} and the unknown headers."""
+        mapa, ignorados = {}, []
+        for encabezado in encabezados:
+            if encabezado is None:
+                continue
+            clave = normalizar(encabezado)
+            if clave in self.claves:
+                mapa[encabezado] = self.claves[clave]
+            elif clave in self.referencias:
+                mapa[encabezado] = clave
+            elif clave:
+                ignorados.append(encabezado)
+        return mapa, ignorados
+
+    def _conversor(self, atributo):
+        """Build the function that turns a cell into a value for `atributo`."""
+        if atributo in self.referencias:
+            clave_foranea, ids = self.referencias[atributo]
+
+            def referencia(valor):
+                try:
+                    return ids[normalizar(valor)]
+                except KeyError:
+                    raise ErrorFila('%s: no existe %r' % (atributo, valor))
+            return clave_foranea, referencia
+
+        tipo = self.columnas[atributo].type
+
+        if atributo in self.vocabularios:
+            vocabulario = self.vocabularios[atributo]
+
+            def vocablo(valor):
+                if isinstance(valor, enum.Enum):
+                    return valor
+                try:
+                    return vocabulario[normalizar(valor)]
+                except KeyError:
+                    raise ErrorFila('%s: valor desconocido %r' % (atributo, valor))
+            conversor = vocablo
+        elif isinstance(tipo, types.Integer):
+            def entero(valor):
+                if isinstance(valor, str):
+                    valor = float(valor.strip().replace(',', '.'))
+                if float(valor) != int(valor):
+                    raise ValueError
+                return int(valor)
+            conversor = entero
+        elif isinstance(tipo, types.Float):
+            def real(valor):
+                if isinstance(valor, str):
+                    valor = valor.strip().replace(',', '.')
+                return float(valor)
+            conversor = real
+        elif isinstance(tipo, types.DateTime):
+            def fecha(valor):
+                if isinstance(valor, datetime.datetime):
+                    return valor
+                if isinstance(valor, datetime.date):
+                    return datetime.datetime(valor.year, valor.month, valor.day)
+                for formato in ('%Y-%m-%d', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S'):
+                    try:
+                        return datetime.datetime.strptime(valor.strip(), formato)
+                    except ValueError:
+                        pass
+                raise ValueError
+            conversor = fecha
+        else:
+            largo = getattr(tipo, 'length', None)
+
+            def texto(valor):
+                if isinstance(valor, float) and valor.is_integer():
+                    valor = int(valor)
+                valor = str(valor).strip()
+                if largo and len(valor) > largo:
+                    raise ErrorFila('%s: supera los %d caracteres' % (atributo, largo))
+                return valor
+            conversor = texto
+
+        def convertir(valor):
+            try:
+                return conversor(valor)
+            except (TypeError, ValueError, OverflowError):
+                raise ErrorFila('%s: valor inválido %r' % (atributo, valor))
+        return atributo, convertir
+
+    def plan(self, mapa, fijos=None):
+        """Precompute, for the headers in `mapa`, the attribute and
+        converter of each cell and the attributes every row must have."""
+        celdas = [(encabezado,) + self._conversor(atributo)
+                  for encabezado, atributo in mapa.items()]
+        atributos = set(a for e, a, c in celdas) | set(fijos or ())
+        obligatorios = [a for a, columna in self.columnas.items()
+                        if not columna.nullable and columna.default is None]
+        return celdas, sorted(atributos), obligatorios
+
+    def convertir(self, fila, plan, fijos=None):
+        """Turn a spreadsheet row into a dict of attribute values."""
+        celdas, atributos, obligatorios = plan
+        valores = dict.fromkeys(atributos)
+        for encabezado, atributo, conversor in celdas:
+            valor = fila.get(encabezado)
+            if valor is None or (isinstance(valor, str) and not valor.strip()):
+                continue
+            valores[atributo] = conversor(valor)
+        if fijos:
+            valores.update(fijos)
+        for atributo in obligatorios:
+            if valores.get(atributo) is None:
+                raise ErrorFila('%s: campo obligatorio' % atributo)
+        return valores
+
+    def _insertar(self, conexion, lote):
+        """executemany of `lote`, binding values with the column types but
+        without building a parameter dict per row."""
+        atributos = list(lote[0])
+        columnas = [self.columnas[a] for a in atributos]
+        sentencia = self.tabla.insert().compile(
+            dialect=conexion.dialect, column_keys=[c.key for c in columnas])
+        procesadores = [c.type.dialect_impl(conexion.dialect)
+                        .bind_processor(conexion.dialect) for c in columnas]
+        procesadores = [(a, p) for a, p in zip(atributos, procesadores)]
+
+        filas = [tuple(p(fila[a]) if p else fila[a] for a, p in procesadores)
+                 for fila in lote]
+        if sentencia.positional:
+            orden = [sentencia.binds[nombre].key for nombre in sentencia.positiontup]
+            posiciones = [[c.key for c in columnas].index(k) for k in orden]
+            parametros = [tuple(fila[i] for i in posiciones) for fila in filas]
+        else:
+            nombres = [sentencia.bind_names[sentencia.binds[c.key]]
+                       for c in columnas]
+            parametros = [dict(zip(nombres, fila)) for fila in filas]
+        conexion.execute(str(sentencia), parametros)
+
+    def importar(self, conexion, filas, fijos=None, completar=None,
+                 tamano_lote=5000):
+        """Validate `filas` and insert the valid ones through `conexion`.
+
+        `completar` is called with each batch of attribute dicts before
+        it is inserted, to fill derived columns. Nothing is committed:
+        the caller owns the transaction.
+        """
+        resultado = Resultado()
+        plan = None
+        lote = []
+
+        def volcar():
+            if completar is not None:
+                completar(lote)
+            self._insertar(conexion, lote)
+            resultado.insertadas += len(lote)
+            del lote[:]
+
+        # Row 1 is the header, so data starts at row 2
+        for numero, fila in enumerate(filas, 2):
+            if plan is None:
+                mapa, resultado.columnas_ignoradas = self.mapear(fila.keys())
+                plan = self.plan(mapa, fijos)
+            try:
+                lote.append(self.convertir(fila, plan, fijos))
+            except ErrorFila as error:
+                resultado.errores.append((numero, str(error)))
+                continue
+            if len(lote) >= tamano_lote:
+                volcar()
+        if lote:
+            volcar()
+        return resultado
@@ -0,0 +1,206 @@
+# -*- encoding: utf-8 -*-
+"""Request and SQL instrumentation.
+
+For every endpoint it keeps the number of requests, a histogram of their
+latency, the SQL statements they ran and the time spent in them, plus
+samples of the slowest recent statements. Counters live in the process:
+with several server processes each one reports its own.
+"""
+import collections
+import threading
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds of the histogram buckets, in seconds and in statements
+LIMITES_LATENCIA = (.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+LIMITES_CONSULTAS = (1, 2, 5, 10, 20, 50, 100)
+
+SIN_RUTA = '<sin ruta>'
+
+
+class Histograma(object):
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)
+        self.suma = 0
+        self.total = 0
+
+    def agregar(self, valor):
+        i = 0
+        while i < len(self.limites) and valor > self.limites[i]:
+            i += 1
+        self.cuentas[i] += 1
+        self.suma += valor
+        self.total += 1
+
+    def acumuladas(self):
+        """(upper bound, observations up to it) pairs, '+Inf' last."""
+        acumulada = 0
+        for limite, cuenta in zip(self.limites + ('+Inf',), self.cuentas):
+            acumulada += cuenta
+            yield limite, acumulada
+
+    def cuantil(self, q):
+        """Upper bound of the bucket holding the `q` quantile."""
+        for limite, acumulada in self.acumuladas():
+            if acumulada >= q * self.total:
+                return limite
+
+
+class Endpoint(object):
+
+    def __init__(self):
+        self.pedidos = collections.Counter()
+        self.latencia = Histograma(LIMITES_LATENCIA)
+        self.consultas = Histograma(LIMITES_CONSULTAS)
+        self.sql = 0.0
+
+
+class Registro(object):
+    """Thread-safe counters of one application."""
+
+    def __init__(self, lenta=.1, muestras=50):
+        self.lenta = lenta
+        self.lock = threading.Lock()
+        self.endpoints = collections.defaultdict(Endpoint)
+        self.lentas = collections.deque(maxlen=muestras)
+        self.inicio = time.time()
+
+    def pedido(self, endpoint, estado, segundos, consultas, sql):
+        with self.lock:
+            datos = self.endpoints[endpoint]
+            datos.pedidos[estado] += 1
+            datos.latencia.agregar(segundos)
+            datos.consultas.agregar(consultas)
+            datos.sql += sql
+
+    def sentencia(self, endpoint, texto, segundos):
+        if segundos >= self.lenta:
+            with self.lock:
+                self.lentas.append(dict(endpoint=endpoint, sentencia=texto,
+                                        segundos=segundos, momento=time.time()))
+
+    def resumen(self):
+        """One dict per endpoint, the most time consuming first."""
+        with self.lock:
+            filas = [dict(endpoint=nombre,
+                          pedidos=datos.latencia.total,
+                          errores=sum(n for estado, n in datos.pedidos.items()
+                                      if estado >= 500),
+                          latencia_media=datos.latencia.suma / datos.latencia.total,
+                          latencia_p95=datos.latencia.cuantil(.95),
+                          consultas_media=datos.consultas.suma / datos.consultas.total,
+                          consultas_max=datos.consultas.cuantil(1),
+                          sql_media=datos.sql / datos.latencia.total,
+                          tiempo_total=datos.latencia.suma)
+                     for nombre, datos in self.endpoints.items()]
+        return sorted(filas, key=lambda f: f['tiempo_total'], reverse=True)
+
+    def sentencias_lentas(self):
+        with self.lock:
+            return sorted(self.lentas, key=lambda s: s['segundos'], reverse=True)
+
+    def texto(self):
+        """The counters in the Prometheus text exposition format."""
+        lineas = []
+
+        def metrica(nombre, tipo, ayuda):
+            lineas.extend(['# HELP %s %s' % (nombre, ayuda), '# TYPE %s %s' % (nombre, tipo)])
+
+        def histograma(nombre, endpoint, datos):
+            for limite, acumulada in datos.acumuladas():
+                lineas.append('%s_bucket{endpoint="%s",le="%s"} %d'
+                              % (nombre, endpoint, limite, acumulada))
+            lineas.append('%s_sum{endpoint="%s"} %r' % (nombre, endpoint, datos.suma))
+            lineas.append('%s_count{endpoint="%s"} %d' % (nombre, endpoint, datos.total))
+
+        with self.lock:
+            endpoints = sorted((_etiqueta(n), d) for n, d in self.endpoints.items())
+            metrica('arqcheros_pedidos_total', 'counter', 'Pedidos atendidos.')
+            for nombre, datos in endpoints:
+                for estado, cantidad in sorted(datos.pedidos.items()):
+                    lineas.append('arqcheros_pedidos_total{endpoint="%s",estado="%d"} %d'
+                                  % (nombre, estado, cantidad))
+            metrica('arqcheros_latencia_segundos', 'histogram', 'Duración de los pedidos.')
+            for nombre, datos in endpoints:
+                histograma('arqcheros_latencia_segundos', nombre, datos.latencia)
+            metrica('arqcheros_consultas_por_pedido', 'histogram',
+                    'Sentencias SQL de cada pedido.')
+            for nombre, datos in endpoints:
+                histograma('arqcheros_consultas_por_pedido', nombre, datos.consultas)
+            metrica('arqcheros_sql_segundos_total', 'counter',
+                    'Tiempo de los pedidos en sentencias SQL.')
+            for nombre, datos in endpoints:
+                lineas.append('arqcheros_sql_segundos_total{endpoint="%s"} %r'
+                              % (nombre, datos.sql))
+            metrica('arqcheros_inicio_segundos', 'gauge', 'Inicio del registro (epoch).')
+            lineas.append('arqcheros_inicio_segundos %r' % self.inicio)
+        return '\n'.join(lineas) + '\n'
+
+
+def _etiqueta(texto):
+    return texto.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _registro():
+    if has_app_context():
+        return current_app.extensions.get('instrumentacion')
+
+
+def _antes_sentencia(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('instrumentacion', []).append(time.perf_counter())
+
+
+def _despues_sentencia(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get('instrumentacion')
+    if not inicios:
+        return
+    segundos = time.perf_counter() - inicios.pop()
+    registro = _registro()
+    if registro is None:
+        return
+    endpoint = None
+    if has_request_context() and 'instrumentacion' in g:
+        g.instrumentacion[1] += 1
+        g.instrumentacion[2] += segundos
+        endpoint = request.endpoint or SIN_RUTA
+    registro.sentencia(endpoint, statement, segundos)
+
+
+def _error_sentencia(contexto):
+    inicios = contexto.connection is not None and \
+        contexto.connection.info.get('instrumentacion')
+    if inicios:
+        inicios.pop()
+
+
+def _inicio_pedido():
+    # [start, statements, SQL seconds]
+    g.instrumentacion = [time.perf_counter(), 0, 0.0]
+
+
+def _fin_pedido(respuesta):
+    datos = g.pop('instrumentacion', None)
+    if datos is not None:
+        current_app.extensions['instrumentacion'].pedido(
+            request.endpoint or SIN_RUTA, respuesta.status_code,
+            time.perf_counter() - datos[0], datos[1], datos[2])
+    return respuesta
+
+
+def instalar(app, lenta=.1, muestras=50):
+    """Instrument the requests of `app` and the SQL statements they run.
+    Statements slower than `lenta` seconds are kept as samples."""
+    registro = Registro(lenta, muestras)
+    app.extensions['instrumentacion'] = registro
+    app.before_request(_inicio_pedido)
+    app.after_request(_fin_pedido)
+    if not event.contains(Engine, 'before_cursor_execute', _antes_sentencia):
+        event.listen(Engine, 'before_cursor_execute', _antes_sentencia)
+        event.listen(Engine, 'after_cursor_execute', _despues_sentencia)
+        event.listen(Engine, 'handle_error', _error_sentencia)
+    return registro
@@ -0,0 +1,62 @@
+# -*- encoding: utf-8 -*-
+"""Bulk edits and deletes.
+
+The rows to change are first copied, by id, to a temporary table: the
+statements that follow act on exactly those rows, even when deleting
+the rows of other tables changes what the original query selects.
+Deleting a row also deletes the rows that reference it through the
+one-to-many relationships of its model, recursively, with one DELETE
+per table whatever the number of rows.
+"""
+import contextlib
+
+from sqlalchemy import Column, Integer, MetaData, Table, inspect, select
+from sqlalchemy.orm.interfaces import ONETOMANY
+
+SELECCION = Table('seleccion_masiva', MetaData(),
+                  Column('id', Integer, primary_key=True),
+                  prefixes=['TEMPORARY'])
+
+
+@contextlib.contextmanager
+def seleccion(conexion, ids):
+    """Keep the ids selected by the query `ids` during the block; yields
+    a select of them. A rollback also drops the temporary table."""
+    SELECCION.drop(conexion, checkfirst=True)
+    SELECCION.create(conexion)
+    ids = ids.alias()
+    conexion.execute(SELECCION.insert().from_select(
+        ['id'], select([list(ids.c)[0]]).distinct()))
+    yield select([SELECCION.c.id])
+    SELECCION.drop(conexion)
+
+
+def dependientes(modelo, ids):
+    """(model, condition) of the rows that reference the rows of `modelo`
+    selected by `ids`, recursively. Each row comes before the rows it
+    references, the order in which they can be deleted."""
+    filas = []
+    for relacion in inspect(modelo).relationships:
+        if relacion.direction is not ONETOMANY:
+            continue
+        (_, remota), = relacion.local_remote_pairs
+        hijo = relacion.mapper.class_
+        condicion = remota.in_(ids)
+        ids_hijo = select([inspect(hijo).local_table.c.id]).where(condicion)
+        filas.extend(dependientes(hijo, ids_hijo))
+        filas.append((hijo, condicion))
+    return filas
+
+
+def borrar(conexion, modelo, ids):
+    """Delete the rows of `modelo` selected by `ids` and their dependents.
+    Returns the number of rows deleted per model name."""
+    borradas = {}
+    for hijo, condicion in dependientes(modelo, ids):
+        cantidad = conexion.execute(
+            inspect(hijo).local_table.delete().where(condicion)).rowcount
+        borradas[hijo.__name__] = borradas.get(hijo.__name__, 0) + cantidad
+    tabla = inspect(modelo).local_table
+    borradas[modelo.__name__] = conexion.execute(
+        tabla.delete().where(tabla.c.id.in_(ids))).rowcount
+    return borradas
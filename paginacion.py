@@ -0,0 +1,71 @@
+# -*- encoding: utf-8 -*-
+"""Keyset (seek) pagination.
+
+A page is read as the rows that follow, in the order of the sort column
+and then the id, the last row of the previous page. With an index on
+the sort column that reads only the rows of the page, however deep it
+is, where OFFSET walks and discards every row before it. SQLite sorts
+NULLs first in ascending order and last in descending order, so the
+rows after a key may span the NULL and the non-NULL runs of the index.
+"""
+import datetime
+import enum
+import json
+
+from sqlalchemy import and_, literal, tuple_, types
+
+
+def cursor(nombre, valor, id):
+    """Opaque text locating a row in the order of column `nombre`."""
+    if isinstance(valor, enum.Enum):
+        valor = valor.name
+    elif isinstance(valor, (datetime.date, datetime.datetime)):
+        valor = valor.isoformat()
+    return json.dumps([nombre, valor, id], separators=(',', ':'))
+
+
+def leer_cursor(texto, nombre, tipo=None):
+    """Sort value and id of a cursor on column `nombre` of type `tipo`,
+    or None if the text is not such a cursor."""
+    try:
+        columna, valor, id = json.loads(texto)
+        if columna != nombre or not isinstance(id, int):
+            return None
+        if valor is not None and isinstance(tipo, types.DateTime):
+            valor = datetime.datetime.fromisoformat(valor)
+        elif valor is not None and isinstance(tipo, types.Date):
+            valor = datetime.date.fromisoformat(valor)
+        elif getattr(tipo, 'enums', None) is not None and \
+                valor not in (None,) + tuple(tipo.enums):
+            return None
+    except (ValueError, TypeError):
+        return None
+    return valor, id
+
+
+def orden(columna, id, desc=False):
+    """ORDER BY clauses: the sort column, if any, then the id."""
+    clausulas = [] if columna is None else [columna]
+    clausulas.append(id)
+    return [c.desc() for c in clausulas] if desc else clausulas
+
+
+def tramos(columna, id, valor, ultimo_id, desc=False):
+    """Conditions on the rows after (`valor`, `ultimo_id`) in `orden`.
+
+    Each condition selects a consecutive run of that order and can be
+    answered by a range of the index on `columna`; the rows after the key
+    are the rows of the first condition, then those of the second. The
+    rows before a key are the rows after it in the opposite order.
+    """
+    if columna is None:
+        return [id < ultimo_id if desc else id > ultimo_id]
+    if valor is None:
+        if desc:
+            return [and_(columna == None, id < ultimo_id)]
+        return [and_(columna == None, id > ultimo_id), columna != None]
+    # Row values, unlike the equivalent OR, are searched in the index
+    clave = tuple_(literal(valor, columna.type), ultimo_id)
+    if desc:
+        return [tuple_(columna, id) < clave, columna == None]
+    return [tuple_(columna, id) > clave]
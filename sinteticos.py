@@ -0,0 +1,175 @@
+# -*- encoding: utf-8 -*-
+"""Deterministic synthetic collections.
+
+The same scale and seed always give the same rows. Enum columns are
+sampled from their vocabularies (with some missing values), measures
+from plausible ranges and observaciones are scattered over the
+northwest of Argentina. Rows are inserted with executemany in batches,
+with explicit ids after the highest existing ones, so a database of
+millions of pieces is built in constant memory.
+"""
+import datetime
+import itertools
+import random
+
+from sqlalchemy import func, inspect, select
+
+# Share of missing values in the optional enum columns
+FALTANTES = .1
+
+PROCEDIMIENTOS = ['Retoque', 'Microrretoque', 'Retalla', 'Adelgazamiento',
+                  'Astillamiento', 'Lascado simple', 'Picado', 'Pulido']
+
+CAPAS = ['Superficie', 'Capa 1', 'Capa 2', 'Capa 3', 'Capa 4', 'Capa 5']
+
+
+class Escala(object):
+    """Number of rows of each table for `artefactos` artefactos."""
+
+    def __init__(self, artefactos):
+        self.artefactos = artefactos
+        self.observaciones = max(1, artefactos // 200)
+        self.sitios = max(1, self.observaciones // 5)
+        self.detalles = artefactos // 2
+        self.desechos = artefactos
+        self.procedimientos = artefactos * 3 // 2
+        self.procedimientos_detalle = self.detalles
+        self.fotos = artefactos // 10
+
+    def __repr__(self):
+        return '<Escala %s>' % ' '.join('%s=%d' % item for item in sorted(vars(self).items()))
+
+
+def _vocabularios(columnas):
+    """(attribute, members, nullable) of the enum columns of a mapper."""
+    return [(nombre, list(columna.type.enum_class), columna.nullable)
+            for nombre, columna in columnas.items()
+            if getattr(columna.type, 'enum_class', None) is not None]
+
+
+def _enums(vocabularios, azar, fila):
+    """Fill the enum attributes missing from `fila`."""
+    for nombre, opciones, nulo in vocabularios:
+        if nombre not in fila:
+            fila[nombre] = None if nulo and azar.random() < FALTANTES \
+                else azar.choice(opciones)
+    return fila
+
+
+def _pieza(azar):
+    largo = max(5, int(azar.lognormvariate(3.6, .5)))
+    ancho = max(3, int(largo * azar.uniform(.4, 1.1)))
+    return dict(long_pieza=largo, ancho_pieza=ancho,
+                espesor_pieza=max(1, int(ancho * azar.uniform(.1, .5))))
+
+
+def _observaciones(columnas, escala, azar, primero):
+    for i in range(primero, primero + escala.observaciones):
+        sitio = azar.randrange(escala.sitios)
+        yield dict(id=i, nombre='Observación %d' % i,
+                   sitio='Sitio %d' % sitio, sigla='S%d' % sitio,
+                   capa=azar.choice(CAPAS), coleccion=str(azar.randint(1960, 2020)),
+                   operador='Operador %d' % azar.randrange(10),
+                   latitud=round(azar.uniform(-28, -22), 5),
+                   longitud=round(azar.uniform(-68, -64), 5),
+                   fecha=datetime.datetime(2000, 1, 1) + datetime.timedelta(
+                       days=azar.randrange(9000)),
+                   hoja=azar.randint(1, 200))
+
+
+def _artefactos(columnas, escala, azar, primero, observaciones):
+    vocabularios = _vocabularios(columnas)
+    for i in range(primero, primero + escala.artefactos):
+        fila = dict(id=i, nombre='Artefacto %d' % i, numero=i,
+                    observacion_id=azar.choice(observaciones),
+                    cuadro='C%d' % azar.randint(1, 40),
+                    ancho_talon=azar.randint(2, 40), peso_pieza=azar.randint(1, 500),
+                    angulo_bisel=azar.randint(15, 90),
+                    obs='Pieza sintética %d' % i if azar.random() < .3 else None,
+                    ubicacion_sustancia=None)
+        fila.update(_pieza(azar))
+        yield _enums(vocabularios, azar, fila)
+
+
+def _detalles(columnas, escala, azar, primero, artefactos):
+    vocabularios = _vocabularios(columnas)
+    for i in range(primero, primero + escala.detalles):
+        fila = dict(id=i, nombre='Detalle %d' % i, artefacto_id=azar.choice(artefactos),
+                    ancho_talon=azar.randint(2, 40), angulo_bisel=azar.randint(15, 90),
+                    ubicacion_pasiva=None)
+        fila.update(_pieza(azar))
+        yield _enums(vocabularios, azar, fila)
+
+
+def _desechos(columnas, escala, azar, primero, observaciones):
+    vocabularios = _vocabularios(columnas)
+    for i in range(primero, primero + escala.desechos):
+        sitio = azar.randrange(escala.sitios)
+        fila = dict(id=i, nombre='Desecho %d' % i, observacion_id=azar.choice(observaciones),
+                    sitio='Sitio %d' % sitio, sigla='S%d' % sitio,
+                    capa=azar.choice(CAPAS), cuadro='C%d' % azar.randint(1, 40),
+                    coleccion=str(azar.randint(1960, 2020)), lote=azar.randint(1, 50),
+                    ancho_talon=azar.randint(2, 40))
+        fila.update(_pieza(azar))
+        yield _enums(vocabularios, azar, fila)
+
+
+def _procedimientos(clave, cantidad):
+    def filas(columnas, escala, azar, primero, padres):
+        for i in range(primero, primero + getattr(escala, cantidad)):
+            yield {'id': i, 'nombre': azar.choice(PROCEDIMIENTOS), clave: azar.choice(padres)}
+    return filas
+
+
+def _fotos(clave):
+    def filas(columnas, escala, azar, primero, padres):
+        for i in range(primero, primero + escala.fotos):
+            huella = '%064x' % azar.getrandbits(256)
+            yield {'id': i, 'name': 'Foto %d' % i, clave: azar.choice(padres),
+                   'path': 'fotos/%s/%s/%s.jpg' % (huella[:2], huella[2:4], huella)}
+    return filas
+
+
+# (table, rows, parent table); parents are generated first
+GENERADORES = [
+    ('observacion', _observaciones, None),
+    ('artefacto', _artefactos, 'observacion'),
+    ('detalle', _detalles, 'artefacto'),
+    ('desecho', _desechos, 'observacion'),
+    ('procedimiento', _procedimientos('artefacto_id', 'procedimientos'), 'artefacto'),
+    ('procedimiento2', _procedimientos('detalle_id', 'procedimientos_detalle'), 'detalle'),
+    ('fotos_artefactos', _fotos('artefacto_id'), 'artefacto'),
+    ('fotos_desechos', _fotos('desecho_id'), 'desecho'),
+]
+
+
+def generar(conexion, modelos, artefactos, semilla=0, lote=5000, avance=None):
+    """Insert a synthetic collection of `artefactos` artefactos and the
+    rows that go with them. `modelos` maps the names in GENERADORES to
+    mapped classes. Returns a dict of the ids inserted in each table (as
+    ranges); `avance(nombre, cantidad)` is called after each batch."""
+    escala = Escala(artefactos)
+    ids = {}
+    for nombre, filas, padre in GENERADORES:
+        columnas = inspect(modelos[nombre]).columns
+        tabla = modelos[nombre].__table__
+        primero = (conexion.execute(select([func.max(tabla.c.id)])).scalar() or 0) + 1
+        # One generator per table: adding a table does not change the others
+        azar = random.Random('%s-%s' % (semilla, nombre))
+        argumentos = (columnas, escala, azar, primero)
+        if padre is not None:
+            argumentos += (ids[padre],)
+        generadas = filas(*argumentos)
+        insertadas = 0
+        while True:
+            bloque = list(itertools.islice(generadas, lote))
+            if not bloque:
+                break
+            # Rows are keyed by attribute, the table by column name
+            conexion.execute(tabla.insert(), [
+                dict((columnas[k].key, v) for k, v in fila.items()) for fila in bloque])
+            insertadas += len(bloque)
+            if avance:
+                avance(nombre, insertadas)
+        ids[nombre] = range(primero, primero + insertadas)
+    return ids
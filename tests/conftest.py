@@ -0,0 +1,31 @@
+# -*- encoding: utf-8 -*-
+import os.path as op
+import sys
+
+import pytest
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, op.dirname(op.dirname(op.abspath(__file__))))
+
+import arqcheros as a
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = a.create_app(dict(
+        SQLALCHEMY_DATABASE_URI='sqlite:///' + str(tmp_path / 'prueba.sqlite'),
+        FOTOS_DIR=str(tmp_path / 'fotos'), SQLALCHEMY_ECHO=False,
+        DEBUG=False, IMAGENES_HILOS=0))
+    with app.app_context():
+        yield app
+        a.db.session.remove()
+
+
+@pytest.fixture
+def cliente(app):
+    a.db.create_all()
+    a.db.session.add(a.User(login='prueba', password=generate_password_hash('prueba')))
+    a.db.session.commit()
+    cliente = app.test_client()
+    cliente.post('/admin/login/', data=dict(login='prueba', password='prueba'))
+    return cliente
@@ -0,0 +1,29 @@
+# -*- encoding: utf-8 -*-
+import json
+
+import pytest
+
+import api
+import arqcheros as a
+
+
+@pytest.mark.parametrize('formato', ['json', 'ndjson'])
+@pytest.mark.parametrize('limite', ['-1', '0', 'x'])
+def test_limite_invalido(app, cliente, formato, limite):
+    a.generar_datos(10, semilla=2)
+    respuesta = cliente.get('/api/artefactos?formato=%s&limite=%s' % (formato, limite))
+    assert respuesta.status_code == 400
+    assert 'limite' in respuesta.json['error']
+
+
+def test_limite(app, cliente):
+    a.generar_datos(api.MAXIMO + 20, semilla=2)
+    pagina = cliente.get('/api/artefactos?campos=id&limite=%d' % (api.MAXIMO * 2)).json
+    assert len(pagina['datos']) == api.MAXIMO
+    assert pagina['siguiente']
+    pagina = cliente.get(pagina['siguiente']).json
+    assert len(pagina['datos']) == 20 and pagina['siguiente'] is None
+
+    lineas = cliente.get('/api/artefactos?campos=id&formato=ndjson&limite=3') \
+        .get_data(as_text=True).splitlines()
+    assert [json.loads(linea)['id'] for linea in lineas] == [1, 2, 3]
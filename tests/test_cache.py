@@ -0,0 +1,48 @@
+# -*- encoding: utf-8 -*-
+import io
+
+import pytest
+from sqlalchemy import select
+
+import arqcheros as a
+import basedatos
+
+BUSQUEDA = '/admin/desecho/?search=marca'
+ANALISIS = '/admin/analisis/json?conjunto=desechos&agrupar_por=capa&variable=estado'
+
+
+def _marcado(nombre='marca 1'):
+    return select([a.Desecho.id]).where(a.Desecho.nombre == nombre)
+
+
+def _orm():
+    a.Desecho.query.filter_by(nombre='marca 1').one().nombre = 'marca 2'
+    a.db.session.commit()
+
+
+ESCRITURAS = [
+    (BUSQUEDA, _orm),
+    (BUSQUEDA, lambda: a.importar_planilla(
+        io.BytesIO('nombre;long_pieza\nmarca 3;12\n'.encode('utf-8')), 'desechos.csv',
+        'desechos')),
+    (BUSQUEDA, lambda: a.editar_en_bloque(a.Desecho, _marcado(), 'nombre', 'marca 4')),
+    (BUSQUEDA, lambda: a.borrar_en_bloque(a.Desecho, _marcado())),
+    (ANALISIS, lambda: a.generar_datos(20, semilla=9)),
+]
+
+
+@pytest.mark.parametrize('url, escribir', ESCRITURAS,
+                         ids=['orm', 'importar', 'editar', 'borrar', 'generar'])
+def test_escritura_invalida_pagina(app, cliente, url, escribir):
+    a.generar_datos(50, semilla=1)
+    a.db.session.add(a.Desecho(nombre='marca 1', long_pieza=10, ancho_pieza=5,
+                               espesor_pieza=2))
+    a.db.session.commit()
+    antes = cliente.get(url).get_data()
+    # Served from the cache: only the user and the versions are read
+    with basedatos.contar_consultas(a.db.engine, maximo=2):
+        assert cliente.get(url).get_data() == antes
+
+    escribir()
+    a.db.session.remove()
+    assert cliente.get(url).get_data() != antes
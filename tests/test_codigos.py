@@ -0,0 +1,49 @@
+# -*- encoding: utf-8 -*-
+import enum
+
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, select
+
+import codigos
+
+
+class Color(enum.Enum):
+    rojo = 'Rojo'
+    verde = 'Verde'
+    azul = 'Azul'
+
+
+def test_migrar_con_escrituras_en_curso(tmp_path):
+    engine = create_engine('sqlite:///' + str(tmp_path / 'codigos.sqlite'))
+    metadata = MetaData()
+    pieza = Table('pieza', metadata, Column('id', Integer, primary_key=True),
+                  Column('color', codigos.EnumEntero(Color)))
+    tablas = {Color: codigos.tabla_codigos(metadata, 'vocabulario_color', Color)}
+    tablas[Color].create(engine)
+    # The table as created before the codes, storing the names
+    engine.execute('CREATE TABLE pieza (id INTEGER PRIMARY KEY, color VARCHAR(5))')
+    engine.execute(pieza.insert(), [dict(id=i, color=Color.rojo) for i in range(1, 7)])
+    engine.execute("UPDATE pieza SET color = 'azul' WHERE id = 6")
+    engine.execute("INSERT INTO pieza VALUES (7, NULL)")
+
+    esperados = dict((i, Color.rojo) for i in range(1, 6))
+    esperados.update({6: Color.azul, 7: None})
+
+    lotes = []
+
+    def escribir(tabla, copiadas):
+        # Writes of the application, already binding codes, during the
+        # first batches of the copy
+        lotes.append(copiadas)
+        if len(lotes) > 3:
+            return
+        nuevo = max(esperados) + 1
+        engine.execute(pieza.insert(), dict(id=nuevo, color=Color.verde))
+        esperados[nuevo] = Color.verde
+        engine.execute(pieza.update().where(pieza.c.id == copiadas), color=Color.verde)
+        engine.execute(pieza.update().where(pieza.c.id == nuevo - 1), color=Color.azul)
+        esperados[copiadas] = Color.verde
+        esperados[nuevo - 1] = Color.azul
+
+    assert codigos.migrar_tabla(engine, pieza, tablas, lote=2, avance=escribir)
+    assert codigos.columnas_texto(engine.connect(), pieza) == []
+    assert dict(engine.execute(select([pieza.c.id, pieza.c.color])).fetchall()) == esperados
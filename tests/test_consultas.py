@@ -0,0 +1,22 @@
+# -*- encoding: utf-8 -*-
+import pytest
+
+import arqcheros as a
+import basedatos
+
+
+@pytest.mark.parametrize('url', ['/admin/artefacto/', '/admin/detalle/'])
+def test_consultas_por_pagina(app, cliente, url):
+    a.generar_datos(400, semilla=7)
+    # The first request also counts the rows, then kept for a while
+    cliente.get(url)
+    totales = []
+    for tamano in (20, 100):
+        a.db.session.remove()
+        with basedatos.contar_consultas(a.db.engine, maximo=15) as consultas:
+            respuesta = cliente.get('%s?page_size=%d' % (url, tamano))
+        assert respuesta.status_code == 200
+        assert respuesta.get_data(as_text=True).count('name="rowid"') == tamano
+        totales.append(consultas.total)
+    # Related rows are loaded per page, not per row
+    assert totales[0] == totales[1]
@@ -0,0 +1,44 @@
+# -*- encoding: utf-8 -*-
+import io
+
+import arqcheros as a
+import importacion
+
+PLANILLA = '''nombre;Capa o nivel;ESTADO;long_pieza;Lote;observacion
+a;c1;Entera o completa;10;1;Sitio 1
+b;c2;fracturada;11;2;
+c;;Inexistente;12;;
+d;;entera;inf;;
+e;;;12;1e400;
+f;;;12,5;;
+g;c3;ENTERA;13;;sitio 1
+h;;;14,0;3;
+'''
+
+
+def test_importar_csv(app):
+    a.db.create_all()
+    observacion = a.Observacion(nombre='Sitio 1')
+    a.db.session.add(observacion)
+    a.db.session.flush()
+    importador = importacion.Importador(a.Desecho, dict(
+        observacion=('observacion_id', {'sitio 1': observacion.id})))
+    lotes = []
+
+    resultado = importador.importar(
+        a.db.session.connection(),
+        importacion.leer_planilla(io.BytesIO(PLANILLA.encode('utf-8')), 'desechos.csv'),
+        completar=lambda lote: lotes.append(len(lote)), tamano_lote=2)
+
+    assert resultado.insertadas == 4
+    assert lotes == [2, 2]
+    assert [numero for numero, _ in resultado.errores] == [4, 5, 6, 7]
+    assert [error.split(':')[0] for _, error in resultado.errores] == \
+        ['estado', 'long_pieza', 'lote', 'long_pieza']
+    filas = [(d.nombre, d.capa, d.estado, d.long_pieza, d.lote, d.observacion_id)
+             for d in a.Desecho.query.order_by(a.Desecho.id)]
+    assert filas == [
+        ('a', 'c1', a.Estado['Entera o completa'], 10, 1, observacion.id),
+        ('b', 'c2', a.Estado['Fracturada'], 11, 2, None),
+        ('g', 'c3', a.Estado['Entera o completa'], 13, None, observacion.id),
+        ('h', None, None, 14, 3, None)]
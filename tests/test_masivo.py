@@ -0,0 +1,104 @@
+# -*- encoding: utf-8 -*-
+import json
+
+from sqlalchemy import func, select
+
+import arqcheros as a
+
+DEPENDIENTES = (a.Detalle, a.Procedimiento, a.Procedimiento2, a.FotosArtefactos)
+
+
+def _resumen():
+    return sorted(a.db.session.query(
+        a.Resumen.observacion_id, a.Resumen.conjunto, a.Resumen.variable,
+        a.Resumen.categoria, a.Resumen.cantidad, a.Resumen.suma_largo,
+        a.Resumen.suma_ancho, a.Resumen.suma_espesor).all(), key=repr)
+
+
+def _versiones():
+    return dict(a.db.session.execute(select([a.VERSIONES_CACHE.c.modelo,
+                                             a.VERSIONES_CACHE.c.version])).fetchall())
+
+
+def _artefacto(observacion, nombre, detalles=0):
+    artefacto = a.Artefacto(nombre=nombre, long_pieza=10, ancho_pieza=5, espesor_pieza=2,
+                            roca=list(a.Roca)[0], observacion=observacion)
+    artefacto.procedimientos = [a.Procedimiento(nombre='Procedimiento %d' % i)
+                                for i in range(2)]
+    artefacto.fotos = [a.FotosArtefactos(name=nombre, path='%s.jpg' % nombre)]
+    for i in range(detalles):
+        detalle = a.Detalle(nombre='%s.%d' % (nombre, i), ancho_pieza=3, espesor_pieza=1,
+                            subgrupos=list(a.Subgrupos)[i], artefacto=artefacto)
+        a.db.session.add(a.Procedimiento2(nombre='Procedimiento', detalle=detalle))
+    a.db.session.add(artefacto)
+    return artefacto
+
+
+def test_borrar_en_bloque(app):
+    a.db.create_all()
+    observacion = a.Observacion(nombre='obs')
+    borrado = _artefacto(observacion, 'borrado', detalles=2)
+    queda = _artefacto(observacion, 'queda', detalles=1)
+    a.db.session.commit()
+    foto = borrado.fotos[0].id
+    a.db.session.add(a.TrabajoImagen(tipo='artefacto', foto_id=foto, path='borrado.jpg'))
+    a.db.session.commit()
+    antes = dict((modelo, modelo.query.count()) for modelo in DEPENDIENTES)
+    versiones = _versiones()
+    id, otro = borrado.id, queda.id
+    a.db.session.remove()
+
+    borradas = a.borrar_en_bloque(
+        a.Artefacto, select([a.Artefacto.id]).where(a.Artefacto.id == id), None, 'N° %d' % id)
+
+    assert borradas == dict(Artefacto=1, Detalle=2, Procedimiento=2, Procedimiento2=2,
+                            FotosArtefactos=1)
+    assert [i for i, in a.db.session.query(a.Artefacto.id)] == [otro]
+    for modelo in DEPENDIENTES:
+        assert modelo.query.count() == antes[modelo] - borradas[modelo.__name__]
+    assert a.Detalle.query.filter(a.Detalle.artefacto_id == id).count() == 0
+    assert a.Procedimiento2.query.join(a.Detalle).count() == a.Procedimiento2.query.count()
+    assert a.TrabajoImagen.query.filter_by(foto_id=foto).count() == 0
+
+    cambio = a.CambioMasivo.query.one()
+    assert (cambio.accion, cambio.modelo, cambio.filas) == ('borrar', 'Artefacto', 1)
+    assert json.loads(cambio.detalle) == dict(ids=[id], borradas=borradas)
+    assert all(_versiones()[modelo] > versiones.get(modelo, 0) for modelo in borradas)
+
+    mantenido = _resumen()
+    a.reconstruir_resumen()
+    assert mantenido == _resumen()
+
+
+def test_editar_medida_en_bloque(app):
+    a.db.create_all()
+    observacion = a.Observacion(nombre='obs')
+    artefactos = [_artefacto(observacion, 'a%d' % i) for i in range(3)]
+    a.db.session.commit()
+    ids = [artefacto.id for artefacto in artefactos]
+    versiones = _versiones()
+    a.db.session.remove()
+
+    filas = a.editar_en_bloque(
+        a.Artefacto, select([a.Artefacto.id]).where(a.Artefacto.id.in_(ids[:2])),
+        'long_pieza', 150, None, 'prueba')
+
+    assert filas == 2
+    medidas = a.db.session.query(a.Artefacto.id, a.Artefacto.long_pieza,
+                                 a.Artefacto.clase_tamano, a.Artefacto.razon_largo_ancho) \
+        .order_by(a.Artefacto.id).all()
+    assert medidas == [(ids[0], 150, a.codigo_tamano(150, 5), a.cociente(150, 5)),
+                       (ids[1], 150, a.codigo_tamano(150, 5), a.cociente(150, 5)),
+                       (ids[2], 10, a.codigo_tamano(10, 5), a.cociente(10, 5))]
+    assert a.db.session.query(func.sum(a.Resumen.suma_largo)).filter(
+        a.Resumen.conjunto == 'artefactos', a.Resumen.variable == 'roca').scalar() == 310
+
+    cambio = a.CambioMasivo.query.one()
+    assert (cambio.accion, cambio.campo, cambio.valor, cambio.filas) == \
+        ('editar', 'long_pieza', '150', 2)
+    assert json.loads(cambio.detalle) == dict(anteriores=[[10, ids[:2]]])
+    assert _versiones()['Artefacto'] > versiones['Artefacto']
+
+    mantenido = _resumen()
+    a.reconstruir_resumen()
+    assert mantenido == _resumen()
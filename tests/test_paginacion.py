@@ -0,0 +1,35 @@
+# -*- encoding: utf-8 -*-
+import html
+import re
+
+import arqcheros as a
+
+
+def _pagina(cliente, url):
+    texto = cliente.get(url).get_data(as_text=True)
+    ids = [int(id) for id in re.findall(r'name="rowid" class="action-checkbox" value="(\d+)"', texto)]
+    enlaces = dict((direccion, html.unescape(url)) for url, direccion in
+                   re.findall(r'href="(/admin/artefacto/\?[^"]*&amp;(tras|antes)=[^"]*)"', texto))
+    return ids, enlaces
+
+
+def test_paginas_por_tamano(app, cliente):
+    a.generar_datos(55, semilla=3)
+    vista = [v for v in a.registrar_admin(app)._views if isinstance(v, a.ArtefactoAdmin)][0]
+    orden = [nombre for nombre, _ in vista._list_columns].index('tamano')
+
+    esperados = [id for id, in a.db.session.query(a.Artefacto.id)
+                 .order_by(a.Artefacto.clase_tamano, a.Artefacto.id)]
+    primera = '/admin/artefacto/?sort=%d' % orden
+    ids, enlaces = _pagina(cliente, primera)
+    paginas = [ids]
+    while 'tras' in enlaces:
+        ids, enlaces = _pagina(cliente, enlaces['tras'])
+        paginas.append(ids)
+    assert len(paginas) > 2
+    assert sum(paginas, []) == esperados
+
+    # And back from the last page; the first one needs no cursor
+    for anterior in reversed(paginas[:-1]):
+        ids, enlaces = _pagina(cliente, enlaces.get('antes', primera))
+        assert ids == anterior
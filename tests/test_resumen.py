@@ -0,0 +1,37 @@
+# -*- encoding: utf-8 -*-
+import arqcheros as a
+import basedatos
+
+
+def _resumen():
+    return sorted(a.db.session.query(
+        a.Resumen.observacion_id, a.Resumen.conjunto, a.Resumen.variable,
+        a.Resumen.categoria, a.Resumen.cantidad, a.Resumen.suma_largo,
+        a.Resumen.suma_ancho, a.Resumen.suma_espesor).all(), key=repr)
+
+
+def test_resumen_tras_ediciones(app):
+    a.generar_datos(200, semilla=5)
+    otra = a.Observacion(nombre='otra')
+    a.db.session.add(otra)
+    artefactos = a.Artefacto.query.order_by(a.Artefacto.id).limit(4).all()
+    artefactos[0].roca = list(a.Roca)[2]
+    artefactos[1].long_pieza = (artefactos[1].long_pieza or 0) + 37
+    artefactos[2].observacion = otra
+    detalle = a.Detalle.query.first()
+    detalle.subgrupos = list(a.Subgrupos)[1]
+    a.db.session.delete(a.Detalle.query.order_by(a.Detalle.id.desc()).first())
+    a.db.session.delete(a.Desecho.query.first())
+    a.db.session.add(a.Desecho(nombre='nuevo', long_pieza=20, ancho_pieza=10,
+                               espesor_pieza=3, observacion=otra))
+    a.db.session.commit()
+
+    # A column no variable reads leaves the summary alone
+    artefactos[3].obs = 'revisado'
+    with basedatos.contar_consultas(a.db.engine) as consultas:
+        a.db.session.commit()
+    assert not [c for c in consultas if 'resumen' in c]
+
+    mantenido = _resumen()
+    a.reconstruir_resumen()
+    assert mantenido == _resumen()
@@ -0,0 +1,435 @@
+# -*- encoding: utf-8 -*-
+"""Controlled vocabularies of the recording forms.
+
+Each vocabulary is an Enum named after the label shown to the user; the
+database stores the position of the member, see codigos. VOCABULARIOS holds, for each of them,
+what forms, filters and the API need, computed once at import.
+"""
+import enum
+import hashlib
+import json
+from collections import OrderedDict
+
+from markupsafe import Markup
+
+Subgrupos = enum.Enum("Grupos y subgrupos", [
+("Tajadores (Chopper) con filo de sección asimétrica: Cóncavo (Lateral, frontal)","Tajadores_Chopper_con_filo_de_sección_asimétrica_Cóncavo_Lateral_frontal"),
+("Tajadores (Chopper) con filo de sección asimétrica: Convexo (Lateral, frontal)","Tajadores_Chopper_con_filo_de_sección_asimétrica_Convexo_Lateral_frontal"),
+("Tajadores (Chopper) con filo de sección asimétrica: Fragmentos no diferenciados","Tajadores_Chopper_con_filo_de_sección_asimétrica_Fragmentos_no_diferenciados"),
+("Unifaces: con arista sinuosa irregular","Unifaces_con_arista_sinuosa_irregular"),
+("Unifaces: con arista sinuosa regularizada","Unifaces_con_arista_sinuosa_regularizada"),
+("Unifaces: fragmentos no diferenciados","Unifaces_fragmentos_no_diferenciados"),
+("Bifaces:  con arista sinuosa irregular","Bifaces_con_arista_sinuosa_irregular"),
+("Bifaces:  con arista sinuosa regularizada","Bifaces_con_arista_sinuosa_regularizada"),
+("Bifaces:  fragmentos no diferenciados","Bifaces_fragmentos_no_diferenciados"),
+("Piezas foliaceas: con arista sinuosa irregular","Piezas_foliaceas_con_arista_sinuosa_irregular"),
+("Piezas foliaceas: con arista sinuosa regularizada","Piezas_foliaceas_con_arista_sinuosa_regularizada"),
+("Piezas foliaceas: fragmentos no diferenciados","Piezas_foliaceas_fragmentos_no_diferenciados"),
+("Filos largos de arista sinuosa, bisel simétrico o asimétrico bifacial: Recto (Lateral, frontal)","Filos_largos_de_arista_sinuosa_bisel_simétrico_o_asimétrico_bifacial_Recto_Lateral_frontal"),
+("Filos largos de arista sinuosa, bisel simétrico o asimétrico bifacial: Cóncavo (Lateral, frontal)","Filos_largos_de_arista_sinuosa_bisel_simétrico_o_asimétrico_bifacial_Cóncavo_Lateral_frontal"),
+("Filos largos de arista sinuosa, bisel simétrico o asimétrico bifacial: Convexo (Lateral, frontal)","Filos_largos_de_arista_sinuosa_bisel_simétrico_o_asimétrico_bifacial_Convexo_Lateral_frontal"),
+("Filos largos de arista sinuosa, bisel simétrico o asimétrico bifacial: Fragmento no diferenciado","Filos_largos_de_arista_sinuosa_bisel_simétrico_o_asimétrico_bifacial_Fragmento_no_diferenciado"),
+("Picos, artefactos de retalla extendida, bifacial o unifacial, de tamano muy grande o grandísimo, con extremo distal en punta de sección triédrica o romboidal muy gruesa: con arista sinuosa irregular","Picos_artefactos_de_retalla_extendida_bifacial_o_unifacial_de_tamano_muy_grande_o_grandísimo_con_extremo_distal_en_punta_de_sección_triédrica_o_romboidal_muy_gruesa_con_arista_sinuosa_irregular"),
+("Picos, artefactos de retalla extendida, bifacial o unifacial, de tamano muy grande o grandísimo, con extremo distal en punta de sección triédrica o romboidal muy gruesa: con arista sinuosa regularizada","Picos_artefactos_de_retalla_extendida_bifacial_o_unifacial_de_tamano_muy_grande_o_grandísimo_con_extremo_distal_en_punta_de_sección_triédrica_o_romboidal_muy_gruesa_con_arista_sinuosa_regularizada"),
+("Picos, artefactos de retalla extendida, bifacial o unifacial, de tamano muy grande o grandísimo, con extremo distal en punta de sección triédrica o romboidal muy gruesa: fragmentos no diferenciados","Picos_artefactos_de_retalla_extendida_bifacial_o_unifacial_de_tamano_muy_grande_o_grandísimo_con_extremo_distal_en_punta_de_sección_triédrica_o_romboidal_muy_gruesa_fragmentos_no_diferenciados"),
+("Palas: lajas o lascas muy grandes o grandísimas, con filo transversal de retalla y/o retoque marginal o periférico;sector de prehensión o enmangue esbozado, destacado o diferenciado","Palas_lajas_o_lascas_muy_grandes_o_grandísimas_con_filo_transversal_de_retalla_y/o_retoque_marginal_o_periférico;sector_de_prehensión_o_enmangue_esbozado_destacado_o_diferenciado"),
+("Cepillos (Rabot): Filo largo convexo (Lateral, frontal)","Cepillos_Rabot_Filo_largo_convexo_Lateral_frontal"),
+("Cepillos (Rabot): Filo largo recto (lateral, frontal)","Cepillos_Rabot_Filo_largo_recto_lateral_frontal"),
+("Cepillos (Rabot): Filo corto convexo (Lateral, frontal)","Cepillos_Rabot_Filo_corto_convexo_Lateral_frontal"),
+("Cepillos (Rabot): Filo corto recto (idem.)","Cepillos_Rabot_Filo_corto_recto_idem."),
+("Cepillos (Rabot): Filo restringido convexo (Lateral, frontal)","Cepillos_Rabot_Filo_restringido_convexo_Lateral_frontal"),
+("Cepillos (Rabot): Filo restringido  recto (Lateral, frontal)","Cepillos_Rabot_Filo_restringido_recto_Lateral_frontal"),
+("Cepillos (Rabot): Fragmentos no diferenciados","Cepillos_Rabot_Fragmentos_no_diferenciados"),
+("Raspadores: de filo corto (Lateral, frontal)","Raspadores_de_filo_corto_Lateral_frontal"),
+("Raspadores: de filo restringido (Lateral, frontal, angular)","Raspadores_de_filo_restringido_Lateral_frontal_angular"),
+("Raspadores: de filo largo (Lateral, frontal)","Raspadores_de_filo_largo_Lateral_frontal"),
+("Raspadores: de filo extendido (Fronto-lateral, fronto-bilateral)","Raspadores_de_filo_extendido_Fronto-lateral_fronto-bilateral"),
+("Raspadores: de filo perimetral","Raspadores_de_filo_perimetral"),
+("Raspadores: fragmentos no diferenciados","Raspadores_fragmentos_no_diferenciados"),
+("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  de filo corto (Lateral, frontal)","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._de_filo_corto_Lateral_frontal"),
+("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  de filo restringido (Lateral, frontal, angular)","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._de_filo_restringido_Lateral_frontal_angular"),
+("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  de filo largo (Lateral, frontal)","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._de_filo_largo_Lateral_frontal"),
+("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  de filo extendido (Fronto-lateral, fronto-bilateral)","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._de_filo_extendido_Fronto-lateral_fronto-bilateral"),
+("Raclettes (filo asimétrico, abrupto u oblicuo, de microret.ultramarg.):  fragmentos no diferenciados","Raclettes_filo_asimétrico_abrupto_u_oblicuo_de_microret.ultramarg._fragmentos_no_diferenciados"),
+("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filo convexo(Lateral, frontal)","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filo_convexo(Lateral_frontal"),
+("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filo recto (Lateral, frontal)","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filo_recto_Lateral_frontal"),
+("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filo concavo (Lateral, frontal)","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filo_concavo_Lateral_frontal"),
+("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filos convergentes en apice romo","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filos_convergentes_en_apice_romo"),
+("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: de filos convergentes en punta","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_de_filos_convergentes_en_punta"),
+("Raederas. Artefactos de filos largos, de bisel unifacial o bifacial, con sección asimétricay ángulos de filo ≥ a 50º: Fragmentos no diferenciado","Raederas._Artefactos_de_filos_largos_de_bisel_unifacial_o_bifacial_con_sección_asimétricay_ángulos_de_filo_≥_a_50º_Fragmentos_no_diferenciado"),
+("Laminas retocadas: de filo convexo","Laminas_retocadas_de_filo_convexo"),
+("Laminas retocadas: de filo recto","Laminas_retocadas_de_filo_recto"),
+("Laminas retocadas: de filo concavo","Laminas_retocadas_de_filo_concavo"),
+("Laminas retocadas: de filos convergentes en apice romo","Laminas_retocadas_de_filos_convergentes_en_apice_romo"),
+("Laminas retocadas: de filos convergentes en punta","Laminas_retocadas_de_filos_convergentes_en_punta"),
+("Laminas retocadas: de filos recto/concavos con escotaduras contrapuestas [Láminas estranguladas]","Laminas_retocadas_de_filos_recto/concavos_con_escotaduras_contrapuestas_Láminas_estranguladas"),
+("Laminas retocadas: fragmentos no diferenciados","Laminas_retocadas_fragmentos_no_diferenciados"),
+("Raederas-raspadores (Limaces) .Artefactos con filo perimetral en bisel obicuo o abrupto, sección asimétrica y módulo laminar","Raederas-raspadores_Limaces_.Artefactos_con_filo_perimetral_en_bisel_obicuo_o_abrupto_sección_asimétrica_y_módulo_laminar"),
+("Cuchillos de filo formatizado: de filo convexo(Lateral, frontal)","Cuchillos_de_filo_formatizado_de_filo_convexo(Lateral_frontal"),
+("Cuchillos de filo formatizado: de filo recto (Lateral, frontal)","Cuchillos_de_filo_formatizado_de_filo_recto_Lateral_frontal"),
+("Cuchillos de filo formatizado: de filo concavo (Lateral, frontal)","Cuchillos_de_filo_formatizado_de_filo_concavo_Lateral_frontal"),
+("Cuchillos de filo formatizado: de filos convergentes en apice romo","Cuchillos_de_filo_formatizado_de_filos_convergentes_en_apice_romo"),
+("Cuchillos de filo formatizado: de filos convergentes en punta","Cuchillos_de_filo_formatizado_de_filos_convergentes_en_punta"),
+("Cuchillos de filo formatizado: fragmentos no diferenciados","Cuchillos_de_filo_formatizado_fragmentos_no_diferenciados"),
+("Cuchillos de filo natural con dorso formatizado: de filo convexo(Lateral, frontal)","Cuchillos_de_filo_natural_con_dorso_formatizado_de_filo_convexo(Lateral_frontal"),
+("Cuchillos de filo natural con dorso formatizado: de filo recto (Lateral, frontal)","Cuchillos_de_filo_natural_con_dorso_formatizado_de_filo_recto_Lateral_frontal"),
+("Cuchillos de filo natural con dorso formatizado: de filo concavo (Lateral, frontal)","Cuchillos_de_filo_natural_con_dorso_formatizado_de_filo_concavo_Lateral_frontal"),
+("Cuchillos de filo natural con dorso formatizado: fragmentos no diferenciados","Cuchillos_de_filo_natural_con_dorso_formatizado_fragmentos_no_diferenciados"),
+("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: de filo convexo (Lateral, frontal o angular)","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_de_filo_convexo_Lateral_frontal_o_angular"),
+("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: de filo recto (Lateral, frontal o angular)","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_de_filo_recto_Lateral_frontal_o_angular"),
+("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: de filos convergentes en apice romo","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_de_filos_convergentes_en_apice_romo"),
+("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: de filos convergentes en punta","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_de_filos_convergentes_en_punta"),
+("Cortantes (trinchetas). Artefactos de filo corto o restringido de sección asimétrica con angulos menores a 50º o de sección simétrica -de bisel simple o doble-. Excepcion: tamanos pequenos o medianos pequenos con filo perimetral o largo: fragmentos no diferenciados","Cortantes_trinchetas)._Artefactos_de_filo_corto_o_restringido_de_sección_asimétrica_con_angulos_menores_a_50º_o_de_sección_simétrica_-de_bisel_simple_o_doble-._Excepcion_tamanos_pequenos_o_medianos_pequenos_con_filo_perimetral_o_largo_fragmentos_no_diferenciados"),
+("Grupo de las cunas, gubias y escoplos 	sección simétrica o asimétrica: Cuna (filo corto de bisel simetrico, convexo o recto)","Grupo_de_las_cunas_gubias_y_escoplos_	sección_simétrica_o_asimétrica_Cuna_filo_corto_de_bisel_simetrico_convexo_o_recto"),
+("Grupo de las cunas, gubias y escoplos 	sección simétrica o asimétrica: Gubia (arista cóncavilínea en norma sagital o lateral,simet.ó asim., recta o cóncava)","Grupo_de_las_cunas_gubias_y_escoplos_	sección_simétrica_o_asimétrica_Gubia_arista_cóncavilínea_en_norma_sagital_o_lateral,simet.ó_asim._recta_o_cóncava"),
+("Grupo de las cunas, gubias y escoplos 	sección simétrica o asimétrica: Escoplo (filos rectos, bisel asimétrico)","Grupo_de_las_cunas_gubias_y_escoplos_	sección_simétrica_o_asimétrica_Escoplo_filos_rectos_bisel_asimétrico"),
+("Grupo de las cunas, gubias y escoplos 	sección simétrica o asimétrica: fragmentos no diferenciados","Grupo_de_las_cunas_gubias_y_escoplos_	sección_simétrica_o_asimétrica_fragmentos_no_diferenciados"),
+("Muescas: retocada o microrretocada","Muescas_retocada_o_microrretocada"),
+("Muescas: de lascado simple","Muescas_de_lascado_simple"),
+("Raspadores-denticulados: de filo corto (Lateral, frontal)","Raspadores-denticulados_de_filo_corto_Lateral_frontal"),
+("Raspadores-denticulados: de filo restringido (Lateral, frontal, angular)","Raspadores-denticulados_de_filo_restringido_Lateral_frontal_angular"),
+("Raspadores-denticulados: de filo largo (Lateral, frontal)","Raspadores-denticulados_de_filo_largo_Lateral_frontal"),
+("Raspadores-denticulados: de filo extendido (Fronto-lateral, fronto-bilateral)","Raspadores-denticulados_de_filo_extendido_Fronto-lateral_fronto-bilateral"),
+("Raspadores-denticulados: de filo perimetral","Raspadores-denticulados_de_filo_perimetral"),
+("Raspadores-denticulados: fragmentos no diferenciados","Raspadores-denticulados_fragmentos_no_diferenciados"),
+("Cuchillos-denticulados: de filo convexo (Lateral, frontal o angular)","Cuchillos-denticulados_de_filo_convexo_Lateral_frontal_o_angular"),
+("Cuchillos-denticulados: de filo recto (Lateral, frontal o angular)","Cuchillos-denticulados_de_filo_recto_Lateral_frontal_o_angular"),
+("Cuchillos-denticulados: de filos convergentes en apice romo","Cuchillos-denticulados_de_filos_convergentes_en_apice_romo"),
+("Cuchillos-denticulados: de filos convergentes en punta","Cuchillos-denticulados_de_filos_convergentes_en_punta"),
+("Cuchillos-denticulados: fragmentos no diferenciados","Cuchillos-denticulados_fragmentos_no_diferenciados"),
+("Cortantes-denticulados: de filo restringido (Lateral, frontal, angular)","Cortantes-denticulados_de_filo_restringido_Lateral_frontal_angular"),
+("Cortantes-denticulados: de filo corto menor a 2 cm ","Cortantes-denticulados_de_filo_corto_menor_a_2_cm_"),
+("Cortantes-denticulados: de filo largo de 3cm o menor (Lateral, frontal)","Cortantes-denticulados_de_filo_largo_de_3cm_o_menor_Lateral_frontal"),
+("Cortantes-denticulados: de filo extendido en piezas menores a 3cm. (Fronto-lateral, fronto-bilateral)","Cortantes-denticulados_de_filo_extendido_en_piezas_menores_a_3cm._Fronto-lateral_fronto-bilateral"),
+("Cortantes-denticulados: de filo perrimetral, en piezas menores a 3cm de long.o ancho máximo.","Cortantes-denticulados_de_filo_perrimetral_en_piezas_menores_a_3cm_de_long.o_ancho_máximo."),
+("Cepillos-denticulados: de filo corto (Lateral, frontal)","Cepillos-denticulados_de_filo_corto_Lateral_frontal"),
+("Cepillos-denticulados: de filo restringido (Lateral, frontal, angular)","Cepillos-denticulados_de_filo_restringido_Lateral_frontal_angular"),
+("Cepillos-denticulados: de filo largo (Lateral, frontal)","Cepillos-denticulados_de_filo_largo_Lateral_frontal"),
+("Cepillos-denticulados: de filo extendido (Fronto-lateral, fronto-bilateral)","Cepillos-denticulados_de_filo_extendido_Fronto-lateral_fronto-bilateral"),
+("Cepillos-denticulados: de filo perimetral","Cepillos-denticulados_de_filo_perimetral"),
+("Cepillos-denticulados: fragmentos no diferenciados","Cepillos-denticulados_fragmentos_no_diferenciados"),
+("Puntas entre muescas:  Grupo de los artefactos burilantes","Puntas_entre_muescas_Grupo_de_los_artefactos_burilantes"),
+("Puntas entre muescas: Punta burilante simple","Puntas_entre_muescas_Punta_burilante_simple"),
+("Puntas entre muescas: Punta burilante de arista oblicua","Puntas_entre_muescas_Punta_burilante_de_arista_oblicua"),
+("Puntas entre muescas: Muesca burilante","Puntas_entre_muescas_Muesca_burilante"),
+("Puntas entre muescas: Buril","Puntas_entre_muescas_Buril"),
+("Perforadores: Punta de sección asimetrica (axial,angular), base de prehensión o enmangue format.","Perforadores_Punta_de_sección_asimetrica_axial,angular_base_de_prehensión_o_enmangue_format."),
+("Perforadores: Punta de sección asimétrica (axial,angular), base de prehensión o enmangue no formatizado.","Perforadores_Punta_de_sección_asimétrica_axial,angular_base_de_prehensión_o_enmangue_no_formatizado."),
+("Perforadores: Punta de sección simétrica (axial,angular), base de prehensión o enmangue formatizado","Perforadores_Punta_de_sección_simétrica_axial,angular_base_de_prehensión_o_enmangue_formatizado"),
+("Perforadores: Punta de sección simétrica (axial,angular), base de prehensión o enmangue no formatizado","Perforadores_Punta_de_sección_simétrica_axial,angular_base_de_prehensión_o_enmangue_no_formatizado"),
+("Perforadores: Fragmentos no diferenciados","Perforadores_Fragmentos_no_diferenciados"),
+("Puntas de proyectil (cabezales líticos): Apedunculada (forma geométrica del limbo) con aletas","Puntas_de_proyectil_cabezales_líticos_Apedunculada_forma_geométrica_del_limbo_con_aletas"),
+("Puntas de proyectil (cabezales líticos): Apedunculada (forma geom.del limbo) sin aletas","Puntas_de_proyectil_cabezales_líticos_Apedunculada_forma_geom.del_limbo_sin_aletas"),
+("Puntas de proyectil (cabezales líticos): Preforma de punta apedunculada","Puntas_de_proyectil_cabezales_líticos_Preforma_de_punta_apedunculada"),
+("Puntas de proyectil (cabezales líticos): Fragmento proximal de punta apedunculada","Puntas_de_proyectil_cabezales_líticos_Fragmento_proximal_de_punta_apedunculada"),
+("Puntas de proyectil (cabezales líticos): Pedúnculo esbozado, limbo (forma geom.) con hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_esbozado_limbo_forma_geom._con_hombros_y/o_aletas"),
+("Puntas de proyectil (cabezales líticos): Pedúnculo esbozado, limbo (forma geom.) sin hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_esbozado_limbo_forma_geom._sin_hombros_y/o_aletas"),
+("Puntas de proyectil (cabezales líticos): Pedúnculo destacado, limbo (forma geom.) con hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_destacado_limbo_forma_geom._con_hombros_y/o_aletas"),
+("Puntas de proyectil (cabezales líticos): Pedúnculo destacado, limbo (forma geom.) sin hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_destacado_limbo_forma_geom._sin_hombros_y/o_aletas"),
+("Puntas de proyectil (cabezales líticos): Pedúnculo diferenciado,  limbo (forma geom.) con hombros y/o aletas","Puntas_de_proyectil_cabezales_líticos_Pedúnculo_diferenciado_limbo_forma_geom._con_hombros_y/o_aletas"),
+("Perforadores: Apedunculada (forma geométrica del limbo) con aletas","Perforadores_Apedunculada_forma_geométrica_del_limbo_con_aletas"),
+("Perforadores: Apedunculada (forma geom.del limbo) sin aletas","Perforadores_Apedunculada_forma_geom.del_limbo_sin_aletas"),
+("Perforadores: Preforma de punta apedunculada","Perforadores_Preforma_de_punta_apedunculada"),
+("Perforadores: Fragmento proximal de punta apedunculada","Perforadores_Fragmento_proximal_de_punta_apedunculada"),
+("Perforadores: Pedúnculo esbozado, limbo (forma geom.) con hombros y/o aletas","Perforadores_Pedúnculo_esbozado_limbo_forma_geom._con_hombros_y/o_aletas"),
+("Perforadores: Pedúnculo esbozado, limbo (forma geom.) sin hombros y/o aletas","Perforadores_Pedúnculo_esbozado_limbo_forma_geom._sin_hombros_y/o_aletas"),
+("Perforadores: Pedúnculo destacado, limbo (forma geom.) con hombros y/o aletas","Perforadores_Pedúnculo_destacado_limbo_forma_geom._con_hombros_y/o_aletas"),
+("Perforadores: Pedúnculo destacado, limbo (forma geom.) sin hombros y/o aletas","Perforadores_Pedúnculo_destacado_limbo_forma_geom._sin_hombros_y/o_aletas"),
+("Perforadores: Pedúnculo diferenciado,  limbo (forma geom.) con hombros y/o aletas","Perforadores_Pedúnculo_diferenciado_limbo_forma_geom._con_hombros_y/o_aletas"),
+("Perforadores: Pedúnculo diferenciado,  limbo (forma geom.) sin hombros y/o aletas","Perforadores_Pedúnculo_diferenciado_limbo_forma_geom._sin_hombros_y/o_aletas"),
+("Perforadores: Preforma de punta pedunculada","Perforadores_Preforma_de_punta_pedunculada"),
+("Perforadores: Fragmento proximal de pedunculo","Perforadores_Fragmento_proximal_de_pedunculo"),
+("Perforadores: Fragmento de pedúnculo","Perforadores_Fragmento_de_pedúnculo"),
+("Perforadores: Fragmento distal y/o ápice de limbo","Perforadores_Fragmento_distal_y/o_ápice_de_limbo"),
+("Perforadores: Fragmento mesial de limbo","Perforadores_Fragmento_mesial_de_limbo"),
+("Artefactos apedunculados o pedunculados de limbo embotado","Artefactos_apedunculados_o_pedunculados_de_limbo_embotado"),
+("Artefactos o fragmentos  de artefactos con formatización sumaria","Artefactos_o_fragmentos_de_artefactos_con_formatización_sumaria"),
+("Fragmentos no diferenciados de piezas formatizadas","Fragmentos_no_diferenciados_de_piezas_formatizadas"),
+("Fragmentos no diferenciados de filos o puntas formatizadas","Fragmentos_no_diferenciados_de_filos_o_puntas_formatizadas"),
+("Filos naturales de lascas u hojas con rastros complementarios","Filos_naturales_de_lascas_u_hojas_con_rastros_complementarios"),
+("Puntas naturales de lascas u hojas con rastros complementarios ","Puntas_naturales_de_lascas_u_hojas_con_rastros_complementarios_"),
+("Percutores de arista formatizada","Percutores_de_arista_formatizada"),
+("Percutores s/nódulos no formatizados,con rastros complementarios","Percutores_s/nódulos_no_formatizados,con_rastros_complementarios"),
+("Yunques: Nódulos con marcas de percusión concentradas en porción central de superficie natural.","Yunques_Nódulos_con_marcas_de_percusión_concentradas_en_porción_central_de_superficie_natural."),
+("Litos rayados ","Litos_rayados_"),
+("Rocas abrasivas con rastros complementarios (Abradidores)","Rocas_abrasivas_con_rastros_complementarios_Abradidores"),
+("Núcleos de lascas: Poliédrico","Núcleos_de_lascas_Poliédrico"),
+("Núcleos de lascas: Discoidal","Núcleos_de_lascas_Discoidal"),
+("Núcleos de lascas: Bifacial","Núcleos_de_lascas_Bifacial"),
+("Núcleos de lascas: Prismático atípico de lascas","Núcleos_de_lascas_Prismático_atípico_de_lascas"),
+("Núcleos de lascas: Otros no diferenciados de lascas","Núcleos_de_lascas_Otros_no_diferenciados_de_lascas"),
+("Núcleos de hojas: Prismático de hojas de extarcciones unidirecionales","Núcleos_de_hojas_Prismático_de_hojas_de_extarcciones_unidirecionales"),
+("Núcleos de hojas: Prismático de hojas a extraccione bidireccionales","Núcleos_de_hojas_Prismático_de_hojas_a_extraccione_bidireccionales"),
+("Núcleos de hojas: Piramidal","Núcleos_de_hojas_Piramidal"),
+("Núcleos de hojas: Otros de hojas no diferenciados","Núcleos_de_hojas_Otros_de_hojas_no_diferenciados"),
+("Núcleos a extracciones combinadas","Núcleos_a_extracciones_combinadas"),
+("Nucleiformes","Nucleiformes"),
+("Núcleos agotados","Núcleos_agotados"),
+("Fragmentos no diferenciados de Núcleos","Fragmentos_no_diferenciados_de_Núcleos"),
+("Desechos de talla enteros","Desechos_de_talla_enteros"),
+("Desechos de talla fragmentados con talón","Desechos_de_talla_fragmentados_con_talón"),
+("Desechos de talla fragmentados sin talón","Desechos_de_talla_fragmentados_sin_talón"),
+("Desechos de talla no diferenciados: lascas adventicias,  fragmentos poliédricos o chunks u otros.","Desechos_de_talla_no_diferenciados_lascas_adventicias_fragmentos_poliédricos_o_chunks_u_otros.")
+])
+
+Roca = enum.Enum("Roca", [
+    ('Roca no identificada', 'roca_no_identificada'),
+    ("Arenisca", "arenisca"),
+    ("Caliza silicificada", "caliza_silicificada"),
+    ("Cuarcita de grano medio o grueso", "cuarcita_grano_medio_grueso"),
+    ("Cuarzo cristalino", "cuarzo_cristalino"),
+    ("Cuarzo lácteo", "cuarzo_lacteo"),
+    ("Granito", "granito"),
+    ("Ignimbrita", "ignimbrita"),
+    ("Metacuarcita(grano fino)", "metacuarcita"),
+    ("Metamórfica no identificada", "metaforica_no_id "),
+    ("Obsidiana gris/negra, homogénea,manchada o bandeada", "obsidiana"),
+    ("Sílices diversos(jaspes, calcedonias coloreadas)", "silices_diversos"),
+    ("Vulcanitas ácidas, claras o coloreadas(riolitas, dacitas u otras) de grano fino", "vulcanitas_ac_claras"),
+    ("Vulcanitas básicas grises o negras de grano fino", "vulcanitas_basicas"),
+    ("Vulcanitas grano mediano a grueso", "vulcanitas_grano_mediano"),
+    ("Xilópalos (vetas visibles)", "xilopalos"),
+    ("Otros vidrios volcánicos claros o coloreados (no grises o negros)", "otros_vidrios")
+    ])
+
+Estado = enum.Enum("Estado", [
+    ("Entera o completa", "entera"),
+    ("Fracturada", "fracturada")
+])
+
+Tipo = enum.Enum("Tipo", [
+    ("Simple", "simple"),
+    ("Compuesta", "compuesta")
+])
+
+Eje = enum.Enum("Eje", [
+    ("Eje técnico o de lascado", "eje_tecnico"),
+    ("Eje morfológico", "eje_morfologico")
+])
+
+Clase_Art = enum.Enum("Clase Artefactual", [
+    ("Artefactos con filos, puntas o superficies con rastros complementarios", "art_rastros"),
+    ("Artefactos con filos, puntas y/o superficies formatizados", "art_sup"),
+    ("Desechos de talla", "Desechos"),
+    ("Nódulos con rastros complementarios", "nodulos_rastros"),
+    ("Nódulos transportados sin rastros complementarios (rocas aloctonas)", "nodulos"),
+    ("Núcleos", "nucleos")
+])
+
+Cant_Filos = enum.Enum("Cantidad de filos", [
+    "0","1","2","3","4","5","6","7","8","9","20"
+])
+
+Cant_Puntas = enum.Enum("Cantidad de puntas formatizadas", [
+    "0","1","2","3","4","5","6","7","8","9","20"
+])
+
+Clasificacion_Forma_Base = enum.Enum("Clasificación de forma base", [
+    ("Forma Base no diferenciada (0Z)", "0z"),
+    ("Hoja de aristas dobles o múltiples (3B)", "3b"),
+    ("Hoja no diferenciada (3Z)", "3z"),
+    ("Hoja reciclada (4C)", "4c"),
+    ("Laja o nódulo tabular no rodado (1G)", "1g"),
+    ("Lasca angular (2D)", "2d"),
+    ("Lasca con dorso natural (2C)", "2c"),
+    ("Lasca de arista simple o doble (2E)", "2e"),
+    ("Lasca de flanco de nucleo (2H)", "2h"),
+    ("Lasca de tableta de núcleo (2I)", "2i"),
+    ("Lasca en cresta (2G)", "2g"),
+    ("Lasca no diferenciada (2Z)", "2z"),
+    ("Lasca plana (2F)", "2f"),
+    ("Lasca primaria (2A)", "2a"),
+    ("Lasca reciclada (4B)", "4b"),
+    ("Lasca secundaria (2B)", "2b"),
+    ("Lasca semi-tableta de núcleo (2J)", "2j"),
+    ("Módulo no diferenciado (1Z)", "1z"),
+    ("Nódulo o rodado a facetas naturales (1E)", "1e"),
+    ("Nódulo tabular (rodado) (1F)", "1f"),
+    ("Artefacto formatizado reciclado (4A)", "4a"),
+    ("Artefacto reciclado, no diferenciado (4Z)", "4z"),
+    ("Bloque no transportable, con/sin facetas (1H)", "1h"),
+    ("Clasto (frag.anguloso natural) (1I)", "1i"),
+    ("Concreción nodular(con restos de matriz) (1J)", "1j"),
+    ("Núcleo reciclado 4D", "4d")
+])
+
+Cant_Cicatrices = enum.Enum("Cantidad de cicatrices de lascado", [
+    "0","1","2","3","4","5","6","7","8","9","20"
+])
+
+Origen_extraccion = enum.Enum("Origen de la extracción", [
+    ("Origen no diferenciado (9)", "9"),
+    ("Adelgazamiento o reducción bifacial (2)", "2"),
+    ("Reactivación de núcleos (4)", "4"),
+    ("Reactivación de útiles o instrumento (3)", "3"),
+    ("Talla de extracción (1)", "1")
+])
+
+Alteraciones = enum.Enum("Alteraciones", [
+    ("Alteraciones no diferenciadas (Z0)", "az0"),
+    ("Alteraciones térmicas múltiples (E4)", "ae4"),
+    ("Alteraciones térmicas no diferenciadas (E0)", "ae0"),
+    ("Alteracion térmica del color (E3)", "ae3"),
+    ("Craqueleado (E2)", "ae2"),
+    ("Desprendimientos cupulares u 'hoyuelos' (E1)", "ae1"),
+    ("Lustre sin gradaciones diferenciadas (A0)", "aa0"),
+    ("Patina grisacea o blanquecina 'en costra' (B2)", "ab2"),
+    ("Patina rojiza o 'barniz del desierto' (B1)", "ab1"),
+    ("Patina sin gradaciones diferenciadas (B0)", "ab0"),
+    ("Rodamiento sin gradaciones (D0)", "ad0"),
+    ("Ventifaccion sin gradaciones (C0)", "ac0")
+])
+
+Estado_Talon = enum.Enum("Estado del talón", [
+    ("Entero", "entero"),
+    ("Fracturado", "fracturado"),
+    ("Rebajado", "rebajado"),
+    ("Eli", "eli")
+])
+
+Superficie_Talon = enum.Enum("Superficie talón o plataforma", [
+    ("Cortical (Ct)", "ct"),
+    ("Liso-Cortical  (LiC)", "lic"),
+    ("Liso (Li)", "li"),
+    ("Facetado (Fc)", "fc"),
+    ("Filiforme (Fi)", "fi"),
+    ("Puntiforme (Pt)", "pt")
+])
+
+Clase_tecnica = enum.Enum("Clase técnica", [
+    ("Artefacto con adelgazamiento bifacial", "acab"),
+    ("Con reducción bifacial", "crb"),
+    ("Bifacial marginales", "cm"),
+    ("Adelgazamiento unifacial", "au"),
+    ("Reducción unifacial", "ru"),
+    ("Unifacial marginales", "um"),
+    ("Talla de extracción sin formatización", "tesf"),
+    ("Lito transportado (alóctono) no tallado", "ltnt")
+])
+
+Reduc_uni_sbordes = enum.Enum("Reducción unifacial sin bordes", ["Si", "No"])
+
+Las_inv_lim = enum.Enum("Lascado inverso limitante", ["Si", "No"])
+
+Forma_geo = enum.Enum("Forma geométrica", [
+    #-----Filos-----
+    ("Filo - Convexo atenuado o muy atenuado (A1)", "FA1"),
+    ("Filo - Convexo medio (A2)", "FA2"),
+    ("Filo - Convexo semicircular (A3)", "FA3"),
+    ("Filo - Cóncavo atenuado o muy atenuado (B1)", "FB1"),
+    ("Filo - Cóncavo medio (B2)", "FB2"),
+    ("Filo - Cóncavo semicircular (B3)", "FB3"),
+    ("Filo - Recto (C)", "FC"),
+    ("Filo - Irregular - Combinados B/c ó A/C (D)", "FD"),
+    #-----Puntas manuales (sección)-----
+    ("Punta manual - Triédrica (E)", "PE"),
+    ("Punta manual - Cuadrangular o trapezoidal (F)", "PF"),
+    ("Punta manual - Plano-convexa (G)", "PG"),
+    ("Punta manual -  Biconvexa (H)", "PH"),
+    ("Punta manual - No diferenciada (Z)", "PZ"),
+    #-----Limbos-----
+    ("Limbo - Triangular corto convexilíneo (I)", "LI"),
+    ("Limbo - Triangular largo convexilíneo (J)", "LJ"),
+    ("Limbo - Triangular corto rectililneo (K)", "LK"),
+    ("Limbo - Traingular largo rectilíneo (L)", "LL"),
+    ("Limbo -Triangular corto concavilíneo (M)", "LM"),
+    ("Limbo - Triangular largo concavilíneo (N)", "LN"),
+    ("Limbo -Lanceolado (n)", "Ln"),
+    ("Limbo -Lanceolado con bordes medios paralelos (O)", "LO"),
+    ("Limbo - En mandorla (bipunta lanceolada) (P)", "LP"),
+    ("Limbo - Lanceolada asimétrica o almendrada. (Q)", "LQ"),
+    #-----Bordes de pedúnculos-----
+    ("Borde - Paralelos o subparalelos (R)", "BR"),
+    ("Borde - Divergentes hacia la base- (R)", "BD"),
+    ("Borde - Convergentes, idem.- (S)", "BC"),
+    ("Borde - Expandidos. (T)", "BT"),
+    #-----Contornos-----
+    ("Contorno - Oval (U)", "CU"),
+    ("Contorno - Elípticos (V)", "CV"),
+    ("Contorno - lanceolado (O)", "CO"),
+    ("Contorno - Almendrado (Q)", "CQ"),
+    ("Contorno - No diferenciada. (Z)", "CZ"),
+    #-----Delineación aristas de piezas bifaciales-----
+    ("Delineacion - Regular normal (X1)", "DX1"),
+    ("Delineacion - Sinuosa regula (X2)", "DX2"),
+    ("Delineacion - Sinuosa irregular (X3)", "DX3"),
+    ("Delineacion - No diferenciada (Z)", "DZ")
+])
+
+Estado_bisel = enum.Enum("Estado de bisel", [
+    ("No diferenciado (Z0)", "ezo"),
+    ("Activo no astillado (A1)", "ea1"),
+    ("Activo Astiladol (A2)", "ea2"),
+    ("Embotado(+80°) (B1)", "eb1"),
+    ("Embotado astillado (B2)", "eb2"),
+    ("Con astillad.escalonadas (B3)", "eb3"),
+    ("Recto (C)", "ec")
+])
+
+Mantenimiento = enum.Enum("Mantenimiento", ["Si", "No"])
+
+Parte_pasiva = enum.Enum("Parte pasiva", [
+    ("No diferenciado", "ppnd"),
+    ("Dorso formatizado", "ppdf"),
+    ("Dorso abatido (por lascado único)", "ppda"),
+    ("Formatización sumaria de acomodación", "ppfsa"),
+    ("Corteza reservada", "ppcr"),
+    ("Plano de fractura utilizado", "ppcf"),
+    ("Filo en ficha", "ppff"),
+])
+
+Forma_lascados = enum.Enum("Forma de lascados", [
+    ("No diferenciado", "flnd"),
+    ("Lasca simple", "flls"),
+    ('Simple laminar "en golpe de buril"', "flgb"),
+    ("Paralelo corto", "flpc"),
+    ("Paralelo laminar", "flpl"),
+    ("Escamoso", "fle"),
+    ("Escamoso escalonado", "flee")
+])
+
+Sustancia = enum.Enum("Sustancia adherida", ["Si", "No"])
+
+
+class Vocabulario(object):
+    """Lookups, form choices and option HTML of one vocabulary, computed
+    once so that forms, filters and the API share them."""
+
+    def __init__(self, nombre, clase):
+        self.nombre = nombre
+        self.clase = clase
+        self.titulo = clase.__name__
+        self.etiquetas = [miembro.name for miembro in clase]
+        self.por_etiqueta = dict((miembro.name, miembro) for miembro in clase)
+        self.por_codigo = dict((miembro.value, miembro) for miembro in clase)
+        self.opciones = [(etiqueta, etiqueta) for etiqueta in self.etiquetas]
+        # <option> elements as a select widget renders them, unselected
+        # and selected
+        self.html = [Markup('<option value="%s">%s</option>') % (e, e)
+                     for e in self.etiquetas]
+        self.html_seleccionada = [Markup('<option selected value="%s">%s</option>') % (e, e)
+                                  for e in self.etiquetas]
+        self.posicion = dict((e, i) for i, e in enumerate(self.etiquetas))
+
+    def como_dict(self):
+        return dict(titulo=self.titulo,
+                    opciones=[dict(codigo=miembro.value, etiqueta=miembro.name)
+                              for miembro in self.clase])
+
+
+VOCABULARIOS = OrderedDict(
+    (nombre, Vocabulario(nombre, valor)) for nombre, valor in list(globals().items())
+    if isinstance(valor, enum.EnumMeta) and valor is not enum.Enum)
+
+_POR_CLASE = dict((v.clase, v) for v in VOCABULARIOS.values())
+
+
+def de(clase):
+    """The Vocabulario of an Enum class, or None if it is not one of these."""
+    return _POR_CLASE.get(clase)
+
+
+# Every vocabulary as served by the API, and its ETag
+JSON = json.dumps(OrderedDict((nombre, v.como_dict()) for nombre, v in VOCABULARIOS.items()),
+                  ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+ETAG = hashlib.sha1(JSON).hexdigest()
@@ -0,0 +1,13 @@
+# -*- encoding: utf-8 -*-
+"""WSGI entry point, with the production profile unless another one is
+chosen with ARQCHEROS_PERFIL.
+
+    ARQCHEROS_SECRET_KEY=... ARQCHEROS_METRICAS_TOKEN=... gunicorn -c gunicorn.conf.py wsgi:application
+"""
+import os
+
+os.environ.setdefault('ARQCHEROS_PERFIL', 'prod')
+
+from arqcheros import create_app
+
+application = create_app()